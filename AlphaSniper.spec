@@ -1,4 +1,6 @@
 # -*- mode: python ; coding: utf-8 -*-
+# onedir 빌드: dist/AlphaSniper/ 폴더에 실행 파일과 라이브러리를 풀어 둔 상태로 배포합니다.
+# onefile과 달리 실행할 때마다 임시 폴더로 압축을 풀지 않으므로 재시작이 빠릅니다.
 
 
 a = Analysis(
@@ -6,11 +8,12 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=['telethon'],
+    # websockets는 NLF_ENABLED일 때만 함수 안에서 import됨
+    hiddenimports=['telethon', 'websockets'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['tkinter'],
     noarchive=False,
     optimize=0,
 )
@@ -19,16 +22,13 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='AlphaSniper',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=True,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +36,13 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='AlphaSniper',
+)
@@ -0,0 +1,182 @@
+"""재시작/재연결 동안 놓친 감시 채널 메시지를 마지막으로 본 메시지 ID부터 다시 가져와 처리합니다."""
+import os
+import json
+import time
+import asyncio
+import logging
+
+from extractors import extract_all_cas
+from ingest import message_text
+
+DEFAULT_MAX_AGE = 120.0  # 이보다 오래된 메시지는 매수하지 않음 (초)
+DEFAULT_BATCH = 100  # 채널마다 한 번에 가져올 최대 메시지 수
+CURSOR_FLUSH_SECONDS = 5.0
+
+
+class CursorStore:
+    """채널별 마지막으로 받은 메시지 ID를 JSON 파일에 저장합니다 (변경이 있을 때만 주기적으로 기록)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._cursors = {}  # 채팅 ID -> 마지막 메시지 ID
+        self._dirty = False
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._cursors = {int(chat_id): int(message_id) for chat_id, message_id in json.load(f).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.error(f"채널 수신 위치 파일 로드 실패 ({self.path}): {e}")
+            return 0
+        return len(self._cursors)
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({str(chat_id): message_id for chat_id, message_id in self._cursors.items()}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            logging.error(f"채널 수신 위치 파일 저장 실패 ({self.path}): {e}")
+
+    def get(self, chat_id):
+        return self._cursors.get(chat_id)
+
+    def advance(self, chat_id, message_id):
+        if message_id > self._cursors.get(chat_id, 0):
+            self._cursors[chat_id] = message_id
+            self._dirty = True
+
+    async def flush_periodically(self, interval=CURSOR_FLUSH_SECONDS):
+        while True:
+            await asyncio.sleep(interval)
+            self.save()
+
+    def __len__(self):
+        return len(self._cursors)
+
+
+class Backfill:
+    """
+    놓친 채널 메시지를 가져와 수신 계층(ingest.TelegramIngest)으로 다시 처리합니다.
+    channels는 {채팅 ID: get_messages에 넘길 엔티티(InputPeer 등)}입니다.
+    """
+
+    def __init__(self, client, ingest, cursors, channels=None, max_age=DEFAULT_MAX_AGE, batch=DEFAULT_BATCH,
+                 clock=time.time):
+        self.client = client
+        self.ingest = ingest
+        self.cursors = cursors
+        self.channels = dict(channels or {})
+        self.max_age = max_age
+        self.batch = batch
+        self._clock = clock
+        self._lock = asyncio.Lock()  # 재연결이 연달아 일어나도 한 번에 하나씩 실행
+        self.runs = 0
+        self.fetched = 0
+        self.processed = 0
+        self.stale = 0
+        self.stale_listings = 0
+        self.truncated = 0
+        self.errors = 0
+        self.last_run = None
+
+    async def _catch_up_channel(self, chat_id, entity):
+        last_id = self.cursors.get(chat_id)
+        if last_id is None:
+            # 처음 보는 채널: 과거 메시지는 매수하지 않고 현재 위치만 기록
+            latest = await self.client.get_messages(entity, limit=1)
+            if latest:
+                self.cursors.advance(chat_id, latest[0].id)
+            return 0
+        messages = await self.client.get_messages(entity, min_id=last_id, limit=self.batch)
+        if not messages:
+            return 0
+        messages = sorted(messages, key=lambda m: m.id)
+        self.fetched += len(messages)
+        if len(messages) >= self.batch and messages[0].id > last_id + 1:
+            self.truncated += 1
+            logging.warning(f"채널 {chat_id}: 놓친 메시지가 {self.batch}개를 넘어 최근 {self.batch}개만 확인합니다.")
+        now = self._clock()
+        processed = 0
+        for message in messages:
+            posted = message.date.timestamp() if message.date is not None else now
+            if now - posted > self.max_age:
+                self.stale += 1
+                found = extract_all_cas(message_text(message))
+                if found:
+                    self.stale_listings += len(found)
+                    logging.warning(f"놓친 리스팅이지만 {now - posted:.0f}초 지나 매수하지 않습니다: "
+                                    f"{', '.join(ca for ca, _ in found)} (채널 {chat_id})")
+                self.cursors.advance(chat_id, message.id)
+                continue
+            await self.ingest.handle_message(chat_id, message, backfill=True)
+            processed += 1
+        self.processed += processed
+        return processed
+
+    async def catch_up(self, reason="restart"):
+        """모든 소스 채널의 놓친 메시지를 처리합니다. 처리한 메시지 수를 반환합니다."""
+        async with self._lock:
+            started = time.perf_counter()
+            self.runs += 1
+            results = await asyncio.gather(
+                *(self._catch_up_channel(chat_id, entity) for chat_id, entity in self.channels.items()),
+                return_exceptions=True,
+            )
+            processed = 0
+            for chat_id, result in zip(self.channels, results):
+                if isinstance(result, Exception):
+                    self.errors += 1
+                    logging.error(f"채널 {chat_id} 놓친 메시지 확인 실패: {result}")
+                else:
+                    processed += result
+            self.cursors.save()
+            self.last_run = {"reason": reason, "processed": processed,
+                             "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+            if processed:
+                logging.info(f"놓친 메시지 {processed}개 처리 완료 ({reason}, {self.last_run['elapsed_ms']}ms)")
+            return processed
+
+    def attach(self, client):
+        """
+        Telethon이 자동 재연결에 성공할 때마다 catch_up을 실행하도록 연결합니다.
+        (Telethon 1.x는 재연결 후 채널 업데이트를 따라잡지 않으므로 내부 재연결 콜백을 감쌉니다.)
+        """
+        sender = getattr(client, "_sender", None)
+        if sender is None or not hasattr(sender, "_auto_reconnect_callback"):
+            logging.warning("재연결 감지를 지원하지 않는 클라이언트입니다. 주기적 확인만 사용합니다.")
+            return False
+        original = sender._auto_reconnect_callback
+
+        async def on_reconnect():
+            if original is not None:
+                await original()
+            await self.catch_up("reconnect")
+
+        sender._auto_reconnect_callback = on_reconnect
+        return True
+
+    async def run_periodically(self, interval):
+        """재연결 감지와 별개로 interval초마다 놓친 메시지를 확인합니다."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.catch_up("interval")
+
+    def summary(self):
+        return {
+            "channels": len(self.channels),
+            "runs": self.runs,
+            "fetched": self.fetched,
+            "processed": self.processed,
+            "stale": self.stale,
+            "stale_listings": self.stale_listings,
+            "truncated": self.truncated,
+            "errors": self.errors,
+            "last_run": self.last_run,
+        }
@@ -0,0 +1,73 @@
+"""
+Microbenchmark: CA extraction engine vs. the original per-message re.search path
+Usage: python bench_extractors.py [corpus.jsonl] [--repeat N]
+"""
+import re
+import sys
+import json
+import timeit
+import argparse
+
+from extractors import extract_ca, BINANCE_URL_REGEX, NEWSBOTHUB_SOURCE_REGEX
+
+DEFAULT_CORPUS = "samples/channel_messages.jsonl"
+
+
+def legacy_extract(message_text):
+    """기존 main.py 핸들러의 추출 로직 (비교용)"""
+    url_match = re.search(BINANCE_URL_REGEX, message_text)
+    if url_match:
+        return url_match.group(1)
+    if "live on binance alpha" in message_text.lower():
+        source_match = re.search(NEWSBOTHUB_SOURCE_REGEX, message_text, re.IGNORECASE)
+        if source_match:
+            return source_match.group(1)
+    return None
+
+
+def engine_extract(message_text):
+    result = extract_ca(message_text)
+    return result[0] if result else None
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def bench(func, texts, repeat):
+    timer = timeit.Timer(lambda: [func(t) for t in texts])
+    best = min(timer.repeat(repeat=5, number=repeat))
+    return best / (repeat * len(texts)) * 1e9  # ns/메시지
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    errors = [r for r in corpus if engine_extract(r["text"]) != r["ca"]]
+    if errors:
+        for r in errors:
+            print(f"❌ 추출 불일치: expected={r['ca']} got={engine_extract(r['text'])}\n{r['text']}")
+        sys.exit(1)
+
+    groups = {
+        "matching": [r["text"] for r in corpus if r["ca"]],
+        "non-matching": [r["text"] for r in corpus if not r["ca"]],
+        "all": [r["text"] for r in corpus],
+    }
+    print(f"corpus: {args.corpus} ({len(corpus)} messages)")
+    print(f"{'traffic':<14}{'legacy ns/msg':>16}{'engine ns/msg':>16}{'speedup':>10}")
+    for name, texts in groups.items():
+        if not texts:
+            continue
+        legacy = bench(legacy_extract, texts, args.repeat)
+        engine = bench(engine_extract, texts, args.repeat)
+        print(f"{name:<14}{legacy:>16.0f}{engine:>16.0f}{legacy / engine:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+End-to-end load benchmark for the buy pipeline.
+
+Drives synthetic Telegram events and NLF frames (through a local WebSocket server) at
+configurable rates into the real pipeline code, against a fake Telethon client, and reports
+throughput, tail latency, event-loop lag and memory growth for each path:
+
+  telegram        steady channel traffic (extraction + dedup + order dispatch)
+  nlf_websocket   frames from a local WebSocket server over redundant links (decode + cross-link dedup)
+  listing_burst   N listings in the same second on both feeds (dedup race + rate-limited dispatch)
+  auto_sell       many positions exiting at once (exit engine + sell scheduler)
+
+Results can be saved and compared with a stored baseline:
+  python bench_pipeline.py --save                      # bench_results/<timestamp>.json
+  python bench_pipeline.py --compare bench_results/baseline.json [--fail-on-regression]
+  python bench_pipeline.py --update-baseline
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+from types import SimpleNamespace
+from functools import partial
+from datetime import datetime, timezone
+
+from dedup import DedupService
+from ingest import TelegramIngest
+from latency import LatencyTracker, RollingHistogram
+from monitor import LoopMonitor
+from nlf import NLFConnectionManager, JSON_BACKEND
+from pipeline import build_pipeline
+from positions import TimeExit
+from replay import FakeClient, FakeEvent, FakeMessage
+
+RESULTS_DIR = "bench_results"
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+CHAT_ID = -1001111111111
+
+# 기준선 비교에 사용하는 지표와 방향 (True: 클수록 좋음)
+COMPARED_METRICS = {
+    "throughput_per_sec": True,
+    "ack_p99_ms": False,
+    "decode_p99_ms": False,
+    "loop_lag_p99_ms": False,
+    "sell_lag_p99_ms": False,
+    "rss_growth_kb": False,
+}
+
+
+def synthetic_ca(i):
+    return f"0x{i:040x}"
+
+
+def listing_text(ca):
+    return f"🟡 Binance Alpha new listing\n\nhttps://www.binance.com/en/binancewallet/{ca}/bsc\n\n#BinanceAlpha"
+
+
+def chatter_text(i):
+    return f"Market update #{i}: BTC dominance steady, no new listings in this message."
+
+
+def listing_frame(ca, exchange="binance"):
+    return json.dumps({"exchange": exchange, "type": "alpha",
+                       "detections": [{"onchain": {"chain": "bsc", "contract": ca}}]})
+
+
+def rss_kb():
+    """현재 프로세스의 RSS (KB). /proc이 없으면 최대 RSS로 대신합니다."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Harness:
+    """가짜 텔레그램 클라이언트에 연결된 실제 파이프라인 (발신 큐, 스케줄러, 청산 엔진 포함)"""
+
+    def __init__(self, tmp, send_latency, rate=0.0, burst=5, exit_rules=None):
+        self.client = FakeClient(SimpleNamespace(time=time.time), latency=send_latency)
+        self.tracker = LatencyTracker(window=100000)
+        self.dedup = DedupService(max_entries=1000000)
+        self.pipeline = build_pipeline(
+            self.client.send_message, ["@GMGN_bsc_bot"], self.dedup, os.path.join(tmp, "bench.sells.json"),
+            buy_amount=0.1, sell_delay=3600, sell_percent=100, rate=rate, burst=burst,
+            tracker=self.tracker, exit_rules=exit_rules,
+        )
+        self._workers = []
+
+    def start(self):
+        self._workers = [
+            asyncio.create_task(self.pipeline.outbound.run()),
+            asyncio.create_task(self.pipeline.sell_scheduler.run()),
+            asyncio.create_task(self.pipeline.exit_engine.run()),
+        ]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def stage(self, feed_key, stage):
+        return self.tracker.snapshot().get(feed_key, {}).get(stage, {})
+
+    def sent(self, prefix):
+        return [s for s in self.client.sent if s["text"].startswith(prefix)]
+
+
+async def pace(rate, count, emit):
+    """rate개/초 속도로 emit(i)를 count번 호출합니다 (밀리면 따라잡기 위해 대기 없이 호출)."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for i in range(count):
+        delay = start + i / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        emit(i)
+
+
+async def measure(scenario, *args):
+    """시나리오를 실행하면서 이벤트 루프 지연과 메모리 증가를 함께 측정합니다."""
+    monitor = LoopMonitor(interval=0.01, slow_threshold=0.05, window=100000)
+    monitor.install()
+    sampling = asyncio.create_task(monitor.run())
+    rss_before = rss_kb()
+    started = time.perf_counter()
+    try:
+        result = await scenario(*args)
+    finally:
+        sampling.cancel()
+        monitor.uninstall()
+    result["wall_seconds"] = round(time.perf_counter() - started, 3)
+    lag = monitor.lag.summary()
+    result["loop_lag_p50_ms"] = lag.get("p50")
+    result["loop_lag_p99_ms"] = lag.get("p99")
+    result["loop_lag_max_ms"] = lag.get("max")
+    result["slow_callbacks"] = monitor.slow_total
+    if monitor.slow:
+        result["slowest_callback"] = max(monitor.slow, key=lambda name: monitor.slow[name][2])
+    result["rss_growth_kb"] = rss_kb() - rss_before
+    return result
+
+
+# --- 시나리오 ---
+async def scenario_telegram(args):
+    """채널 메시지 args.rate개/초 (수신 계층 포함), listing_every개마다 새 리스팅 1개"""
+    count = int(args.rate * args.duration)
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Harness(tmp, args.send_latency_ms / 1000)
+        harness.start()
+        tasks = []
+        handle = TelegramIngest(harness.pipeline).handle
+
+        def emit(i):
+            listing = i % args.listing_every == 0
+            text = listing_text(synthetic_ca(i)) if listing else chatter_text(i)
+            message = FakeMessage(i, text, datetime.now(timezone.utc), CHAT_ID)
+            tasks.append(asyncio.create_task(handle(FakeEvent(CHAT_ID, message))))
+
+        started = time.perf_counter()
+        await pace(args.rate, count, emit)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        await harness.stop()
+        key = f"telegram:{CHAT_ID}"
+        ack = harness.stage(key, "ack")
+        return {
+            "messages": count,
+            "throughput_per_sec": round(count / elapsed, 1),
+            "buys": len(harness.sent("/buy")),
+            "extract_p99_ms": harness.stage(key, "extract").get("p99"),
+            "ack_p50_ms": ack.get("p50"),
+            "ack_p99_ms": ack.get("p99"),
+        }
+
+
+async def scenario_nlf_websocket(args):
+    """로컬 WebSocket 서버가 args.nlf_rate개/초로 프레임 전송 (대부분 다른 거래소), 연결 2개"""
+    import websockets
+
+    count = int(args.nlf_rate * args.duration)
+    done = asyncio.Event()
+
+    async def serve(websocket):
+        def emit(i):
+            if i % args.listing_every == 0:
+                frame = listing_frame(synthetic_ca(10**6 + i))
+            else:
+                frame = listing_frame(synthetic_ca(i), exchange="upbit")
+            # 두 연결 모두 같은 프레임을 받음 (중복 제거 확인)
+            asyncio.ensure_future(websocket.send(frame))
+        await pace(args.nlf_rate, count, emit)
+        await done.wait()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Harness(tmp, args.send_latency_ms / 1000)
+        harness.start()
+        server = await websockets.serve(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        manager = NLFConnectionManager([f"ws://127.0.0.1:{port}"],
+                                       partial(harness.pipeline.submit_nlf_frame, prefiltered=True),
+                                       connections_per_url=2, ping_interval=1.0)
+        running = asyncio.create_task(manager.run())
+        started = time.perf_counter()
+        expected = count * 2
+        while sum(link.frames for link in manager.links) < expected and time.perf_counter() - started < args.duration * 3:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.2 + args.send_latency_ms / 1000)  # 남은 매수 완료 대기
+        done.set()
+        running.cancel()
+        server.close()
+        await harness.stop()
+        frames = sum(link.frames for link in manager.links)
+        key = f"nlf:ws://127.0.0.1:{port}"
+        return {
+            "frames": frames,
+            "throughput_per_sec": round(frames / elapsed, 1),
+            "duplicates": manager.duplicates,
+            "buys": len(harness.sent("/buy")),
+            "decode_p99_ms": harness.stage(key, "decode").get("p99"),
+            "queue_p99_ms": harness.stage(key, "queue").get("p99"),
+            "ack_p99_ms": harness.stage(key, "ack").get("p99"),
+            "json_backend": JSON_BACKEND,
+        }
+
+
+async def scenario_listing_burst(args):
+    """같은 1초 안에 리스팅 args.burst개가 텔레그램과 NLF 양쪽으로 도착 (운영 기본 발신 속도 제한 적용)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Harness(tmp, args.send_latency_ms / 1000, rate=5.0, burst=5)
+        harness.start()
+        tasks = []
+
+        def emit(i):
+            ca = synthetic_ca(2 * 10**6 + i)
+            tasks.append(asyncio.create_task(harness.pipeline.handle_nlf_frame(listing_frame(ca), "burst")))
+            message = FakeMessage(i, listing_text(ca), datetime.now(timezone.utc), CHAT_ID)
+            tasks.append(asyncio.create_task(harness.pipeline.handle_message(FakeEvent(CHAT_ID, message))))
+
+        started = time.perf_counter()
+        await pace(args.burst, args.burst, emit)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        await harness.stop()
+        ack = harness.stage("nlf:burst", "ack")
+        return {
+            "listings": args.burst,
+            "throughput_per_sec": round(args.burst / elapsed, 2),
+            "buys": len(harness.sent("/buy")),
+            "races": sum(harness.dedup.race_summary()["wins"].values()),
+            "ack_p50_ms": ack.get("p50"),
+            "ack_p99_ms": ack.get("p99"),
+            "ack_max_ms": ack.get("max"),
+        }
+
+
+async def scenario_auto_sell(args):
+    """포지션 args.positions개가 짧은 간격으로 열리고, 두 단계 시간 규칙으로 청산"""
+    rules = [TimeExit(0.2, 50), TimeExit(0.4, 100)]
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Harness(tmp, args.send_latency_ms / 1000, exit_rules=rules)
+        harness.start()
+        engine = harness.pipeline.exit_engine
+        due = {}
+
+        def emit(i):
+            position = engine.open(synthetic_ca(3 * 10**6 + i), 0.1, "bench")
+            due[position.ca] = [position.bought_at + rule.after for rule in rules]
+
+        started = time.perf_counter()
+        await pace(args.positions / 0.5, args.positions, emit)  # 0.5초 동안 모두 매수
+        while len(harness.sent("/sell")) < 2 * args.positions and time.perf_counter() - started < 10:
+            await asyncio.sleep(0.02)
+        elapsed = time.perf_counter() - started
+        await harness.stop()
+
+        lag = RollingHistogram(100000)
+        seen = {}
+        for sell in harness.sent("/sell"):
+            ca = sell["text"].split()[1]
+            step = seen.get(ca, 0)
+            seen[ca] = step + 1
+            lag.record(max(0.0, (sell["ts"] - due[ca][step]) * 1000))
+        summary = lag.summary()
+        sells = len(harness.sent("/sell"))
+        return {
+            "positions": args.positions,
+            "sells": sells,
+            "throughput_per_sec": round(sells / elapsed, 1),
+            "evaluations": engine.evaluations,
+            "sell_lag_p50_ms": summary.get("p50"),
+            "sell_lag_p99_ms": summary.get("p99"),
+        }
+
+
+SCENARIOS = {
+    "telegram": scenario_telegram,
+    "nlf_websocket": scenario_nlf_websocket,
+    "listing_burst": scenario_listing_burst,
+    "auto_sell": scenario_auto_sell,
+}
+
+
+async def run_all(args, names):
+    results = {}
+    for name in names:
+        results[name] = await measure(SCENARIOS[name], args)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """기준선 대비 변화율을 출력하고, threshold(%) 이상 나빠진 지표 목록을 반환합니다."""
+    regressions = []
+    print(f"\n{'scenario':<16}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, metrics in results.items():
+        base = baseline.get("results", {}).get(name, {})
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = " ⚠️" if worse > threshold and abs(new - old) > 1.0 else ""
+            if flag:
+                regressions.append(f"{name}.{metric}")
+            print(f"{name:<16}{metric:<22}{old:>12.2f}{new:>12.2f}{change:>+9.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline load benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenarios to run")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds of traffic per steady scenario")
+    parser.add_argument("--rate", type=float, default=2000, help="Telegram messages per second")
+    parser.add_argument("--nlf-rate", type=float, default=1000, help="NLF frames per second (per connection)")
+    parser.add_argument("--listing-every", type=int, default=50, help="one new listing every N messages")
+    parser.add_argument("--burst", type=int, default=10, help="listings landing in the same second")
+    parser.add_argument("--positions", type=int, default=500, help="positions in the auto-sell scenario")
+    parser.add_argument("--send-latency-ms", type=float, default=30, help="simulated Telegram send latency")
+    parser.add_argument("--save", action="store_true", help=f"save results to {RESULTS_DIR}/<timestamp>.json")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a saved result (e.g. the baseline)")
+    parser.add_argument("--update-baseline", action="store_true", help=f"write results to {BASELINE_PATH}")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='[%(levelname) 5s/%(asctime)s] %(name)s: %(message)s', level=logging.ERROR)
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {unknown}")
+
+    results = asyncio.run(run_all(args, names))
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {k: v for k, v in vars(args).items()
+                    if k not in ("save", "compare", "update_baseline", "fail_on_regression")},
+        "results": results,
+    }
+    for name, metrics in results.items():
+        print(f"[{name}]")
+        for metric, value in metrics.items():
+            print(f"  {metric:<22}{value}")
+
+    if args.save or args.update_baseline:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        paths = [BASELINE_PATH] if args.update_baseline else []
+        if args.save:
+            paths.append(os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"))
+        for path in paths:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"saved: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n⚠️  regressions over {args.threshold:g}%: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""다중 프로세스(슈퍼바이저 모드)용 공유 브로커: 워커들의 CA 선점과 계정별 포지션 한도를 한곳에서 관리합니다."""
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+
+from dedup import DedupService, DedupStore
+
+# 브로커 요청 응답 대기 시간 (초)
+REQUEST_TIMEOUT = 1.0
+
+_TCP_ADDRESS = re.compile(r"^[\w.\-]+:\d+$")
+
+
+def is_tcp_address(address):
+    return bool(_TCP_ADDRESS.match(address))
+
+
+class AccountState:
+    """계정(지갑) 하나의 중복 방지 기록, 미청산 포지션, 한도"""
+
+    __slots__ = ("name", "dedup", "positions", "max_positions", "max_exposure", "buys", "denied")
+
+    def __init__(self, name, dedup, max_positions=None, max_exposure=None):
+        self.name = name
+        self.dedup = dedup
+        self.positions = {}  # CA -> 매수 금액 (선점된 매수 포함)
+        self.max_positions = max_positions  # 동시에 보유할 최대 포지션 수 (None이면 무제한)
+        self.max_exposure = max_exposure  # 미청산 포지션 금액 합계 한도 (BNB, None이면 무제한)
+        self.buys = 0
+        self.denied = {}
+
+    def exposure(self):
+        return sum(self.positions.values())
+
+    def summary(self):
+        return {
+            "positions": len(self.positions),
+            "exposure": round(self.exposure(), 8),
+            "max_positions": self.max_positions,
+            "max_exposure": self.max_exposure,
+            "buys": self.buys,
+            "denied": dict(self.denied),
+            "races": self.dedup.race_summary()["wins"],
+        }
+
+
+class Broker:
+    """
+    워커 프로세스들이 공유하는 중복 방지 / 포지션 저장소.
+    계정별로 DedupService를 두고, 같은 계정의 워커끼리는 같은 CA를 한 번만 매수합니다.
+    """
+
+    def __init__(self, state_dir=None, ttl=86400, clock=time.time):
+        self.state_dir = state_dir  # 지정하면 계정별 중복 방지 기록을 SQLite로 저장
+        self.ttl = ttl
+        self._clock = clock
+        self.accounts = {}
+        self.reports = {}  # 워커 이름 -> (수신 시각, 지연 시간 메트릭)
+
+    def account(self, name):
+        state = self.accounts.get(name)
+        if state is None:
+            store = None
+            if self.state_dir:
+                store = DedupStore(os.path.join(self.state_dir, f"broker.{name}.dedup.sqlite"))
+            state = self.accounts[name] = AccountState(name, DedupService(store=store, ttl=self.ttl, clock=self._clock))
+        return state
+
+    def configure(self, name, max_positions=None, max_exposure=None):
+        state = self.account(name)
+        state.max_positions = max_positions
+        state.max_exposure = max_exposure
+        return state
+
+    # --- 요청 처리 (모두 동기: 이벤트 루프 안에서 원자적) ---
+    def claim(self, account, ca, feed, amount):
+        """매수 전에 호출. 'ok', 'duplicate', 'max_positions', 'max_exposure' 중 하나를 반환합니다."""
+        state = self.account(account)
+        key = DedupService.normalize(ca)
+        if key in state.dedup:
+            state.dedup.claim(ca, feed)  # 경쟁 기록용 (항상 False)
+            verdict = "duplicate"
+        elif state.max_positions is not None and len(state.positions) >= state.max_positions:
+            verdict = "max_positions"
+        elif state.max_exposure is not None and state.exposure() + amount > state.max_exposure + 1e-12:
+            verdict = "max_exposure"
+        else:
+            state.dedup.claim(ca, feed)
+            state.positions[key] = amount
+            return "ok"
+        state.denied[verdict] = state.denied.get(verdict, 0) + 1
+        return verdict
+
+    def confirm(self, account, ca):
+        state = self.account(account)
+        state.dedup.confirm(ca)
+        state.buys += 1
+
+    def release(self, account, ca):
+        """매수 전송 실패: 선점과 포지션 예약을 모두 해제합니다."""
+        state = self.account(account)
+        state.dedup.release(ca)
+        state.positions.pop(DedupService.normalize(ca), None)
+
+    def close(self, account, ca):
+        """자동 매도 완료: 포지션만 닫고, 중복 방지 기록은 유지합니다 (재매수 방지)."""
+        self.account(account).positions.pop(DedupService.normalize(ca), None)
+
+    def sync(self, account, cas, amount, feed):
+        """워커 시작 시 미청산 포지션(예약된 매도)을 알려 브로커 재시작 후에도 한도를 유지합니다."""
+        state = self.account(account)
+        for ca in cas:
+            key = DedupService.normalize(ca)
+            if key not in state.dedup:
+                state.dedup.claim(ca, feed)
+                state.dedup.confirm(ca)
+            state.positions.setdefault(key, amount)
+
+    def report(self, worker, metrics):
+        self.reports[worker] = (self._clock(), metrics)
+
+    def handle_request(self, request):
+        op = request.get("op")
+        if op == "claim":
+            return {"verdict": self.claim(request["account"], request["ca"], request["feed"], float(request["amount"]))}
+        if op == "confirm":
+            self.confirm(request["account"], request["ca"])
+        elif op == "release":
+            self.release(request["account"], request["ca"])
+        elif op == "close":
+            self.close(request["account"], request["ca"])
+        elif op == "sync":
+            self.sync(request["account"], request["cas"], float(request["amount"]), request["feed"])
+        elif op == "report":
+            self.report(request["worker"], request["metrics"])
+        elif op == "status":
+            return self.status()
+        else:
+            return {"error": f"unknown op: {op}"}
+        return {"ok": True}
+
+    # --- 집계 ---
+    def aggregate_latency(self):
+        """
+        워커별 지연 시간 메트릭을 합칩니다. 단계별 count는 합계, p50/p95/p99/max는
+        가장 느린 워커의 값입니다 (백분위수는 워커 간에 정확히 합칠 수 없으므로 보수적으로 표시).
+        """
+        combined = {}
+        for _, metrics in self.reports.values():
+            for key, stages in metrics.items():
+                if not isinstance(stages, dict) or ":" not in key:
+                    continue  # 히스토그램이 아닌 추가 통계 (races, bots 등)
+                target = combined.setdefault(key, {})
+                for stage, summary in stages.items():
+                    if not isinstance(summary, dict) or "count" not in summary:
+                        continue
+                    merged = target.setdefault(stage, {"count": 0})
+                    merged["count"] += summary["count"]
+                    for field in ("p50", "p95", "p99", "max"):
+                        if field in summary:
+                            merged[field] = max(merged.get(field, 0.0), summary[field])
+        return combined
+
+    def status(self):
+        now = self._clock()
+        return {
+            "accounts": {name: state.summary() for name, state in self.accounts.items()},
+            "workers": {
+                worker: {"age_seconds": round(now - ts, 1), "metrics": metrics}
+                for worker, (ts, metrics) in self.reports.items()
+            },
+            "latency": self.aggregate_latency(),
+        }
+
+    # --- 서버 ---
+    async def _serve_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = self.handle_request(json.loads(line))
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"error": f"{type(e).__name__}: {e}"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address):
+        """Unix 소켓 경로 또는 host:port에서 요청을 받습니다."""
+        if is_tcp_address(address):
+            host, port = address.rsplit(":", 1)
+            server = await asyncio.start_server(self._serve_client, host, int(port))
+        else:
+            if os.path.exists(address):
+                os.unlink(address)  # 이전 실행이 남긴 소켓 파일
+            server = await asyncio.start_unix_server(self._serve_client, address)
+        logging.info(f"공유 중복 방지 브로커 시작: {address}")
+        return server
+
+
+class BrokerClient:
+    """
+    워커 쪽 브로커 클라이언트. 연결 하나를 유지하며 요청을 순서대로 보냅니다.
+    브로커에 연결할 수 없으면 매수를 막지 않고 (fail-open) 오류만 기록합니다.
+    """
+
+    def __init__(self, address, worker, account, timeout=REQUEST_TIMEOUT):
+        self.address = address
+        self.worker = worker
+        self.account = account
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self.errors = 0
+
+    async def _connect(self):
+        if is_tcp_address(self.address):
+            host, port = self.address.rsplit(":", 1)
+            self._reader, self._writer = await asyncio.open_connection(host, int(port))
+        else:
+            self._reader, self._writer = await asyncio.open_unix_connection(self.address)
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def request(self, op, resend=True, **fields):
+        """
+        요청 하나를 보내고 응답(dict)을 반환합니다. 연결이 끊겼으면 한 번 다시 연결합니다.
+        resend=False이면 (claim처럼 두 번 처리되면 안 되는 요청) 응답 시간이 초과된 요청은 다시 보내지 않습니다.
+        """
+        payload = json.dumps({"op": op, "account": self.account, "worker": self.worker, **fields}).encode() + b"\n"
+        async with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._writer is None:
+                        await self._connect()
+                    self._writer.write(payload)
+                    line = await asyncio.wait_for(self._reader.readline(), self.timeout)
+                    if not line:
+                        raise ConnectionError("broker closed the connection")
+                    return json.loads(line)
+                except (OSError, ConnectionError, asyncio.TimeoutError, ValueError) as e:
+                    self._disconnect()
+                    # 시간 초과: 브로커가 이미 처리했을 수 있으므로 다시 보내면 'duplicate'를 받을 수 있음
+                    if attempt == 2 or (not resend and isinstance(e, asyncio.TimeoutError)):
+                        raise ConnectionError(f"브로커 요청 실패 ({op}): {e}") from e
+
+    async def _safe_request(self, op, resend=True, **fields):
+        try:
+            return await self.request(op, resend, **fields)
+        except ConnectionError as e:
+            self.errors += 1
+            logging.error(str(e))
+            return None
+
+    async def claim(self, ca, feed, amount):
+        response = await self._safe_request("claim", resend=False, ca=ca, feed=f"{self.worker}/{feed}", amount=amount)
+        if response is None:
+            return "ok"  # 브로커 장애/응답 지연 시 매수를 막지 않음 (시간 초과는 한 번만 기다림)
+        return response.get("verdict", "ok")
+
+    async def confirm(self, ca):
+        await self._safe_request("confirm", ca=ca)
+
+    async def release(self, ca):
+        await self._safe_request("release", ca=ca)
+
+    async def close(self, ca):
+        await self._safe_request("close", ca=ca)
+
+    async def sync(self, cas, amount):
+        await self._safe_request("sync", cas=list(cas), amount=amount, feed=f"{self.worker}/restore")
+
+    async def report_periodically(self, tracker, interval):
+        """interval초마다 이 워커의 지연 시간 메트릭을 브로커로 보냅니다."""
+        while True:
+            await asyncio.sleep(interval)
+            await self._safe_request("report", metrics=tracker.export())
@@ -1,7 +1,15 @@
 import os
-import subprocess
 import sys
+import json
+import time
 import shutil
+import argparse
+import statistics
+import subprocess
+
+APP_NAME = "AlphaSniper"
+EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+
 
 def install_pyinstaller():
     """PyInstaller가 설치되어 있지 않으면 설치합니다."""
@@ -12,36 +20,86 @@ def install_pyinstaller():
         print("📦 Installing PyInstaller...")
         subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller"])
 
-def build():
-    print("🚀 Starting build process for AlphaSniper...")
+
+def executable_path(onefile):
+    if onefile:
+        return os.path.join("dist", APP_NAME + EXE_SUFFIX)
+    return os.path.join("dist", APP_NAME, APP_NAME + EXE_SUFFIX)
+
+
+def build(onefile=False):
+    print(f"🚀 Starting build process for {APP_NAME} ({'onefile' if onefile else 'onedir'})...")
 
     # PyInstaller 설치 확인
     install_pyinstaller()
 
     # 빌드 명령어 옵션 설정
-    # --onefile: 하나의 실행 파일로 묶음
-    # --name: 실행 파일 이름
+    # onedir (기본값): AlphaSniper.spec 사용. 실행 시 압축 해제가 없어 재시작이 빠름
+    # --onefile: 하나의 실행 파일로 묶음 (실행할 때마다 임시 폴더에 압축을 풂)
     # --hidden-import: Telethon이 동적으로 로딩하는 모듈이 있을 경우 추가 (보통 기본으로 되지만 명시 권장)
-    cmd = [
-        "pyinstaller",
-        "--clean",
-        "--onefile",
-        "--name=AlphaSniper",
-        "--hidden-import=telethon",
-        "main.py"
-    ]
+    if onefile:
+        cmd = [
+            "pyinstaller",
+            "--clean",
+            "--onefile",
+            f"--name={APP_NAME}",
+            "--hidden-import=telethon",
+            "--hidden-import=websockets",
+            "main.py"
+        ]
+    else:
+        cmd = ["pyinstaller", "--clean", "--noconfirm", f"{APP_NAME}.spec"]
 
     print(f"🔨 Running command: {' '.join(cmd)}")
     try:
         subprocess.check_call(cmd)
         print("\n" + "="*40)
         print("✅ Build Successful!")
-        print("📁 Executable is located in the 'dist' folder.")
+        print(f"📁 Executable: {executable_path(onefile)}")
         print("="*40 + "\n")
+        return True
     except subprocess.CalledProcessError as e:
         print(f"\n❌ Build Failed: {e}")
+        return False
+
+
+def measure(onefile=False, runs=5):
+    """
+    실행 파일을 --startup-check로 여러 번 실행해 콜드 스타트 시간을 잽니다.
+    wall_ms: 프로세스 실행부터 종료까지 (onefile 압축 해제 포함), import_ms: 인터프리터 시작 후 모듈 로드까지
+    """
+    path = executable_path(onefile)
+    if not os.path.exists(path):
+        print(f"❌ Executable not found: {path}")
+        return None
+    wall, imports = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = subprocess.run([path, "--startup-check"], capture_output=True, text=True, check=True).stdout
+        wall.append((time.perf_counter() - started) * 1000)
+        imports.append(json.loads(output.strip().splitlines()[-1])["import_ms"])
+    result = {
+        "mode": "onefile" if onefile else "onedir",
+        "runs": runs,
+        "wall_ms_median": round(statistics.median(wall), 1),
+        "wall_ms_min": round(min(wall), 1),
+        "import_ms_median": round(statistics.median(imports), 1),
+    }
+    print(f"⏱️  Cold start: {json.dumps(result)}")
+    return result
+
 
 if __name__ == "__main__":
-    if os.path.exists("dist"):
-        shutil.rmtree("dist") # 기존 빌드 삭제
-    build()
+    parser = argparse.ArgumentParser(description=f"Build the {APP_NAME} executable with PyInstaller")
+    parser.add_argument("--onefile", action="store_true", help="single-file build (slower start: unpacks on every launch)")
+    parser.add_argument("--measure", type=int, default=0, metavar="N", help="run the built executable N times and report cold-start time")
+    parser.add_argument("--measure-only", action="store_true", help="skip the build, only measure the existing executable")
+    args = parser.parse_args()
+
+    if not args.measure_only:
+        if os.path.exists("dist"):
+            shutil.rmtree("dist") # 기존 빌드 삭제
+        if not build(args.onefile):
+            sys.exit(1)
+    if args.measure or args.measure_only:
+        measure(args.onefile, args.measure or 5)
@@ -0,0 +1,308 @@
+import os
+
+from dotenv import dotenv_values, load_dotenv
+
+# --- Interactive Setup Wizard ---
+ENV_PATH = ".env"
+
+def ask_input(prompt, default=None, cast=None):
+    """
+    사용자 입력을 요청합니다. 기본값이 있으면 함께 표시합니다.
+    cast(값)이 ValueError를 내면 다시 입력받습니다 (숫자/true·false 확인용).
+    """
+    while True:
+        if default:
+            user_input = input(f"{prompt} (기본값: {default}): ").strip() or default
+        else:
+            user_input = input(f"{prompt}: ").strip()
+            if not user_input:
+                print("값을 입력해야 합니다.")
+                continue
+        if cast is not None:
+            try:
+                cast(user_input)
+            except ValueError:
+                print(f"올바르지 않은 값입니다: {user_input}")
+                default = None if default == user_input else default
+                continue
+        return user_input
+
+
+def _positive(value):
+    if float(value) <= 0:
+        raise ValueError(value)
+
+
+def _percent(value):
+    if not 0 < float(value) <= 100:
+        raise ValueError(value)
+
+
+def _true_false(value):
+    if value.lower() not in ("true", "false"):
+        raise ValueError(value)
+
+def run_setup_wizard(env_path=ENV_PATH):
+    """환경 변수 설정을 위한 대화형 마법사"""
+    print("\n" + "="*40)
+    print("  AlphaSniper 초기 설정 마법사")
+    print("="*40 + "\n")
+    print("설정 파일(.env)이 없거나 필수 값이 부족하여 설정을 시작합니다.")
+    print("Telegram API 정보가 필요합니다. (https://my.telegram.org/apps 에서 확인 가능)\n")
+
+    # 기존 값 로드 (있다면)
+    load_dotenv(env_path)
+
+    api_id = ask_input("1. API ID (숫자)", os.getenv("API_ID"), cast=int)
+    api_hash = ask_input("2. API HASH (문자열)", os.getenv("API_HASH"))
+    phone_number = ask_input("3. 내 전화번호 (예: +821012345678)", os.getenv("PHONE_NUMBER"))
+    
+    print("\n--- 봇 설정 ---")
+    source_bot = ask_input("4. 감시할 채널 ID/Username (여러 개는 콤마로 구분)", os.getenv("SOURCE_BOT_ID", "@NewListingsFeed"))
+    target_bot = ask_input("5. 매수 명령 보낼 봇 ID/Username (여러 개는 콤마로 구분, 앞쪽이 주 봇)", os.getenv("TARGET_BOT_ID", "@GMGN_bsc_bot"))
+    buy_amount = ask_input("6. 매수 금액 (BNB)", os.getenv("GMGN_BUY_AMOUNT", "0.1"), cast=_positive)
+    
+    print("\n--- 자동 매도 설정 ---")
+    auto_sell_delay = ask_input("7. 자동 매도 대기 시간 (분)", os.getenv("AUTO_SELL_DELAY_MINUTES", "15"), cast=float)
+    auto_sell_percent = ask_input("8. 자동 매도 비율 (%)", os.getenv("AUTO_SELL_PERCENT", "100"), cast=_percent)
+    
+    print("\n--- NLF WebSocket 설정 (선택) ---")
+    nlf_enabled = ask_input("9. NLF WebSocket 사용 (true/false)", os.getenv("NLF_ENABLED", "false"), cast=_true_false)
+    nlf_api_key = ""
+    if nlf_enabled.lower() == "true":
+        nlf_api_key = ask_input("10. NLF API 키 (t.me/NLF_websocket_bot에서 발급)", os.getenv("NLF_API_KEY", ""))
+
+    # .env 파일 저장 (임시 파일에 쓴 뒤 교체: 실행 중인 봇이 쓰다 만 파일을 읽지 않도록)
+    with open(f"{env_path}.tmp", "w", encoding="utf-8") as f:
+        f.write("# AlphaSniper Configuration\n")
+        f.write(f"API_ID={api_id}\n")
+        f.write(f"API_HASH={api_hash}\n")
+        f.write(f"PHONE_NUMBER={phone_number}\n")
+        f.write(f"SESSION_NAME=alpha_sniper\n")
+        f.write(f"SOURCE_BOT_ID={source_bot}\n")
+        f.write(f"TARGET_BOT_ID={target_bot}\n")
+        f.write(f"GMGN_BUY_AMOUNT={buy_amount}\n")
+        f.write(f"AUTO_SELL_DELAY_MINUTES={auto_sell_delay}\n")
+        f.write(f"AUTO_SELL_PERCENT={auto_sell_percent}\n")
+        f.write(f"NLF_ENABLED={nlf_enabled}\n")
+        if nlf_api_key:
+            f.write(f"NLF_API_KEY={nlf_api_key}\n")
+    os.replace(f"{env_path}.tmp", env_path)
+
+    print(f"\n✅ 설정이 '{env_path}' 파일에 저장되었습니다!\n")
+    return True
+
+
+# ID 변환 (User ID 또는 Username)
+def parse_entity_id(entity_id_str):
+    try:
+        return int(entity_id_str)
+    except ValueError:
+        return entity_id_str
+
+
+def parse_entity_list(value):
+    """콤마로 구분된 ID/Username 목록을 변환합니다."""
+    return [parse_entity_id(item.strip()) for item in (value or "").split(",") if item.strip()]
+
+
+def _parse_value(env, name, default, cast):
+    raw = env.get(name)
+    raw = default if raw is None or not str(raw).strip() else str(raw).strip()
+    try:
+        return cast(raw)
+    except ValueError:
+        raise ValueError(f"{name} 값이 올바르지 않습니다: {raw!r}") from None
+
+
+def _float(env, name, default):
+    return _parse_value(env, name, default, float)
+
+
+def _int(env, name, default):
+    return _parse_value(env, name, default, int)
+
+
+_BOOL_VALUES = {"true": True, "1": True, "yes": True, "on": True, "false": False, "0": False, "no": False, "off": False}
+
+
+def _bool(env, name, default):
+    def cast(raw):
+        if raw.lower() not in _BOOL_VALUES:
+            raise ValueError(raw)
+        return _BOOL_VALUES[raw.lower()]
+    return _parse_value(env, name, default, cast)
+
+
+REQUIRED_VARS = ["API_ID", "API_HASH", "SOURCE_BOT_ID", "TARGET_BOT_ID"]
+DEFAULT_NLF_WS_URL = "wss://tokyo.newlistings.pro/v1/new-listings"  # NLF WebSocket URL (기본값)
+
+
+class Config:
+    """환경 변수(.env)에서 읽은 실행 설정"""
+
+    def __init__(self, env=None):
+        env = os.environ if env is None else env
+
+        # --- 텔레그램 ---
+        self.api_id = env.get("API_ID")
+        self.api_hash = env.get("API_HASH")
+        self.session_name = env.get("SESSION_NAME", "alpha_sniper")
+        self.phone_number = env.get("PHONE_NUMBER")
+        self.source_bot_ids = parse_entity_list(env.get("SOURCE_BOT_ID"))  # 모니터링할 채널/봇 (콤마로 구분 가능)
+        self.target_bot_ids = parse_entity_list(env.get("TARGET_BOT_ID"))  # 매수 명령을 보낼 봇 (첫 번째 봇이 기본 봇)
+
+        # 채널별 사전 필터 (ingest.parse_channel_filters 참고, 예: @NewListingsFeed=binancewallet/;@Newsbothub=source:)
+        self.channel_filters = env.get("CHANNEL_FILTERS", "")
+
+        # 놓친 메시지 확인 (재시작/재연결 후 마지막으로 받은 메시지 이후를 get_messages로 가져옴)
+        self.backfill_enabled = _bool(env, "BACKFILL_ENABLED", "true")
+        self.backfill_max_age = _float(env, "BACKFILL_MAX_AGE", "120")  # 이보다 오래된 메시지(초)는 매수하지 않음
+        self.backfill_batch = _int(env, "BACKFILL_BATCH", "100")  # 채널마다 한 번에 가져올 최대 메시지 수
+        self.backfill_interval = _float(env, "BACKFILL_INTERVAL", "0")  # 주기적 확인 간격 (초, 0이면 재연결 시에만)
+
+        # 매수량 설정 (기본값 0.1 BNB)
+        self.buy_amount = _float(env, "GMGN_BUY_AMOUNT", "0.1")
+
+        # 자동 매도 설정
+        self.auto_sell_delay_minutes = _float(env, "AUTO_SELL_DELAY_MINUTES", "15")  # 기본 15분
+        self.auto_sell_delay_seconds = int(self.auto_sell_delay_minutes * 60)
+        self.auto_sell_percent = _float(env, "AUTO_SELL_PERCENT", "100")  # 기본 100%
+
+        # 청산 규칙 (비어 있으면 AUTO_SELL_* 설정으로 시간 규칙 하나를 사용, positions.parse_exit_rules 참고)
+        self.exit_rules = env.get("EXIT_RULES", "")  # 예: tp:2x:50,tp:4x:100,sl:30%:100,time:30m:100
+        self.price_source = env.get("PRICE_SOURCE", "")  # TP/SL용 가격 소스 (module:ClassName)
+        self.exit_eval_interval = _float(env, "EXIT_EVAL_INTERVAL", "1")  # 가격 조건 평가 간격 (초)
+
+        # 매수 전 검사 (filters.PreTradeFilter)
+        self.pre_trade_checks = env.get("PRE_TRADE_CHECKS", "")  # 검사 목록 (콤마로 구분, module:ClassName 또는 mock)
+        self.pre_trade_budget_ms = _float(env, "PRE_TRADE_BUDGET_MS", "5")  # 검사 전체 시간 예산 (ms)
+        self.pre_trade_default = env.get("PRE_TRADE_DEFAULT", "allow").lower()  # 예산 초과/오류 시 판정 (allow/deny)
+        self.pre_trade_cache_size = _int(env, "PRE_TRADE_CACHE_SIZE", "4096")  # 검사 결과 캐시 크기
+        self.ca_blacklist_file = env.get("CA_BLACKLIST_FILE", "")  # 매수하지 않을 CA 목록 파일 (한 줄에 하나)
+        self.ca_whitelist_file = env.get("CA_WHITELIST_FILE", "")  # 검사 없이 매수할 CA 목록 파일
+
+        # NLF WebSocket 설정
+        self.nlf_api_key = env.get("NLF_API_KEY", "")  # NLF WebSocket API 키
+        self.nlf_enabled = _bool(env, "NLF_ENABLED", "false")  # WebSocket 활성화 여부
+        self.nlf_ws_urls = [u.strip() for u in env.get("NLF_WS_URLS", DEFAULT_NLF_WS_URL).split(",") if u.strip()]  # 여러 지역 엔드포인트
+        self.nlf_connections = _int(env, "NLF_CONNECTIONS", "2")  # 엔드포인트마다 유지할 연결 수 (핫 스탠바이)
+        self.nlf_ping_interval = _float(env, "NLF_PING_INTERVAL", "5")  # 핑 간격 (초)
+        self.nlf_ping_timeout = _float(env, "NLF_PING_TIMEOUT", "3")  # 이 시간 안에 퐁이 없으면 연결을 끊고 재연결
+
+        # 주문 라우팅 설정 (TARGET_BOT_ID에 봇이 여러 개일 때)
+        self.order_mode = env.get("ORDER_MODE", "hedge").lower()  # hedge: 주 봇 우선 후 지연 시 다음 봇, all: 모든 봇 동시 전송
+        self.hedge_delay_ms = _float(env, "HEDGE_DELAY_MS", "300")  # 주 봇 확인을 기다리는 시간
+
+        # 발신 속도 제한 설정 (매수/매도 전체 공유, FloodWait 안내 시간은 자동으로 준수)
+        self.outbound_rate = _float(env, "OUTBOUND_RATE_PER_SEC", "5")  # 초당 전송 수 (0이면 제한 없음)
+        self.outbound_burst = _int(env, "OUTBOUND_BURST", "5")  # 연속으로 바로 보낼 수 있는 최대 전송 수
+        self.buy_queue_timeout = _float(env, "BUY_QUEUE_TIMEOUT", "10")  # 이 시간(초) 안에 전송되지 못한 매수는 포기
+
+        # 중복 방지 기록 보관 설정
+        self.dedup_ttl_hours = _float(env, "DEDUP_TTL_HOURS", "24")  # 이 시간이 지난 CA는 다시 매수 가능
+        self.dedup_max_entries = _int(env, "DEDUP_MAX_ENTRIES", "10000")  # 메모리에 유지할 최대 CA 수
+
+        # 연결 유지 설정
+        self.keepalive_seconds = _float(env, "KEEPALIVE_SECONDS", "30")  # MTProto 핑 간격 (0이면 비활성화)
+
+        # 지연 시간 계측 설정
+        self.metrics_port = _int(env, "METRICS_PORT", "0")  # 0이면 메트릭 서버 비활성화
+        self.metrics_dump_seconds = _float(env, "METRICS_DUMP_SECONDS", "60")  # 0이면 주기적 로그 출력 비활성화
+
+        # 제어 API / 대시보드 (control.py)
+        self.control_address = env.get("CONTROL_ADDRESS", "")  # 127.0.0.1:8900 또는 Unix 소켓 경로 (비어 있으면 비활성화)
+        self.control_token = env.get("CONTROL_TOKEN", "")  # Authorization: Bearer 토큰 (TCP에서 비어 있으면 임시 토큰 생성)
+
+        # 매매 기록 (journal.py, <SESSION_NAME>.journal/ 에 일별 바이너리 세그먼트로 저장)
+        self.journal_enabled = _bool(env, "JOURNAL_ENABLED", "true")
+        self.journal_flush_seconds = _float(env, "JOURNAL_FLUSH_SECONDS", "1")  # 버퍼를 파일에 기록하는 간격 (초)
+
+        # 설정 다시 읽기 (reloader.py): .env 변경 감지 간격 (초, 0이면 SIGHUP으로만 다시 읽음)
+        self.config_watch_seconds = _float(env, "CONFIG_WATCH_SECONDS", "2")
+
+        # 이벤트 루프 상태 감시 (monitor.py)
+        self.loop_monitor_interval = _float(env, "LOOP_MONITOR_INTERVAL", "0.1")  # 루프 지연 측정 간격 (초, 0이면 비활성화)
+        self.slow_callback_ms = _float(env, "SLOW_CALLBACK_MS", "50")  # 이 시간 이상 루프를 점유한 콜백을 경고 (0이면 비활성화)
+        self.profile_seconds = _float(env, "PROFILE_SECONDS", "10")  # SIGUSR1 수신 시 프로파일 수집 시간
+
+        # 다중 프로세스 모드 (supervisor.py가 워커를 실행할 때 설정)
+        self.worker_name = env.get("ALPHASNIPER_WORKER")  # 워커 이름
+        self.broker_address = env.get("ALPHASNIPER_BROKER")  # 공유 중복 방지 브로커 주소 (Unix 소켓 경로 또는 host:port)
+        self.account = env.get("ALPHASNIPER_ACCOUNT") or self.session_name  # 포지션 한도를 공유하는 계정(지갑) 이름
+
+    @property
+    def target_bot_id(self):
+        return self.target_bot_ids[0]
+
+    def validate(self):
+        """필수 환경 변수와 값의 범위를 확인합니다 (문제가 있으면 모두 모아 ValueError)."""
+        if not all([self.api_id, self.api_hash, self.source_bot_ids, self.target_bot_ids]):
+            raise ValueError("필수 환경 변수(API_ID, API_HASH, SOURCE_BOT_ID, TARGET_BOT_ID)가 .env 파일에 설정되지 않았습니다.")
+        errors = []
+        if not str(self.api_id).isdigit():
+            errors.append(f"API_ID는 숫자여야 합니다: {self.api_id!r}")
+        if self.buy_amount <= 0:
+            errors.append(f"GMGN_BUY_AMOUNT는 0보다 커야 합니다: {self.buy_amount}")
+        if self.auto_sell_delay_minutes < 0:
+            errors.append(f"AUTO_SELL_DELAY_MINUTES는 0 이상이어야 합니다: {self.auto_sell_delay_minutes}")
+        if not 0 < self.auto_sell_percent <= 100:
+            errors.append(f"AUTO_SELL_PERCENT는 0보다 크고 100 이하여야 합니다: {self.auto_sell_percent}")
+        if self.order_mode not in ("hedge", "all"):
+            errors.append(f"ORDER_MODE는 hedge 또는 all이어야 합니다: {self.order_mode}")
+        if self.pre_trade_default not in ("allow", "deny"):
+            errors.append(f"PRE_TRADE_DEFAULT는 allow 또는 deny여야 합니다: {self.pre_trade_default}")
+        for name in ("hedge_delay_ms", "outbound_rate", "buy_queue_timeout", "pre_trade_budget_ms", "backfill_max_age",
+                     "backfill_interval", "keepalive_seconds", "config_watch_seconds"):
+            if getattr(self, name) < 0:
+                errors.append(f"{name.upper()}는 0 이상이어야 합니다: {getattr(self, name)}")
+        # 루프 간격: 0이면 대기 없이 계속 도는 루프가 되므로 비활성화 값(0)을 허용하지 않음
+        for name in ("exit_eval_interval", "journal_flush_seconds", "nlf_ping_interval", "nlf_ping_timeout"):
+            if getattr(self, name) <= 0:
+                errors.append(f"{name.upper()}는 0보다 커야 합니다: {getattr(self, name)}")
+        for name in ("outbound_burst", "backfill_batch", "nlf_connections", "dedup_max_entries", "pre_trade_cache_size"):
+            if getattr(self, name) < 1:
+                errors.append(f"{name.upper()}는 1 이상이어야 합니다: {getattr(self, name)}")
+        if errors:
+            raise ValueError("설정 오류: " + "; ".join(errors))
+        return self
+
+    def changes(self, other):
+        """other와 값이 다른 설정 {속성 이름: (현재 값, 새 값)}"""
+        return {name: (value, getattr(other, name, None)) for name, value in vars(self).items()
+                if getattr(other, name, None) != value}
+
+
+# 실행 중 다시 읽어 바로 적용하는 설정 (나머지는 변경을 감지해도 재시작 후 적용, reloader.py 참고)
+RELOADABLE = frozenset({
+    "source_bot_ids", "channel_filters", "buy_amount", "auto_sell_delay_minutes", "auto_sell_delay_seconds",
+    "auto_sell_percent", "exit_rules", "order_mode", "hedge_delay_ms", "pre_trade_budget_ms", "pre_trade_default",
+    "ca_blacklist_file", "ca_whitelist_file", "backfill_max_age", "nlf_enabled", "nlf_api_key", "nlf_ws_urls",
+    "nlf_connections", "nlf_ping_interval", "nlf_ping_timeout",
+})
+
+# .env를 읽기 전의 프로세스 환경 변수 (슈퍼바이저가 워커에 지정한 값 등은 .env보다 우선)
+_PROCESS_ENV = dict(os.environ)
+
+
+def read_config(env_path=ENV_PATH):
+    """실행 중에 .env를 다시 읽어 검증된 Config를 만듭니다 (os.environ은 바꾸지 않음)."""
+    return Config({**dotenv_values(env_path), **_PROCESS_ENV}).validate()
+
+
+def load_config(env_path=ENV_PATH, interactive=True):
+    """
+    .env 파일을 읽어 Config를 만듭니다.
+    파일이 없거나 필수 값이 부족하면 (interactive=True일 때) 설정 마법사를 실행합니다.
+    """
+    # .env 파일 로드 전 검사
+    if interactive and not os.path.exists(env_path):
+        run_setup_wizard(env_path)
+    load_dotenv(env_path)
+
+    # 필수 값 확인 및 재실행 유도
+    if interactive and not all(os.getenv(v) for v in REQUIRED_VARS):
+        print("❌ 필수 환경 변수가 누락되었습니다.")
+        run_setup_wizard(env_path)
+        load_dotenv(env_path)  # 다시 로드
+    return Config().validate()
@@ -0,0 +1,326 @@
+"""로컬 제어 API와 실시간 대시보드 (매수 일시 중지, 수동 매도/예약 취소, 매수 금액/감시 채널 변경)."""
+import os
+import json
+import time
+import asyncio
+import logging
+import secrets
+from urllib.parse import urlsplit
+
+from broker import is_tcp_address
+from config import parse_entity_id, parse_entity_list
+
+REQUEST_TIMEOUT = 5.0
+MAX_BODY = 64 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large", 415: "Unsupported Media Type",
+            500: "Internal Server Error"}
+
+# Host/Origin 헤더에 허용하는 로컬 이름
+_LOCAL_NAMES = {"127.0.0.1", "localhost", "::1"}
+# 모든 인터페이스에 바인딩한 경우 (Host 이름은 검사하지 않고 포트만 확인)
+_WILDCARD_HOSTS = {"", "0.0.0.0", "::"}
+
+
+class ControlError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ControlServer:
+    """
+    제어 API. pipeline의 상태를 조회하고 매수 일시 중지, 매도 실행/취소, 매수 금액/감시 채널 변경을 처리합니다.
+    set_sources는 async def set_sources(list) (main.AlphaSniper.set_sources), set_buy_amount는 def set_buy_amount(float)
+    (없으면 pipeline.buy_amount만 변경), token이 있으면 Bearer 인증을 요구합니다.
+    TCP로 열 때 token이 없으면 serve()가 임의의 토큰을 만들어 로그에 남깁니다.
+    """
+
+    def __init__(self, pipeline, tracker, get_sources=None, set_sources=None, set_buy_amount=None, token="",
+                 clock=time.time):
+        self.pipeline = pipeline
+        self.tracker = tracker
+        self._get_sources = get_sources or (lambda: [])
+        self._set_sources = set_sources
+        self._set_buy_amount = set_buy_amount
+        self.token = token
+        self._host = None  # TCP로 바인딩한 (호스트, 포트) (Unix 소켓이면 None: Host 검사 생략)
+        self._clock = clock
+        self.started = clock()
+        self.requests = 0
+        self._routes = {
+            ("GET", "/"): self._dashboard,
+            ("GET", "/api/state"): lambda body: self.state(),
+            ("GET", "/api/status"): lambda body: self.status(),
+            ("GET", "/api/positions"): lambda body: self.positions(),
+            ("GET", "/api/sells"): lambda body: self.sells(),
+            ("GET", "/api/dedup"): lambda body: self.dedup(),
+            ("GET", "/api/metrics"): lambda body: self.tracker.export(),
+            ("POST", "/api/pause"): lambda body: self.set_paused(True),
+            ("POST", "/api/resume"): lambda body: self.set_paused(False),
+            ("POST", "/api/sell"): self.sell,
+            ("POST", "/api/sells/cancel"): self.cancel_sells,
+            ("POST", "/api/config"): self.update_config,
+        }
+
+    # --- 조회 ---
+    def status(self):
+        return {
+            "paused": self.pipeline.paused,
+            "paused_skips": self.pipeline.paused_skips,
+            "buy_amount": self.pipeline.buy_amount,
+            "sources": [str(source) for source in self._get_sources()],
+            "bots": [str(bot) for bot in self.pipeline.router.bots],
+            "uptime_seconds": round(self._clock() - self.started, 1),
+        }
+
+    def positions(self):
+        engine = self.pipeline.exit_engine
+        now = self._clock()
+        positions = []
+        for position in engine.ledger.open_positions.values():
+            exits = [dict(e, due_in=round(e["due"] - now, 1)) for e in engine.pending_exits(position)]
+            positions.append(dict(position.to_dict(), exits=exits))
+        return positions
+
+    def sells(self):
+        now = self._clock()
+        return [dict(order.to_dict(), due_in=round(order.due - now, 1)) for order in self.pipeline.sell_scheduler.pending()]
+
+    def dedup(self):
+        dedup = self.pipeline.dedup
+        return {"entries": len(dedup), "recent": dedup.recent(20), "races": dedup.race_summary()}
+
+    def state(self):
+        return {
+            "status": self.status(),
+            "positions": self.positions(),
+            "sells": self.sells(),
+            "dedup": self.dedup(),
+            "metrics": self.tracker.export(),
+        }
+
+    # --- 제어 ---
+    def set_paused(self, paused):
+        self.pipeline.paused = paused
+        logging.warning(f"제어 API: 매수 {'일시 중지' if paused else '재개'}")
+        return self.status()
+
+    @staticmethod
+    def _ca(body):
+        ca = str(body.get("ca") or "").strip()
+        if not ca.startswith("0x"):
+            raise ControlError(400, "ca (0x...)가 필요합니다.")
+        return ca
+
+    def sell(self, body):
+        ca = self._ca(body)
+        percent = float(body.get("percent", 100))
+        if not 0 < percent <= 100:
+            raise ControlError(400, "percent는 0보다 크고 100 이하여야 합니다.")
+        closed = self.pipeline.exit_engine.manual_exit(ca, percent)
+        if not closed:
+            # 장부에 없는 CA (수동 매수 등): 주 봇으로 바로 매도
+            self.pipeline.sell(ca, percent)
+        logging.warning(f"제어 API: {ca} {percent:g}% 매도 요청 (포지션 {closed}개)")
+        return {"ca": ca, "percent": percent, "positions": closed}
+
+    def cancel_sells(self, body):
+        """예약 매도 취소: id는 매도 예약 하나, ca는 해당 CA의 매도 예약 + 아직 실행되지 않은 시간 청산 규칙"""
+        if "id" in body:
+            return {"cancelled": self.pipeline.sell_scheduler.cancel(int(body["id"])), "exits": 0}
+        ca = self._ca(body)
+        cancelled = self.pipeline.sell_scheduler.cancel(ca)
+        exits = self.pipeline.exit_engine.cancel_exits(ca)
+        logging.warning(f"제어 API: {ca} 예약 매도 {cancelled}건, 시간 청산 {exits}건 취소")
+        return {"cancelled": cancelled, "exits": exits}
+
+    async def update_config(self, body):
+        changed = {}
+        if "buy_amount" in body:
+            amount = float(body["buy_amount"])
+            if amount <= 0:
+                raise ControlError(400, "buy_amount는 0보다 커야 합니다.")
+            if self._set_buy_amount is not None:
+                self._set_buy_amount(amount)
+            else:
+                self.pipeline.buy_amount = amount
+            changed["buy_amount"] = amount
+            logging.warning(f"제어 API: 매수 금액 변경 -> {amount} BNB")
+        if "sources" in body:
+            if self._set_sources is None:
+                raise ControlError(400, "감시 채널 변경을 지원하지 않습니다.")
+            sources = body["sources"]
+            if isinstance(sources, str):
+                sources = parse_entity_list(sources)
+            else:
+                sources = [parse_entity_id(str(source).strip()) for source in sources]
+            changed["sources"] = [str(s) for s in await self._set_sources(sources)]
+        if not changed:
+            raise ControlError(400, "변경할 항목(buy_amount, sources)이 없습니다.")
+        return {"changed": changed, "status": self.status()}
+
+    # --- HTTP ---
+    async def _dashboard(self, body):
+        return DASHBOARD_HTML
+
+    def _is_local(self, netloc):
+        """Host/Origin의 호스트:포트가 이 서버가 바인딩한 로컬 주소인지 확인합니다."""
+        try:
+            parts = urlsplit(f"//{netloc}")
+            name, port = parts.hostname, parts.port or 80
+        except ValueError:
+            return False
+        bound_host, bound_port = self._host
+        if port != bound_port:
+            return False
+        return bound_host in _WILDCARD_HOSTS or name in _LOCAL_NAMES or name == bound_host.strip("[]").lower()
+
+    def _check_origin(self, headers):
+        if self._host is not None and not self._is_local(headers.get("host", "")):
+            raise ControlError(403, "허용되지 않은 Host입니다.")
+        origin = headers.get("origin")
+        if origin is not None:
+            # 브라우저는 Unix 소켓에 접속할 수 없으므로 Origin이 있으면 로컬 TCP 주소여야 함
+            parts = urlsplit(origin)
+            if self._host is None or parts.scheme != "http" or not self._is_local(parts.netloc):
+                raise ControlError(403, f"허용되지 않은 Origin입니다: {origin}")
+
+    async def dispatch(self, method, target, headers, body):
+        """요청 하나를 처리하고 (상태 코드, 응답 객체)를 반환합니다."""
+        path = urlsplit(target).path.rstrip("/") or "/"
+        self._check_origin(headers)
+        if self.token and path != "/" and headers.get("authorization") != f"Bearer {self.token}":
+            raise ControlError(401, "인증 토큰이 필요합니다 (Authorization: Bearer ...).")
+        handler = self._routes.get((method, path))
+        if handler is None:
+            if any(p == path for _, p in self._routes):
+                raise ControlError(405, f"{method} {path}는 지원하지 않습니다.")
+            raise ControlError(404, f"알 수 없는 경로: {path}")
+        if method == "POST" and headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+            raise ControlError(415, "POST 요청은 Content-Type: application/json이어야 합니다.")
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError as e:
+            raise ControlError(400, f"JSON 형식 오류: {e}") from e
+        if not isinstance(payload, dict):
+            raise ControlError(400, "요청 본문은 JSON 객체여야 합니다.")
+        result = handler(payload)
+        if asyncio.iscoroutine(result):
+            result = await result
+        return 200, result
+
+    async def _serve_client(self, reader, writer):
+        self.requests += 1
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+                lines = head.decode("latin-1").split("\r\n")
+                method, target = lines[0].split(" ")[:2]
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(":")
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY:
+                    raise ControlError(413, "요청 본문이 너무 큽니다.")
+                body = await asyncio.wait_for(reader.readexactly(length), REQUEST_TIMEOUT) if length else b""
+                status, result = await self.dispatch(method.upper(), target, headers, body)
+            except ControlError as e:
+                status, result = e.status, {"error": str(e)}
+            except (ValueError, TypeError, KeyError) as e:
+                status, result = 400, {"error": f"{type(e).__name__}: {e}"}
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            except Exception as e:
+                logging.error(f"제어 API 처리 중 오류: {e}", exc_info=True)
+                status, result = 500, {"error": str(e)}
+            if isinstance(result, str):
+                content_type, data = "text/html; charset=utf-8", result.encode("utf-8")
+            else:
+                content_type = "application/json"
+                data = json.dumps(result, ensure_ascii=False, default=str).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\nCache-Control: no-store\r\nConnection: close\r\n\r\n".encode("ascii")
+                + data
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, address):
+        """host:port 또는 Unix 소켓 경로에서 제어 API를 시작합니다."""
+        if is_tcp_address(address):
+            host, port = address.rsplit(":", 1)
+            server = await asyncio.start_server(self._serve_client, host, int(port))
+            port = server.sockets[0].getsockname()[1]
+            self._host = (host.lower(), port)
+            if not self.token:
+                # 같은 컴퓨터의 다른 사용자/프로그램도 TCP 포트에는 접속할 수 있으므로 토큰 없이 열지 않음
+                self.token = secrets.token_urlsafe(24)
+                logging.warning(f"CONTROL_TOKEN이 없어 임시 토큰을 만들었습니다: http://{host}:{port}/?token={self.token}")
+            logging.info(f"제어 API / 대시보드 시작: http://{host}:{port}/")
+        else:
+            if os.path.exists(address):
+                os.unlink(address)  # 이전 실행이 남긴 소켓 파일
+            server = await asyncio.start_unix_server(self._serve_client, address)
+            os.chmod(address, 0o600)
+            logging.info(f"제어 API 시작: {address} (curl --unix-socket {address} http://localhost/api/state)")
+        return server
+
+
+DASHBOARD_HTML = """<!doctype html>
+<html lang="ko"><head><meta charset="utf-8"><title>AlphaSniper</title>
+<style>
+body{font:13px system-ui,sans-serif;margin:16px;background:#111;color:#ddd}
+h2{font-size:14px;margin:18px 0 6px}table{border-collapse:collapse;width:100%}
+td,th{border-bottom:1px solid #333;padding:3px 6px;text-align:left;font-family:monospace}
+button{margin-right:6px}input{width:380px}.paused{color:#f66}.ok{color:#6f6}pre{white-space:pre-wrap}
+</style></head><body>
+<h1>AlphaSniper <span id="state"></span></h1>
+<div>
+<button onclick="post('/api/pause')">매수 일시 중지</button><button onclick="post('/api/resume')">매수 재개</button>
+매수 금액 <input id="amount" style="width:80px"><button onclick="post('/api/config',{buy_amount:+val('amount')})">변경</button>
+감시 채널 <input id="sources" style="width:260px"><button onclick="post('/api/config',{sources:val('sources')})">변경</button>
+</div>
+<div style="margin-top:6px">CA <input id="ca"> <input id="pct" value="100" style="width:50px">%
+<button onclick="post('/api/sell',{ca:val('ca'),percent:+val('pct')})">지금 매도</button>
+<button onclick="post('/api/sells/cancel',{ca:val('ca')})">예약 매도 취소</button></div>
+<h2>미청산 포지션</h2><table id="positions"></table>
+<h2>대기 중인 매도</h2><table id="sells"></table>
+<h2>최근 선점 CA</h2><table id="dedup"></table>
+<h2>피드 / 지연 시간</h2><pre id="metrics"></pre>
+<script>
+const token = new URLSearchParams(location.search).get('token');
+const headers = token ? {Authorization: 'Bearer ' + token} : {};
+const val = id => document.getElementById(id).value;
+let edited = false;
+function table(id, rows, cols) {
+  document.getElementById(id).innerHTML = '<tr>' + cols.map(c => '<th>' + c + '</th>').join('') + '</tr>' +
+    rows.map(r => '<tr>' + cols.map(c => '<td>' + (r[c] ?? '') + '</td>').join('') + '</tr>').join('');
+}
+async function post(path, body) {
+  const r = await fetch(path, {method: 'POST', headers: {...headers, 'Content-Type': 'application/json'},
+                               body: JSON.stringify(body || {})});
+  const data = await r.json(); if (!r.ok) alert(data.error); edited = false; refresh();
+}
+async function refresh() {
+  const s = await (await fetch('/api/state', {headers})).json();
+  const st = s.status;
+  document.getElementById('state').innerHTML = st.paused ? '<span class="paused">일시 중지</span>' : '<span class="ok">매수 중</span>';
+  if (!edited) { document.getElementById('amount').value = st.buy_amount; document.getElementById('sources').value = st.sources.join(','); }
+  s.positions.forEach(p => p.next_exit = p.exits.length ? p.exits[0].rule + ' (' + p.exits[0].due_in + 's)' : '');
+  table('positions', s.positions, ['id', 'ca', 'amount', 'remaining', 'feed', 'latency_ms', 'bot', 'next_exit']);
+  table('sells', s.sells, ['id', 'ca', 'percent', 'due_in', 'attempts', 'bot']);
+  table('dedup', s.dedup.recent, ['ca', 'feed', 'confirmed']);
+  document.getElementById('metrics').textContent = JSON.stringify(s.metrics, null, 1);
+}
+document.querySelectorAll('input').forEach(i => i.addEventListener('input', () => edited = true));
+refresh(); setInterval(refresh, 1000);
+</script></body></html>
+"""
@@ -0,0 +1,209 @@
+import time
+import sqlite3
+import logging
+from collections import deque
+
+from latency import RollingHistogram
+
+# 최근 경쟁 기록 보관 개수
+RACE_HISTORY = 256
+
+# 기본 보관 정책
+DEFAULT_TTL_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 10000
+
+# 만료된 행을 디스크에서 정리하는 최소 간격 (초)
+PURGE_INTERVAL = 60
+
+
+class Claim:
+    """CA 하나에 대한 선점 정보"""
+
+    __slots__ = ("ca", "feed", "claimed_at", "wall", "confirmed")
+
+    def __init__(self, ca, feed, claimed_at, wall, confirmed=False):
+        self.ca = ca
+        self.feed = feed
+        self.claimed_at = claimed_at  # perf_counter (피드 간 경쟁 측정용, 복원된 기록은 None)
+        self.wall = wall  # epoch 초 (TTL 및 영구 저장용)
+        self.confirmed = confirmed
+
+
+class DedupStore:
+    """
+    확정된 CA를 저장하는 SQLite 파일 (텔레그램 세션 파일 옆에 생성).
+    재시작 후에도 이미 매수한 CA를 다시 매수하지 않도록 합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS claims (ca TEXT PRIMARY KEY, feed TEXT, claimed_at REAL)"
+            )
+        return self._conn
+
+    def load(self, since):
+        """since(epoch 초) 이후에 확정된 (ca, feed, claimed_at) 목록을 오래된 순으로 반환합니다."""
+        conn = self._connect()
+        return conn.execute(
+            "SELECT ca, feed, claimed_at FROM claims WHERE claimed_at >= ? ORDER BY claimed_at", (since,)
+        ).fetchall()
+
+    def add(self, ca, feed, claimed_at):
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO claims VALUES (?, ?, ?)", (ca, feed, claimed_at))
+        conn.commit()
+
+    def purge(self, before):
+        """before(epoch 초) 이전의 행을 삭제합니다."""
+        conn = self._connect()
+        conn.execute("DELETE FROM claims WHERE claimed_at < ?", (before,))
+        conn.commit()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class DedupService:
+    """
+    모든 피드(텔레그램 채널, NLF WebSocket)가 공유하는 선점형 중복 방지 서비스.
+    CA는 처음 발견된 순간 claim()으로 예약되고, 전송이 실패했을 때만 release()로 해제됩니다.
+    claim()은 await 없이 확인과 등록을 한 번에 수행하므로 이벤트 루프 안에서 원자적입니다.
+
+    store가 주어지면 확정된 CA는 디스크에 기록되고, 첫 조회 시점에 TTL 이내의 기록을 불러옵니다.
+    메모리의 선점 목록은 삽입 순서(=오래된 순)로 유지되며, TTL이 지났거나 max_entries를
+    넘은 항목은 앞에서부터 제거됩니다.
+    """
+
+    def __init__(self, store=None, ttl=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES,
+                 clock=time.time, timer=time.perf_counter):
+        self._claims = {}
+        self._clock = clock  # TTL 기준 시각 (epoch 초)
+        self._timer = timer  # 피드 간 경쟁 측정용 고해상도 타이머
+        self.store = store
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._loaded = store is None
+        self._last_purge = 0.0
+        self.races = deque(maxlen=RACE_HISTORY)
+        self._wins = {}
+        self._lead = {}  # (승자 피드, 패자 피드) -> 지연 히스토그램(ms)
+
+    def load(self):
+        """디스크에 저장된 확정 CA를 불러옵니다 (최초 1회)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        now = self._clock()
+        try:
+            rows = self.store.load(now - self.ttl)
+        except sqlite3.Error as e:
+            logging.error(f"중복 방지 기록 로드 실패 ({self.store.path}): {e}")
+            return
+        restored = {}
+        for ca, feed, wall in rows:
+            restored[ca] = Claim(ca, feed, None, wall, confirmed=True)
+        # 로드 전에 이미 선점된 항목은 뒤에 유지
+        restored.update(self._claims)
+        self._claims = restored
+        self._evict(now)
+        if rows:
+            logging.info(f"중복 방지 기록 {len(rows)}건 복원됨 ({self.store.path})")
+
+    def _evict(self, now):
+        claims = self._claims
+        expire_before = now - self.ttl
+        while claims:
+            oldest = next(iter(claims.values()))
+            if oldest.wall >= expire_before and len(claims) <= self.max_entries:
+                break
+            del claims[oldest.ca]
+        if self.store is not None and now - self._last_purge >= PURGE_INTERVAL:
+            self._last_purge = now
+            try:
+                self.store.purge(expire_before)
+            except sqlite3.Error as e:
+                logging.error(f"중복 방지 기록 정리 실패: {e}")
+
+    @staticmethod
+    def normalize(ca):
+        return ca.lower()
+
+    def __contains__(self, ca):
+        if not self._loaded:
+            self.load()
+        claim = self._claims.get(self.normalize(ca))
+        return claim is not None and claim.wall >= self._clock() - self.ttl
+
+    def __len__(self):
+        return len(self._claims)
+
+    def claim(self, ca, feed):
+        """CA를 선점합니다. 이미 다른 메시지가 선점했다면 False를 반환합니다."""
+        if not self._loaded:
+            self.load()
+        key = self.normalize(ca)
+        now = self._timer()
+        wall = self._clock()
+        existing = self._claims.get(key)
+        if existing is not None and existing.wall < wall - self.ttl:
+            del self._claims[key]  # 만료된 기록
+            existing = None
+        if existing is None:
+            self._claims[key] = Claim(key, feed, now, wall)
+            if len(self._claims) > self.max_entries:
+                self._evict(wall)
+            return True
+        self._record_race(existing, feed, now)
+        return False
+
+    def confirm(self, ca):
+        """매수 명령 전송이 확인된 CA로 표시하고 디스크에 기록합니다."""
+        claim = self._claims.get(self.normalize(ca))
+        if claim is None:
+            return
+        claim.confirmed = True
+        if self.store is not None:
+            try:
+                self.store.add(claim.ca, claim.feed, claim.wall)
+            except sqlite3.Error as e:
+                logging.error(f"중복 방지 기록 저장 실패 ({claim.ca}): {e}")
+            self._evict(self._clock())
+
+    def recent(self, limit=20):
+        """가장 최근에 선점된 CA 목록 (최신 순)"""
+        claims = list(self._claims.values())[-limit:] if limit else []
+        return [{"ca": c.ca, "feed": c.feed, "wall": c.wall, "confirmed": c.confirmed} for c in reversed(claims)]
+
+    def release(self, ca):
+        """전송 실패 시 선점을 해제하여 다른 피드가 다시 시도할 수 있게 합니다."""
+        self._claims.pop(self.normalize(ca), None)
+
+    def _record_race(self, winner, feed, now):
+        if winner.feed == feed or winner.claimed_at is None:
+            return
+        lead_ms = (now - winner.claimed_at) * 1000
+        self.races.append({"ca": winner.ca, "winner": winner.feed, "loser": feed, "lead_ms": round(lead_ms, 3)})
+        self._wins[winner.feed] = self._wins.get(winner.feed, 0) + 1
+        hist = self._lead.get((winner.feed, feed))
+        if hist is None:
+            hist = self._lead[(winner.feed, feed)] = RollingHistogram()
+        hist.record(lead_ms)
+        logging.info(f"피드 경쟁 결과: {winner.ca} 승자={winner.feed}, {feed}보다 {lead_ms:.1f}ms 빠름")
+
+    def race_summary(self):
+        """피드별 승리 횟수와 (승자, 패자) 쌍별 선행 시간 통계"""
+        return {
+            "wins": dict(self._wins),
+            "lead_ms": {f"{w}>{l}": hist.summary() for (w, l), hist in self._lead.items()},
+            "recent": list(self.races)[-10:],
+        }
@@ -0,0 +1,151 @@
+import re
+
+# --- 소스 포맷 레지스트리 ---
+# 1. 리터럴 사전 필터('0x'): CA가 없는 메시지는 정규식을 전혀 실행하지 않습니다.
+# 2. 포맷별 앵커(리터럴): 앵커가 있는 포맷의 정규식만 실행하므로, 포맷을 추가해도
+#    메시지마다 정규식 스캔이 늘어나지 않습니다 (부분 문자열 검사만 추가됩니다).
+# 모든 포맷은 CA를 첫 번째 캡처 그룹으로 가져야 합니다.
+
+# Binance Wallet URL (NewListingsFeed 스타일)
+# 예: https://www.binance.com/en/binancewallet/0x97693439ea2f0ecdeb9135881e49f354656a911c/bsc
+BINANCE_URL_REGEX = r"https://www\.binance\.com/en/binancewallet/(0x[a-fA-F0-9]{40,})/bsc"
+
+# Newsbothub 포맷
+# 예: source: 0x97693439ea2f0ecdeb9135881e49f354656a911c (bsc)
+NEWSBOTHUB_SOURCE_REGEX = r"source:\s*(0x[a-fA-F0-9]{40,})\s*\(bsc\)"
+
+
+class SourceFormat:
+    """CA를 추출할 수 있는 메시지 포맷 하나"""
+
+    __slots__ = ("name", "description", "regex", "anchor", "ignore_case", "keyword", "priority")
+
+    def __init__(self, name, description, pattern, anchor=None, ignore_case=False,
+                 keyword=None, priority=0):
+        self.name = name
+        self.description = description
+        self.regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        if self.regex.groups < 1:
+            raise ValueError(f"포맷 '{name}'의 정규식에 CA 캡처 그룹이 없습니다.")
+        self.ignore_case = ignore_case
+        # 메시지에 반드시 포함되어야 하는 리터럴 (ignore_case면 소문자로 비교하고,
+        # 첫 번째 앵커 위치부터 정규식을 실행하므로 패턴이 시작하는 리터럴이어야 합니다)
+        self.anchor = anchor.lower() if (anchor and ignore_case) else anchor
+        # 메시지에 반드시 포함되어야 하는 키워드 (대소문자 무시, 정규식보다 먼저 검사)
+        self.keyword = keyword.lower() if keyword else None
+        self.priority = priority  # 낮을수록 우선
+
+
+def _gate(fmt, text, lowered):
+    """
+    포맷의 앵커/키워드를 정규식보다 먼저 검사합니다.
+    (정규식 시작 위치, lowered)를 반환하며 조건에 맞지 않으면 위치는 -1입니다.
+    lowered는 대소문자 무시 검사가 처음 필요할 때 한 번만 만듭니다.
+    """
+    pos = 0
+    if fmt.ignore_case:
+        if lowered is None:
+            lowered = text.lower()
+        if fmt.keyword and fmt.keyword not in lowered:
+            return -1, lowered
+        if fmt.anchor:
+            pos = lowered.find(fmt.anchor)
+            if pos >= 0 and len(lowered) != len(text):
+                pos = 0  # lower()로 길이가 바뀐 경우 위치를 신뢰할 수 없음
+    else:
+        if fmt.anchor and fmt.anchor not in text:
+            return -1, lowered
+        if fmt.keyword:
+            if lowered is None:
+                lowered = text.lower()
+            if fmt.keyword not in lowered:
+                return -1, lowered
+    return pos, lowered
+
+
+class CAExtractor:
+    """등록된 포맷들을 우선순위 순으로 검사하는 CA 추출기"""
+
+    def __init__(self, prefilter=("0x", "0X")):
+        self.prefilter = tuple(prefilter)
+        self.formats = []
+
+    def register(self, source_format):
+        """새 포맷을 등록합니다. 우선순위 순으로 정렬되어 검사됩니다."""
+        if any(f.name == source_format.name for f in self.formats):
+            raise ValueError(f"이미 등록된 포맷입니다: {source_format.name}")
+        self.formats.append(source_format)
+        self.formats.sort(key=lambda f: f.priority)
+        return source_format
+
+    def _prefiltered(self, text):
+        """리터럴 사전 필터: CA가 있을 수 없는 메시지는 False"""
+        if not text:
+            return False
+        for token in self.prefilter:
+            if token in text:
+                return True
+        return False
+
+    def extract(self, text):
+        """(CA, SourceFormat) 튜플을 반환합니다. 매칭이 없으면 None을 반환합니다."""
+        if not self._prefiltered(text):
+            return None
+        lowered = None  # 대소문자 무시 포맷이 필요할 때만 한 번 생성
+        for fmt in self.formats:
+            pos, lowered = _gate(fmt, text, lowered)
+            if pos < 0:
+                continue
+            match = fmt.regex.search(text, pos)
+            if match is not None:
+                return match.group(1), fmt
+        return None
+
+    def extract_all(self, text):
+        """
+        메시지의 모든 CA를 [(CA, SourceFormat), ...]로 반환합니다 (CA 중복 제거, 첫 항목은 extract()의 결과).
+        한 메시지에 여러 리스팅이 있거나 숨은 링크가 함께 있을 때 사용합니다.
+        포맷마다 앵커 위치부터 한 번만 스캔합니다 (우선순위 순이므로 처음 찾은 CA가 extract()의 결과와 같음).
+        """
+        if not self._prefiltered(text):
+            return []
+        found = {}
+        lowered = None
+        for fmt in self.formats:
+            pos, lowered = _gate(fmt, text, lowered)
+            if pos < 0:
+                continue
+            for match in fmt.regex.finditer(text, pos):
+                found.setdefault(match.group(1).lower(), (match.group(1), fmt))
+        return list(found.values())
+
+
+# 기본 추출기 (main.py에서 사용)
+default_extractor = CAExtractor()
+default_extractor.register(SourceFormat(
+    "binance_url", "패턴1(Binance URL)", BINANCE_URL_REGEX,
+    anchor="binancewallet/", priority=0,
+))
+default_extractor.register(SourceFormat(
+    "newsbothub", "패턴2(Newsbothub/live on Binance alpha)", NEWSBOTHUB_SOURCE_REGEX,
+    anchor="source:", ignore_case=True, keyword="live on Binance alpha", priority=1,
+))
+
+
+def register_format(name, description, pattern, anchor=None, ignore_case=False,
+                    keyword=None, priority=10):
+    """기본 추출기에 새 채널 포맷을 추가합니다."""
+    return default_extractor.register(SourceFormat(
+        name, description, pattern, anchor=anchor, ignore_case=ignore_case,
+        keyword=keyword, priority=priority,
+    ))
+
+
+def extract_ca(text):
+    """기본 추출기로 메시지에서 CA를 추출합니다."""
+    return default_extractor.extract(text)
+
+
+def extract_all_cas(text):
+    """기본 추출기로 메시지의 모든 CA를 추출합니다."""
+    return default_extractor.extract_all(text)
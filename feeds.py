@@ -0,0 +1,93 @@
+import logging
+from functools import partial
+
+from telethon import events
+
+from ingest import TelegramIngest
+
+
+# --- 텔레그램 채널 피드 ---
+class TelegramFeed:
+    """
+    소스 채널의 새 메시지, 수정된 메시지, 앨범을 매수 파이프라인으로 전달하는 핸들러 묶음.
+    자리표시자로 먼저 올린 뒤 수정으로 CA를 채우는 채널도 놓치지 않습니다 (ingest.TelegramIngest 참고).
+    subscribe()를 다시 호출하면 재시작 없이 감시 채널을 바꿉니다.
+    """
+
+    def __init__(self, client, pipeline, ingest=None):
+        self.client = client
+        self.ingest = ingest or TelegramIngest(pipeline)
+        self.chats = []
+
+    async def handler(self, event):
+        """새 메시지/수정된 메시지를 중복 제거와 채널별 사전 필터를 거쳐 매수 파이프라인으로 전달합니다."""
+        await self.ingest.handle(event)
+
+    async def album_handler(self, event):
+        await self.ingest.handle_album(event)
+
+    def subscribe(self, chats):
+        """chats를 감시하도록 핸들러를 (다시) 등록합니다. 새 필터는 resolve() 전까지 첫 메시지 수신 시 해석됩니다."""
+        self.client.remove_event_handler(self.handler)
+        self.client.remove_event_handler(self.album_handler)
+        self.chats = list(chats)
+        self.client.add_event_handler(self.handler, events.NewMessage(chats=self.chats))
+        self.client.add_event_handler(self.handler, events.MessageEdited(chats=self.chats))
+        self.client.add_event_handler(self.album_handler, events.Album(chats=self.chats))
+
+    async def resolve(self):
+        """이벤트 필터의 채널을 미리 해석합니다 (첫 메시지 처리 지연 방지)."""
+        for callback, builder in self.client.list_event_handlers():
+            if callback not in (self.handler, self.album_handler):
+                continue
+            try:
+                await builder.resolve(self.client)
+            except Exception as e:
+                logging.warning(f"이벤트 필터 미리 해석 실패 (첫 메시지 수신 시 다시 시도): {e}")
+
+
+def register_telegram_feed(client, chats, pipeline, ingest=None):
+    """소스 채널 핸들러를 등록하고 TelegramFeed를 반환합니다."""
+    feed = TelegramFeed(client, pipeline, ingest)
+    feed.subscribe(chats)
+    return feed
+
+
+# --- NLF WebSocket 피드 ---
+async def run_nlf_feed(config, pipeline, tracker):
+    """NLF WebSocket에 여러 연결을 유지하며 실시간 리스팅 정보를 수신합니다."""
+    if not config.nlf_enabled:
+        logging.info("NLF WebSocket이 비활성화되어 있습니다.")
+        return
+
+    if not config.nlf_api_key:
+        logging.warning("NLF_API_KEY가 설정되지 않았습니다. WebSocket 연결을 건너뜁니다.")
+        return
+
+    # NLF를 쓸 때만 로드 (websockets는 NLFConnectionManager가 생성될 때 import)
+    import ssl
+    from nlf import JSON_BACKEND, NLFConnectionManager
+
+    logging.info(f"NLF WebSocket 활성화: {', '.join(config.nlf_ws_urls)} (엔드포인트당 {config.nlf_connections}개 연결)")
+    logging.info(f"NLF 프레임 JSON 디코더: {JSON_BACKEND}")
+
+    # SSL 인증서 검증 비활성화
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+
+    # API 키를 헤더에 포함하여 연결 (NLF API 형식)
+    headers = {"authorization": f"Bearer {config.nlf_api_key}"}
+
+    # 가장 먼저 도착한 프레임만 파이프라인으로 전달 (매수는 별도 태스크에서 실행)
+    # 사전 필터는 연결 계층에서 한 번만 실행
+    manager = NLFConnectionManager(
+        config.nlf_ws_urls,
+        partial(pipeline.submit_nlf_frame, prefiltered=True),
+        connections_per_url=config.nlf_connections,
+        connect_kwargs={"ssl": ssl_context, "additional_headers": headers},
+        ping_interval=config.nlf_ping_interval,
+        ping_timeout=config.nlf_ping_timeout,
+    )
+    tracker.register_section("nlf", manager.summary)
+    await manager.run()
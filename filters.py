@@ -0,0 +1,254 @@
+"""매수 전 검사: 시간 예산 안에서 검사들을 동시에 실행하고 결과를 캐시하며 블랙리스트/화이트리스트를 적용합니다."""
+import time
+import asyncio
+import logging
+import importlib
+from collections import OrderedDict
+
+from latency import RollingHistogram
+
+DEFAULT_BUDGET_MS = 5.0
+DEFAULT_CACHE_TTL = 600.0
+DEFAULT_CACHE_SIZE = 4096
+
+
+class CheckResult:
+    """검사 결과: ok=False면 매수하지 않음"""
+
+    __slots__ = ("ok", "reason")
+
+    def __init__(self, ok, reason=""):
+        self.ok = ok
+        self.reason = reason
+
+    def __repr__(self):
+        return f"CheckResult({self.ok}, {self.reason!r})"
+
+
+class Checker:
+    """
+    매수 전 검사 인터페이스. check(ca)는 CheckResult(또는 (ok, reason) 튜플)를 반환합니다.
+    ttl초 동안 결과가 캐시되며 (0이면 캐시하지 않음), 예외는 기본 판정으로 처리됩니다.
+    """
+
+    name = "checker"
+    ttl = DEFAULT_CACHE_TTL
+
+    async def check(self, ca):
+        raise NotImplementedError
+
+
+class MockChecker(Checker):
+    """로컬 테스트용 검사: results(CA -> (ok, reason))에 없는 CA는 통과, delay초 후 응답"""
+
+    def __init__(self, results=None, delay=0.0, name="mock", ttl=DEFAULT_CACHE_TTL):
+        self.results = {ca.lower(): result for ca, result in (results or {}).items()}
+        self.delay = delay
+        self.name = name
+        self.ttl = ttl
+        self.calls = 0
+
+    async def check(self, ca):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.results.get(ca, (True, ""))
+
+
+def load_checkers(spec):
+    """
+    PRE_TRADE_CHECKS 설정으로 검사 목록을 만듭니다.
+    콤마로 구분된 'mock' 또는 'module:ClassName' (인자 없이 생성) 목록입니다.
+    """
+    checkers = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        if item.lower() == "mock":
+            checkers.append(MockChecker())
+            continue
+        module_name, _, attr = item.partition(":")
+        if not attr:
+            raise ValueError(f"잘못된 검사 형식: {item} (형식: module:ClassName)")
+        checkers.append(getattr(importlib.import_module(module_name), attr)())
+    return checkers
+
+
+def load_ca_list(path):
+    """한 줄에 CA 하나씩 적힌 파일을 읽습니다 (# 주석, 빈 줄 무시). 파일이 없으면 빈 집합."""
+    if not path:
+        return set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            lines = [line.split("#", 1)[0].strip() for line in f]
+    except FileNotFoundError:
+        logging.warning(f"CA 목록 파일이 없습니다: {path}")
+        return set()
+    return {line.lower() for line in lines if line}
+
+
+class TTLCache:
+    """최대 max_entries개, 항목별 ttl초 동안 유지되는 LRU 캐시"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._items = OrderedDict()  # key -> (만료 시각, 값)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None or item[0] <= self._clock():
+            if item is not None:
+                del self._items[key]
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        self._items[key] = (self._clock() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class FilterDecision:
+    """PreTradeFilter.evaluate()의 결과"""
+
+    __slots__ = ("allowed", "reasons", "timed_out", "elapsed_ms")
+
+    def __init__(self, allowed, reasons=(), timed_out=(), elapsed_ms=0.0):
+        self.allowed = allowed
+        self.reasons = list(reasons)  # 거부 사유 ('검사 이름: 사유')
+        self.timed_out = list(timed_out)  # 예산 안에 응답하지 않아 기본 판정을 받은 검사
+        self.elapsed_ms = elapsed_ms
+
+
+def _as_result(value):
+    if isinstance(value, CheckResult):
+        return value
+    ok, reason = value
+    return CheckResult(bool(ok), reason)
+
+
+class PreTradeFilter:
+    """
+    CA마다 화이트리스트 -> 블랙리스트 -> 검사(동시 실행, budget초 제한) 순으로 매수 여부를 결정합니다.
+    예산을 넘긴 검사와 실패한 검사는 default_allow 판정을 받고, 늦게 끝난 결과는 캐시에 저장됩니다.
+    """
+
+    def __init__(self, checkers=(), budget=DEFAULT_BUDGET_MS / 1000, default_allow=True, blacklist=(), whitelist=(),
+                 cache=None, clock=time.monotonic):
+        self.checkers = list(checkers)
+        self.budget = budget
+        self.default_allow = default_allow
+        self.blacklist = {ca.lower() for ca in blacklist}
+        self.whitelist = {ca.lower() for ca in whitelist}
+        self.cache = cache or TTLCache(clock=clock)
+        self._inflight = {}  # (검사 이름, CA) -> 진행 중인 검사 태스크 (피드 간 공유)
+        self.latency = RollingHistogram()
+        self.allowed = 0
+        self.denied = {}  # 사유별 거부 횟수 ('blacklist' 또는 검사 이름)
+        self.timeouts = {}  # 검사 이름별 예산 초과 횟수
+        self.errors = {}  # 검사 이름별 예외 횟수
+
+    def _count(self, counter, name):
+        counter[name] = counter.get(name, 0) + 1
+
+    def _start(self, checker, ca):
+        key = (checker.name, ca)
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.create_task(checker.check(ca))
+
+            def done(t):
+                self._inflight.pop(key, None)
+                if not t.cancelled() and t.exception() is None:
+                    try:
+                        self.cache.set(key, _as_result(t.result()), checker.ttl)
+                    except (TypeError, ValueError):
+                        pass  # 잘못된 반환값: evaluate에서 오류로 처리
+
+            task.add_done_callback(done)
+        return task
+
+    def _resolve(self, checker, task):
+        """끝난 검사 태스크를 CheckResult로 바꿉니다 (예외는 기본 판정)."""
+        try:
+            return _as_result(task.result())
+        except Exception as e:
+            self._count(self.errors, checker.name)
+            logging.warning(f"매수 전 검사 오류 ({checker.name}): {e}")
+            return CheckResult(self.default_allow, "error")
+
+    def _decide(self, allowed, reasons, timed_out, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.latency.record(elapsed_ms)
+        if allowed:
+            self.allowed += 1
+        return FilterDecision(allowed, reasons, timed_out, elapsed_ms)
+
+    async def evaluate(self, ca):
+        started = time.perf_counter()
+        key = ca.lower()
+        if key in self.whitelist:
+            return self._decide(True, (), (), started)
+        if key in self.blacklist:
+            self._count(self.denied, "blacklist")
+            return self._decide(False, ["blacklist"], (), started)
+
+        reasons = []
+        pending = {}  # 태스크 -> 검사
+        for checker in self.checkers:
+            result = self.cache.get((checker.name, key))
+            if result is None:
+                pending[self._start(checker, key)] = checker
+            elif not result.ok:
+                reasons.append(f"{checker.name}: {result.reason}")
+                self._count(self.denied, checker.name)
+
+        # 하나라도 거부하면 나머지를 기다리지 않음 (남은 검사는 백그라운드에서 끝나 캐시에 저장)
+        deadline = started + self.budget
+        while pending and not reasons:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                checker = pending.pop(task)
+                result = self._resolve(checker, task)
+                if not result.ok:
+                    reasons.append(f"{checker.name}: {result.reason}")
+                    self._count(self.denied, checker.name)
+
+        timed_out = [] if reasons else [checker.name for checker in pending.values()]
+        for name in timed_out:
+            self._count(self.timeouts, name)
+        if timed_out and not self.default_allow:
+            reasons.append(f"timeout: {', '.join(timed_out)}")
+            self._count(self.denied, "timeout")
+        return self._decide(not reasons, reasons, timed_out, started)
+
+    def summary(self):
+        return {
+            "checkers": [checker.name for checker in self.checkers],
+            "budget_ms": round(self.budget * 1000, 3),
+            "default": "allow" if self.default_allow else "deny",
+            "allowed": self.allowed,
+            "denied": dict(self.denied),
+            "timeouts": dict(self.timeouts),
+            "errors": dict(self.errors),
+            "cache": {"entries": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses},
+            "latency_ms": self.latency.summary(),
+            "blacklist": len(self.blacklist),
+            "whitelist": len(self.whitelist),
+        }
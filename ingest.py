@@ -0,0 +1,191 @@
+"""텔레그램 수신 처리: 새 메시지/수정/앨범 업데이트를 검색용 텍스트로 만들고 중복과 잡담을 걸러 파이프라인에 넘깁니다."""
+import time
+from collections import OrderedDict
+
+from extractors import default_extractor
+from latency import RollingHistogram
+
+# 처리한 (채팅, 메시지 ID) 기록 수 (수정 이벤트 중복 판별용)
+DEFAULT_SEEN_MAX = 8192
+
+# 채널별 필터가 없을 때 사용하는 사전 필터 (CA가 없는 메시지는 추출하지 않음)
+DEFAULT_TOKENS = default_extractor.prefilter
+
+
+def message_text(message):
+    """
+    CA 검색 대상 텍스트: 메시지 본문 + 숨은 링크(MessageEntityTextUrl) URL + 인라인 버튼 URL.
+    엔티티/버튼이 없는 일반 메시지는 본문을 그대로 반환합니다.
+    """
+    text = message.text or ""
+    extra = []
+    for entity in getattr(message, "entities", None) or ():
+        url = getattr(entity, "url", None)
+        if url and url not in text:
+            extra.append(url)
+    markup = getattr(message, "reply_markup", None)
+    for row in getattr(markup, "rows", None) or ():
+        for button in row.buttons:
+            url = getattr(button, "url", None)
+            if url and url not in text:
+                extra.append(url)
+    if extra:
+        return "\n".join([text, *extra])
+    return text
+
+
+def parse_channel_filters(value):
+    """
+    CHANNEL_FILTERS 설정을 {채널: (토큰, ...)}으로 변환합니다.
+    예: '@NewListingsFeed=binancewallet/;@Newsbothub=source:|alpha' (토큰 중 하나라도 포함되면 통과)
+    """
+    filters = {}
+    for item in (value or "").split(";"):
+        if not item.strip():
+            continue
+        channel, sep, tokens = item.partition("=")
+        tokens = tuple(t for t in (t.strip() for t in tokens.split("|")) if t)
+        if not sep or not channel.strip() or not tokens:
+            raise ValueError(f"잘못된 채널 필터 형식: {item} (형식: 채널=토큰|토큰)")
+        filters[channel.strip()] = tokens
+    return filters
+
+
+class ChannelStats:
+    """채널 하나의 수신/거부/중복/매칭 횟수와 게시 후 감지까지 걸린 시간"""
+
+    __slots__ = ("name", "tokens", "received", "edits", "albums", "backfilled", "duplicates", "rejected", "accepted",
+                 "matched", "detect")
+
+    def __init__(self, name, tokens=DEFAULT_TOKENS):
+        self.name = name
+        self.tokens = tokens  # 이 중 하나라도 포함된 메시지만 추출 (비어 있으면 모두 추출)
+        self.received = 0
+        self.edits = 0
+        self.albums = 0
+        self.backfilled = 0  # 재연결/재시작 후 get_messages로 가져온 메시지
+        self.duplicates = 0
+        self.rejected = 0
+        self.accepted = 0
+        self.matched = 0
+        self.detect = RollingHistogram()  # 메시지 게시(date) -> CA 감지 (ms, 수정으로 채워진 경우 포함)
+
+    def passes(self, text):
+        if not self.tokens:
+            return True
+        for token in self.tokens:
+            if token in text:
+                return True
+        return False
+
+    def summary(self):
+        return {
+            "name": self.name,
+            "received": self.received,
+            "edits": self.edits,
+            "albums": self.albums,
+            "backfilled": self.backfilled,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "accepted": self.accepted,
+            "matched": self.matched,
+            "detect_ms": self.detect.summary(),
+        }
+
+
+class TelegramIngest:
+    """텔레그램 업데이트(새 메시지/수정/앨범)를 걸러 Pipeline.handle_message로 전달합니다."""
+
+    def __init__(self, pipeline, seen_max=DEFAULT_SEEN_MAX, clock=time.time):
+        self.pipeline = pipeline
+        self.seen_max = seen_max
+        self._clock = clock
+        self._seen = OrderedDict()  # (채팅 ID, 메시지 ID) -> 처리한 내용의 해시
+        self.channels = {}  # 채팅 ID -> ChannelStats
+        self._filters = {}  # 채팅 ID -> 토큰 (set_filter로 지정)
+        self.cursors = None  # backfill.CursorStore (채널별 마지막 메시지 ID 기록)
+
+    def set_filter(self, chat_id, tokens, name=None):
+        """채팅 하나의 사전 필터 토큰을 지정합니다 (빈 튜플이면 모든 메시지를 추출)."""
+        self._filters[chat_id] = tuple(tokens)
+        stats = self.channels.get(chat_id)
+        if stats is not None:
+            stats.tokens = tuple(tokens)
+            stats.name = name or stats.name
+        else:
+            self.channels[chat_id] = ChannelStats(name or str(chat_id), tuple(tokens))
+
+    def clear_filters(self):
+        """채널별 사전 필터를 모두 지우고 기본 필터로 되돌립니다 (설정 다시 읽기 후 set_filter로 재지정)."""
+        self._filters.clear()
+        for stats in self.channels.values():
+            stats.tokens = DEFAULT_TOKENS
+
+    def channel(self, chat_id):
+        stats = self.channels.get(chat_id)
+        if stats is None:
+            stats = self.channels[chat_id] = ChannelStats(str(chat_id), self._filters.get(chat_id, DEFAULT_TOKENS))
+        return stats
+
+    def _is_duplicate(self, chat_id, message_id, text):
+        key = (chat_id, message_id)
+        digest = hash(text)
+        if self._seen.get(key) == digest:
+            return True
+        self._seen[key] = digest
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.seen_max:
+            self._seen.popitem(last=False)
+        return False
+
+    async def handle_message(self, chat_id, message, edited=False, album=False, backfill=False):
+        stats = self.channel(chat_id)
+        stats.received += 1
+        if edited:
+            stats.edits += 1
+        if album:
+            stats.albums += 1
+        if backfill:
+            stats.backfilled += 1
+        if self.cursors is not None:
+            self.cursors.advance(chat_id, message.id)
+        text = message_text(message)
+        # 같은 내용으로 이미 처리한 메시지 (앨범 중복 전달, 내용이 바뀌지 않은 수정 등)
+        if self._is_duplicate(chat_id, message.id, text):
+            stats.duplicates += 1
+            return []
+        if not stats.passes(text):
+            stats.rejected += 1
+            return []
+        stats.accepted += 1
+        found = await self.pipeline.handle_message(_Event(chat_id, message), text=text, edited=edited)
+        if found:
+            stats.matched += 1
+            if message.date is not None:
+                stats.detect.record(max(0.0, (self._clock() - message.date.timestamp()) * 1000))
+        return found
+
+    async def handle(self, event):
+        """events.NewMessage / events.MessageEdited 핸들러"""
+        edited = getattr(event.message, "edit_date", None) is not None
+        return await self.handle_message(event.chat_id, event.message, edited=edited)
+
+    async def handle_album(self, event):
+        """events.Album 핸들러: 앨범의 각 메시지를 처리합니다 (개별 NewMessage로 이미 처리된 것은 중복으로 제외)."""
+        found = []
+        for message in event.messages:
+            found += await self.handle_message(event.chat_id, message, album=True)
+        return found
+
+    def summary(self):
+        return {str(chat_id): stats.summary() for chat_id, stats in self.channels.items()}
+
+
+class _Event:
+    """Pipeline.handle_message가 사용하는 이벤트 속성 (chat_id, message)"""
+
+    __slots__ = ("chat_id", "message")
+
+    def __init__(self, chat_id, message):
+        self.chat_id = chat_id
+        self.message = message
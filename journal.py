@@ -0,0 +1,398 @@
+"""매매 단계별 이벤트를 고정 길이 바이너리 레코드로 일별 세그먼트에 기록하고 CSV/Parquet로 내보냅니다."""
+import os
+import csv
+import gzip
+import time
+import struct
+import asyncio
+import logging
+import argparse
+import threading
+
+MAGIC = b"ASJ1"  # 기록을 시작할 때마다 (재시작 포함) 먼저 쓰며, 읽을 때 문자열 표를 새로 시작
+DEFAULT_FLUSH_SECONDS = 1.0
+MAX_BUFFER = 64 * 1024  # 버퍼가 이보다 커지면 다음 주기를 기다리지 않고 기록
+
+# 이벤트 종류 (a, b 값의 의미)
+STRING = 0
+SIGNAL = 1  # CA 감지: a = 원본 게시 -> 수신 (ms, 알 수 없으면 -1), b = 수신 -> 감지 (ms)
+CLAIM = 2  # 중복 방지 선점 성공
+DUPLICATE = 3  # 다른 피드가 먼저 선점 (또는 이미 매수한 CA)
+FILTERED = 4  # 매수 전 검사에서 거부: a = 검사 시간 (ms)
+PAUSED = 5  # 매수 일시 중지로 건너뜀
+SEND = 6  # 매수 명령 전송 시작: a = 매수 금액 (BNB), b = 수신 -> 전송 시작 (ms)
+ACK = 7  # 봇 전송 확인: a = 수신 -> 확인 (ms), b = 전송 시작 -> 확인 (ms)
+SEND_FAILED = 8  # 모든 봇 전송 실패: a = 수신 -> 실패 확정 (ms)
+SELL_SCHEDULED = 9  # 매도 예약: a = 비율 (%), b = 실행까지 남은 시간 (초, 청산 엔진의 매도는 0 = 즉시)
+SELL_SENT = 10  # 매도 전송: a = 비율 (%), b = 1 성공 / 0 실패
+
+EVENT_NAMES = {
+    SIGNAL: "signal", CLAIM: "claim", DUPLICATE: "duplicate", FILTERED: "filtered", PAUSED: "paused",
+    SEND: "send", ACK: "ack", SEND_FAILED: "send_failed", SELL_SCHEDULED: "sell_scheduled", SELL_SENT: "sell_sent",
+}
+
+# 레코드 (little-endian, 41바이트): 이벤트, 시각(epoch), 피드 문자열 ID, CA, a, b, 봇 문자열 ID
+_RECORD = struct.Struct("<BdH20sffH")
+# 문자열 정의 (이벤트 0): ID, 길이 + utf-8 (피드/봇 이름은 세그먼트마다 처음 나올 때 한 번만 기록)
+_STRING = struct.Struct("<BHH")
+_NO_CA = bytes(20)
+_CA_STRING = b"\xff" * 18  # 20바이트 주소가 아닌 CA: 뒤 2바이트가 문자열 ID
+
+
+def _pack_ca(ca):
+    """42자(0x + 40자리 hex) CA는 20바이트로, 그 밖의 CA는 None (문자열 표에 기록)"""
+    if len(ca) == 42:
+        try:
+            return bytes.fromhex(ca[2:])
+        except ValueError:
+            pass
+    return None
+
+
+def _unpack_ca(ca, strings):
+    if ca == _NO_CA:
+        return ""
+    if ca[:18] == _CA_STRING:
+        return strings.get(int.from_bytes(ca[18:], "little"), "")
+    return "0x" + ca.hex()
+
+
+def _definitions(strings):
+    """MAGIC + 문자열 표 전체 (기록에 실패해 정의가 사라진 뒤 같은 ID로 다시 정의)"""
+    data = bytearray(MAGIC)
+    for name, string_id in strings.items():
+        encoded = name.encode("utf-8")
+        data += _STRING.pack(STRING, string_id, len(encoded))
+        data += encoded
+    return data
+
+
+def _day_bounds(ts):
+    day = int(ts // 86400)
+    return time.strftime("%Y%m%d", time.gmtime(day * 86400)), (day + 1) * 86400
+
+
+class TradeJournal:
+    """매매 이벤트를 버퍼에 모아 flush_interval초마다 별도 스레드에서 일별 세그먼트 파일에 추가합니다."""
+
+    def __init__(self, directory, flush_interval=DEFAULT_FLUSH_SECONDS, max_buffer=MAX_BUFFER, clock=time.time):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._clock = clock
+        self._buffer = bytearray()
+        self._batches = []  # 날짜가 바뀌어 닫힌 버퍼 [(경로, 데이터, 문자열 표)]
+        self._strings = {}  # 이름 -> ID (세그먼트마다 새로 시작)
+        self._pending = []  # 스레드에 넘겼지만 아직 기록하지 않은 배치
+        self._io_lock = threading.Lock()  # 파일 기록 순서 보장 (flush 스레드와 종료 시 flush_sync)
+        self._path = None
+        self._day_end = 0.0
+        self._wakeup = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self.events = 0
+        self.bytes = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def _rotate(self, now):
+        if self._buffer:
+            self._batches.append((self._path, bytes(self._buffer), self._strings))
+        day, self._day_end = _day_bounds(now)
+        self._path = os.path.join(self.directory, f"{day}.bin")
+        self._strings = {}
+        self._buffer = bytearray(MAGIC)
+
+    def _string_id(self, name):
+        string_id = self._strings.get(name)
+        if string_id is None:
+            string_id = self._strings[name] = len(self._strings) + 1
+            data = name.encode("utf-8")
+            self._buffer += _STRING.pack(STRING, string_id, len(data))
+            self._buffer += data
+        return string_id
+
+    def record(self, event, feed="", ca=None, a=0.0, b=0.0, bot=""):
+        """이벤트 하나를 버퍼에 추가합니다 (매수 경로에서 호출, 디스크 I/O 없음)."""
+        now = self._clock()
+        if now >= self._day_end:
+            self._rotate(now)
+        feed_id = self._string_id(feed) if feed else 0
+        bot_id = self._string_id(str(bot)) if bot else 0
+        packed = _pack_ca(ca) if ca else _NO_CA
+        if packed is None:
+            packed = _CA_STRING + self._string_id(ca.lower()).to_bytes(2, "little")
+        self._buffer += _RECORD.pack(event, now, feed_id, packed, a, b, bot_id)
+        self.events += 1
+        if len(self._buffer) >= self.max_buffer:
+            self._wakeup.set()
+
+    def _take(self):
+        batches = self._batches
+        if self._buffer and self._buffer != MAGIC:
+            batches.append((self._path, bytes(self._buffer), self._strings))
+            self._buffer = bytearray()
+        self._batches = []
+        return batches
+
+    def _write(self, batches):
+        os.makedirs(self.directory, exist_ok=True)
+        for path, data, _ in batches:
+            with open(path, "ab") as f:
+                start = f.tell()
+                try:
+                    f.write(data)
+                    f.flush()
+                except OSError:
+                    f.truncate(start)  # 일부만 기록된 레코드가 뒤의 기록을 깨뜨리지 않도록 되돌림
+                    raise
+            self.bytes += len(data)
+        self.flushes += 1
+        # 지난 날짜의 세그먼트는 압축 (현재 세그먼트만 추가 기록)
+        for path, _, _ in batches:
+            if path != self._path:
+                compress_segment(path)
+
+    def _write_pending(self):
+        """대기 중인 배치를 기록합니다. 먼저 넘긴 배치가 항상 먼저 기록됩니다."""
+        with self._io_lock:
+            batches, self._pending = self._pending, []
+            if batches:
+                self._write(batches)
+
+    def _recover(self, error):
+        """
+        기록 실패: 배치는 버리지만, 남은 기록이 참조하는 문자열 ID가 사라지지 않도록
+        대기 중인 버퍼 앞에 각자의 문자열 표를 다시 정의합니다 (읽을 때 MAGIC에서 표를 새로 시작).
+        """
+        self.errors += 1
+        logging.error(f"매매 기록 저장 실패 ({self.directory}): {error}")
+        self._batches = [(path, bytes(_definitions(strings)) + data, strings) for path, data, strings in self._batches]
+        if self._path is not None:
+            self._buffer = _definitions(self._strings) + self._buffer
+
+    async def flush(self):
+        """버퍼를 별도 스레드에서 기록합니다."""
+        async with self._write_lock:
+            batches = self._take()
+            if not batches:
+                return
+            self._pending = batches
+            try:
+                await asyncio.to_thread(self._write_pending)
+            except OSError as e:
+                self._recover(e)
+
+    def flush_sync(self):
+        """종료 시: 진행 중인 flush 스레드의 기록이 끝나길 기다린 뒤 남은 버퍼를 바로 기록합니다."""
+        with self._io_lock:
+            self._pending += self._take()
+        try:
+            self._write_pending()
+        except OSError as e:
+            self._recover(e)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def summary(self):
+        return {
+            "path": self.directory,
+            "events": self.events,
+            "bytes": self.bytes,
+            "buffered": len(self._buffer),
+            "flushes": self.flushes,
+            "errors": self.errors,
+        }
+
+
+def compress_segment(path):
+    """다 쓴 세그먼트를 gzip으로 압축합니다 (<날짜>.bin -> <날짜>.bin.gz)."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as src, gzip.open(f"{path}.gz.tmp", "wb") as dst:
+        dst.write(src.read())
+    os.replace(f"{path}.gz.tmp", f"{path}.gz")
+    os.remove(path)
+
+
+# --- 읽기 / 요약 ---
+def segment_paths(directory):
+    names = sorted(name for name in os.listdir(directory) if name.endswith((".bin", ".bin.gz")))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_segment(path):
+    """세그먼트 하나의 이벤트를 (event, ts, feed, ca, a, b, bot) 튜플로 반환합니다."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        data = f.read()
+    events = []
+    strings = {0: ""}
+    pos, size = 0, len(data)
+    while pos < size:
+        if data[pos:pos + 4] == MAGIC:
+            strings = {0: ""}
+            pos += 4
+            continue
+        kind = data[pos]
+        if kind == STRING:
+            if pos + _STRING.size > size:
+                break
+            _, string_id, length = _STRING.unpack_from(data, pos)
+            pos += _STRING.size
+            strings[string_id] = data[pos:pos + length].decode("utf-8", "replace")
+            pos += length
+            continue
+        if pos + _RECORD.size > size:
+            logging.warning(f"잘린 매매 기록 무시: {path} ({size - pos}바이트)")
+            break
+        event, ts, feed, ca, a, b, bot = _RECORD.unpack_from(data, pos)
+        pos += _RECORD.size
+        events.append((EVENT_NAMES.get(event, str(event)), ts, strings.get(feed, ""),
+                       _unpack_ca(ca, strings), a, b, strings.get(bot, "")))
+    return events
+
+
+def read_journal(directory):
+    events = []
+    for path in segment_paths(directory):
+        events += read_segment(path)
+    events.sort(key=lambda e: e[1])
+    return events
+
+
+def _stats(values, prefix):
+    """p50/p95/p99 (latency.RollingHistogram.summary와 같은 방식)"""
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {f"{prefix}_p{pct}": round(ordered[min(last, int(round(pct / 100 * last)))], 3) if ordered else None
+            for pct in (50, 95, 99)}
+
+
+def summarize(events):
+    """
+    피드별 요약과 CA별 매매 요약을 만듭니다.
+    lead_ms는 같은 CA를 가장 먼저 감지한 피드 대비 늦은 시간입니다 (가장 빠른 피드는 0).
+    """
+    first_signal = {}  # CA -> 가장 이른 감지 시각
+    trades = {}
+    for event, ts, feed, ca, a, b, bot in events:
+        if event == "signal" and ca:
+            first_signal[ca] = min(ts, first_signal.get(ca, ts))
+
+    feeds = {}
+    for event, ts, feed, ca, a, b, bot in events:
+        if feed:
+            stats = feeds.get(feed)
+            if stats is None:
+                stats = feeds[feed] = {"counts": {}, "lead": [], "origin": [], "ack": [], "send": []}
+            stats["counts"][event] = stats["counts"].get(event, 0) + 1
+            if event == "signal" and ca:
+                stats["lead"].append((ts - first_signal[ca]) * 1000)
+                if a >= 0:
+                    stats["origin"].append(a)
+            elif event == "ack":
+                stats["ack"].append(a)
+                stats["send"].append(b)
+        if not ca:
+            continue
+        trade = trades.get(ca)
+        if trade is None:
+            trade = trades[ca] = {"ca": ca, "first_seen": ts, "first_feed": "", "feeds": set(), "claimed_by": "",
+                                  "acks": 0, "ack_ms": None, "send_failed": 0, "sells": 0, "sold_percent": 0.0}
+        if event == "signal":
+            trade["feeds"].add(feed)
+            if not trade["first_feed"]:
+                trade["first_feed"] = feed
+        elif event == "claim":
+            trade["claimed_by"] = feed
+        elif event == "ack":
+            trade["acks"] += 1
+            trade["ack_ms"] = a if trade["ack_ms"] is None else min(trade["ack_ms"], a)
+        elif event == "send_failed":
+            trade["send_failed"] += 1
+        elif event == "sell_sent" and b:
+            trade["sells"] += 1
+            # /sell 비율은 남은 보유량 기준이므로 최초 포지션 대비 비율로 환산해 누적
+            trade["sold_percent"] += (100.0 - trade["sold_percent"]) * a / 100
+            trade["sold_percent"] = min(100.0, round(trade["sold_percent"], 4))
+
+    feed_rows = []
+    for feed, stats in sorted(feeds.items()):
+        counts = stats["counts"]
+        signals = counts.get("signal", 0)
+        lead = stats["lead"]
+        row = {
+            "feed": feed,
+            "signals": signals,
+            "claims": counts.get("claim", 0),
+            "duplicates": counts.get("duplicate", 0),
+            "duplicate_rate": round(counts.get("duplicate", 0) / signals, 4) if signals else None,
+            "first_detections": sum(1 for value in lead if value == 0),
+            "filtered": counts.get("filtered", 0),
+            "send_failed": counts.get("send_failed", 0),
+            "acks": counts.get("ack", 0),
+        }
+        row.update(_stats(lead, "lead_ms"))
+        row.update(_stats(stats["origin"], "origin_ms"))
+        row.update(_stats(stats["ack"], "ack_ms"))
+        row.update(_stats(stats["send"], "send_ms"))
+        feed_rows.append(row)
+    trade_rows = []
+    for trade in sorted(trades.values(), key=lambda t: t["first_seen"]):
+        trade_rows.append(dict(trade, feeds="|".join(sorted(trade["feeds"])),
+                               ack_ms=None if trade["ack_ms"] is None else round(trade["ack_ms"], 3)))
+    return feed_rows, trade_rows
+
+
+def write_table(rows, path, fmt="csv"):
+    """행 목록을 CSV 또는 Parquet(pyarrow 설치 시)로 저장합니다."""
+    if fmt == "parquet":
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet 출력에는 pyarrow가 필요합니다 (pip install pyarrow). --format csv를 사용하세요.")
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), path)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the binary trade journal as per-feed / per-trade tables")
+    parser.add_argument("journal", help="journal directory (<SESSION_NAME>.journal)")
+    parser.add_argument("--out", default="journal_report", help="output directory")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--since", type=float, default=None, help="only events newer than this many hours")
+    parser.add_argument("--events", action="store_true", help="also write every event (events.<format>)")
+    args = parser.parse_args()
+
+    events = read_journal(args.journal)
+    if args.since is not None:
+        cutoff = time.time() - args.since * 3600
+        events = [e for e in events if e[1] >= cutoff]
+    feed_rows, trade_rows = summarize(events)
+    os.makedirs(args.out, exist_ok=True)
+    write_table(feed_rows, os.path.join(args.out, f"feeds.{args.format}"), args.format)
+    write_table(trade_rows, os.path.join(args.out, f"trades.{args.format}"), args.format)
+    if args.events:
+        columns = ("event", "ts", "feed", "ca", "a", "b", "bot")
+        write_table([dict(zip(columns, e)) for e in events], os.path.join(args.out, f"events.{args.format}"),
+                    args.format)
+    print(f"{len(events)} events, {len(trade_rows)} CAs -> {args.out}/")
+    for row in feed_rows:
+        print(f"  {row['feed']}: signals={row['signals']} duplicate_rate={row['duplicate_rate']} "
+              f"lead_p50={row['lead_ms_p50']}ms ack_p50={row['ack_ms_p50']}ms")
+
+
+if __name__ == "__main__":
+    main()
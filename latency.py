@@ -0,0 +1,151 @@
+import json
+import time
+import asyncio
+import logging
+from collections import deque
+
+# 히스토그램마다 보관할 최근 샘플 수
+DEFAULT_WINDOW = 2048
+
+
+class RollingHistogram:
+    """최근 N개 샘플(ms)을 보관하고 p50/p95/p99를 계산합니다."""
+
+    def __init__(self, maxlen=DEFAULT_WINDOW):
+        self._samples = deque(maxlen=maxlen)
+        self.count = 0
+
+    def record(self, value_ms):
+        self._samples.append(value_ms)
+        self.count += 1
+
+    def summary(self):
+        if not self._samples:
+            return {"count": self.count}
+        ordered = sorted(self._samples)
+        last = len(ordered) - 1
+
+        def pick(pct):
+            return round(ordered[min(last, int(round(pct / 100 * last)))], 3)
+
+        return {
+            "count": self.count,
+            "p50": pick(50),
+            "p95": pick(95),
+            "p99": pick(99),
+            "max": round(ordered[-1], 3),
+        }
+
+
+class Trace:
+    """메시지 한 건이 수신부터 매수 명령 확인까지 거치는 단계별 타임스탬프"""
+
+    __slots__ = ("feed", "source", "origin_ts", "received_wall", "_start", "marks")
+
+    def __init__(self, feed, source, origin_ts=None, received_wall=None, started=None):
+        self.feed = feed
+        self.source = source
+        self.origin_ts = origin_ts  # 텔레그램 메시지 date 또는 WebSocket 수신 시각 (epoch 초)
+        self.received_wall = time.time() if received_wall is None else received_wall
+        # 단계 오프셋의 기준 시점 (perf_counter). 소켓에서 프레임을 받은 시각을 넘기면 대기 시간도 포함됩니다.
+        self._start = time.perf_counter() if started is None else started
+        self.marks = []
+
+    def mark(self, stage):
+        """현재 시점을 단계 이름과 함께 기록합니다."""
+        self.marks.append((stage, time.perf_counter()))
+
+    def elapsed_ms(self, stage=None):
+        """수신 시점부터 지정 단계(없으면 마지막 단계)까지의 경과 시간(ms)"""
+        for name, ts in reversed(self.marks):
+            if stage is None or name == stage:
+                return (ts - self._start) * 1000
+        return None
+
+    def since_start_ms(self):
+        """수신 시점부터 현재까지의 경과 시간(ms)"""
+        return (time.perf_counter() - self._start) * 1000
+
+    def stage_offsets(self):
+        return [(name, (ts - self._start) * 1000) for name, ts in self.marks]
+
+
+class LatencyTracker:
+    """피드/소스별, 단계별 지연 시간 히스토그램을 관리합니다."""
+
+    def __init__(self, window=DEFAULT_WINDOW, clock=time.time):
+        self.window = window
+        self._clock = clock  # 수신 시각 기준 (epoch 초)
+        self._histograms = {}
+        self._sections = {}
+
+    def start(self, feed, source, origin_ts=None, started=None):
+        return Trace(feed, str(source), origin_ts, self._clock(), started)
+
+    def _hist(self, key, stage):
+        hist = self._histograms.get((key, stage))
+        if hist is None:
+            hist = self._histograms[(key, stage)] = RollingHistogram(self.window)
+        return hist
+
+    def finish(self, trace):
+        """트레이스의 각 단계 오프셋을 히스토그램에 반영합니다."""
+        key = f"{trace.feed}:{trace.source}"
+        if trace.origin_ts is not None:
+            # 원본 메시지 시각 -> 로컬 수신까지의 지연 (텔레그램 date는 초 단위 정밀도)
+            self._hist(key, "origin").record(max(0.0, (trace.received_wall - trace.origin_ts) * 1000))
+        for stage, offset_ms in trace.stage_offsets():
+            self._hist(key, stage).record(offset_ms)
+
+    def snapshot(self):
+        """{'feed:source': {'stage': {count, p50, p95, p99, max}}} 형태의 요약"""
+        result = {}
+        for (key, stage), hist in sorted(self._histograms.items()):
+            result.setdefault(key, {})[stage] = hist.summary()
+        return result
+
+    def register_section(self, name, provider):
+        """메트릭 출력에 함께 포함할 추가 통계(provider()의 반환값)를 등록합니다."""
+        self._sections[name] = provider
+
+    def export(self):
+        """히스토그램 요약과 등록된 추가 통계를 합친 메트릭"""
+        result = self.snapshot()
+        for name, provider in self._sections.items():
+            result[name] = provider()
+        return result
+
+    async def dump_periodically(self, interval):
+        """interval초마다 히스토그램 요약을 로그로 출력합니다."""
+        while True:
+            await asyncio.sleep(interval)
+            snap = self.export()
+            if snap:
+                logging.info(f"지연 시간 통계: {json.dumps(snap, ensure_ascii=False)}")
+
+    async def serve_metrics(self, host, port):
+        """GET 요청에 히스토그램 요약을 JSON으로 응답하는 로컬 메트릭 서버를 시작합니다."""
+
+        async def respond(reader, writer):
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                pass
+            body = json.dumps(self.export(), ensure_ascii=False).encode("utf-8")
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("ascii")
+                + body
+            )
+            try:
+                await writer.drain()
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(respond, host, port)
+        logging.info(f"지연 시간 메트릭 서버 시작: http://{host}:{port}/")
+        return server
+
+
+# 전역 트래커 (main.py 및 보조 모듈이 공유)
+tracker = LatencyTracker()
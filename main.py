@@ -1,352 +1,395 @@
+import time
+_STARTED = time.perf_counter()  # 준비 완료(armed)까지 걸린 시간 측정 기준 (인터프리터 시작 직후)
+
 import os
-import re
+import sys
+import json
 import logging
 import asyncio
 import signal
-import json
-import ssl
-from dotenv import load_dotenv, set_key
-from telethon import TelegramClient, events
-import websockets
+from telethon import TelegramClient
+from telethon.utils import get_peer_id
+from config import ENV_PATH, load_config
+from latency import tracker
+from dedup import DedupService, DedupStore
+from pipeline import build_pipeline
+from peers import PeerCache
+from feeds import register_telegram_feed, run_nlf_feed
+from ingest import parse_channel_filters
+from backfill import Backfill, CursorStore
+from broker import BrokerClient
+from positions import TimeExit, parse_exit_rules, load_price_source
+from monitor import LoopMonitor, setup_queue_logging
+from filters import PreTradeFilter, TTLCache, load_checkers, load_ca_list
+from control import ControlServer
+from journal import TradeJournal
+from reloader import ConfigReloader
 
 # 로깅 설정
 logging.basicConfig(format='[%(levelname) 5s/%(asctime)s] %(name)s: %(message)s',
                     level=logging.INFO)
 
-# --- Interactive Setup Wizard ---
-ENV_PATH = ".env"
-
-def ask_input(prompt, default=None):
-    """사용자 입력을 요청합니다. 기본값이 있으면 함께 표시합니다."""
-    if default:
-        user_input = input(f"{prompt} (기본값: {default}): ").strip()
-        return user_input if user_input else default
-    else:
-        while True:
-            user_input = input(f"{prompt}: ").strip()
-            if user_input:
-                return user_input
-            print("값을 입력해야 합니다.")
-
-def run_setup_wizard():
-    """환경 변수 설정을 위한 대화형 마법사"""
-    print("\n" + "="*40)
-    print("  AlphaSniper 초기 설정 마법사")
-    print("="*40 + "\n")
-    print("설정 파일(.env)이 없거나 필수 값이 부족하여 설정을 시작합니다.")
-    print("Telegram API 정보가 필요합니다. (https://my.telegram.org/apps 에서 확인 가능)\n")
-
-    # 기존 값 로드 (있다면)
-    load_dotenv(ENV_PATH)
-
-    api_id = ask_input("1. API ID (숫자)", os.getenv("API_ID"))
-    api_hash = ask_input("2. API HASH (문자열)", os.getenv("API_HASH"))
-    phone_number = ask_input("3. 내 전화번호 (예: +821012345678)", os.getenv("PHONE_NUMBER"))
-    
-    print("\n--- 봇 설정 ---")
-    source_bot = ask_input("4. 감시할 채널 ID/Username (여러 개는 콤마로 구분)", os.getenv("SOURCE_BOT_ID", "@NewListingsFeed"))
-    target_bot = ask_input("5. 매수 명령 보낼 봇 ID/Username", os.getenv("TARGET_BOT_ID", "@GMGN_bsc_bot"))
-    buy_amount = ask_input("6. 매수 금액 (BNB)", os.getenv("GMGN_BUY_AMOUNT", "0.1"))
-    
-    print("\n--- 자동 매도 설정 ---")
-    auto_sell_delay = ask_input("7. 자동 매도 대기 시간 (분)", os.getenv("AUTO_SELL_DELAY_MINUTES", "15"))
-    auto_sell_percent = ask_input("8. 자동 매도 비율 (%)", os.getenv("AUTO_SELL_PERCENT", "100"))
-    
-    print("\n--- NLF WebSocket 설정 (선택) ---")
-    nlf_enabled = ask_input("9. NLF WebSocket 사용 (true/false)", os.getenv("NLF_ENABLED", "false"))
-    nlf_api_key = ""
-    if nlf_enabled.lower() == "true":
-        nlf_api_key = ask_input("10. NLF API 키 (t.me/NLF_websocket_bot에서 발급)", os.getenv("NLF_API_KEY", ""))
-
-    # .env 파일 저장
-    with open(ENV_PATH, "w", encoding="utf-8") as f:
-        f.write("# AlphaSniper Configuration\n")
-        f.write(f"API_ID={api_id}\n")
-        f.write(f"API_HASH={api_hash}\n")
-        f.write(f"PHONE_NUMBER={phone_number}\n")
-        f.write(f"SESSION_NAME=alpha_sniper\n")
-        f.write(f"SOURCE_BOT_ID={source_bot}\n")
-        f.write(f"TARGET_BOT_ID={target_bot}\n")
-        f.write(f"GMGN_BUY_AMOUNT={buy_amount}\n")
-        f.write(f"AUTO_SELL_DELAY_MINUTES={auto_sell_delay}\n")
-        f.write(f"AUTO_SELL_PERCENT={auto_sell_percent}\n")
-        f.write(f"NLF_ENABLED={nlf_enabled}\n")
-        if nlf_api_key:
-            f.write(f"NLF_API_KEY={nlf_api_key}\n")
-    
-    print(f"\n✅ 설정이 '{ENV_PATH}' 파일에 저장되었습니다!\n")
-    return True
-
-# .env 파일 로드 전 검사
-if not os.path.exists(ENV_PATH):
-    run_setup_wizard()
-load_dotenv(ENV_PATH)
-
-# 필수 값 확인 및 재실행 유도
-required_vars = ["API_ID", "API_HASH", "SOURCE_BOT_ID", "TARGET_BOT_ID"]
-if not all(os.getenv(v) for v in required_vars):
-    print("❌ 필수 환경 변수가 누락되었습니다.")
-    run_setup_wizard()
-    load_dotenv(ENV_PATH) # 다시 로드
-
-# --- 설정 상수 ---
-# 매수량 설정 (기본값 0.1 BNB)
-GMGN_BUY_AMOUNT = float(os.getenv("GMGN_BUY_AMOUNT", "0.1")) 
-
-# 재시도 설정
-MAX_RETRIES = 3 # 메시지 전송 최대 재시도 횟수
-
-# 자동 매도 설정
-AUTO_SELL_DELAY_MINUTES = float(os.getenv("AUTO_SELL_DELAY_MINUTES", "15")) # 기본 15분
-AUTO_SELL_DELAY_SECONDS = int(AUTO_SELL_DELAY_MINUTES * 60)
-AUTO_SELL_PERCENT = float(os.getenv("AUTO_SELL_PERCENT", "100")) # 기본 100%
-
-# NLF WebSocket 설정
-NLF_API_KEY = os.getenv("NLF_API_KEY", "")  # NLF WebSocket API 키
-NLF_ENABLED = os.getenv("NLF_ENABLED", "false").lower() == "true"  # WebSocket 활성화 여부
-NLF_WS_URL = "wss://tokyo.newlistings.pro/v1/new-listings"  # NLF WebSocket URL
-
-# Binance Wallet URL 검증 및 CA 추출 정규식
-# 예: https://www.binance.com/en/binancewallet/0x97693439ea2f0ecdeb9135881e49f354656a911c/bsc
-# Binance Wallet URL 검증 및 CA 추출 정규식
-# 예: https://www.binance.com/en/binancewallet/0x97693439ea2f0ecdeb9135881e49f354656a911c/bsc
-BINANCE_URL_REGEX = r"https://www\.binance\.com/en/binancewallet/(0x[a-fA-F0-9]{40,})/bsc"
-
-# Newsbothub 포맷 정규식
-# 예: source: 0x97693439ea2f0ecdeb9135881e49f354656a911c (bsc)
-NEWSBOTHUB_SOURCE_REGEX = r"source:\s*(0x[a-fA-F0-9]{40,})\s*\(bsc\)"
-
-# --- 환경 변수 가져오기 ---
-api_id = os.getenv("API_ID")
-api_hash = os.getenv("API_HASH")
-session_name = os.getenv("SESSION_NAME", "alpha_sniper")
-source_bot_id_str = os.getenv("SOURCE_BOT_ID") # 모니터링할 채널/봇 (콤마로 구분 가능)
-target_bot_id_str = os.getenv("TARGET_BOT_ID") # 매수 명령을 보낼 봇 (예: @GMGN_bsc_bot)
-phone_number = os.getenv("PHONE_NUMBER")
-
-# 필수 환경 변수 확인 (위에서 했지만 안전장치)
-if not all([api_id, api_hash, source_bot_id_str, target_bot_id_str]):
-    raise ValueError("필수 환경 변수(API_ID, API_HASH, SOURCE_BOT_ID, TARGET_BOT_ID)가 .env 파일에 설정되지 않았습니다.")
-
-# ID 변환 (User ID 또는 Username)
-def parse_entity_id(entity_id_str):
-    try:
-        return int(entity_id_str)
-    except ValueError:
-        return entity_id_str
-
-# 다중 소스 ID 처리
-source_bot_ids = []
-if "," in source_bot_id_str:
-    for s_id in source_bot_id_str.split(","):
-        source_bot_ids.append(parse_entity_id(s_id.strip()))
-else:
-    source_bot_ids.append(parse_entity_id(source_bot_id_str))
-
-target_bot_id = parse_entity_id(target_bot_id_str)
-
-# 텔레그램 클라이언트 생성
-client = TelegramClient(session_name, int(api_id), api_hash)
-
-# --- 메시지 전송 재시도 함수 ---
-async def send_message_with_retry(target, message, command_desc, reply_to=None):
-    """지정된 대상에게 재시도 로직을 포함하여 메시지를 전송합니다."""
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            if reply_to:
-                await client.send_message(target, message, reply_to=reply_to)
-            else:
-                await client.send_message(target, message)
-            logging.info(f"봇 ('{target}')에게 {command_desc} 명령 성공: '{message}'")
-            return True
-        except Exception as e:
-            logging.error(f"{command_desc} 전송 실패 (시도 {attempt}/{MAX_RETRIES}): {e}")
-            if attempt < MAX_RETRIES:
-                await asyncio.sleep(1) # 잠시 대기
-    return False
-
-# --- 자동 매도 스케줄링 함수 ---
-async def schedule_auto_sell(ca: str, delay: int):
-    """지정된 시간 후 자동으로 매도 명령을 전송합니다."""
-    try:
-        logging.info(f"자동 매도 예약됨: {ca} ({delay}초 후)")
-        await asyncio.sleep(delay)
-        
-        sell_command = f"/sell {ca} {AUTO_SELL_PERCENT}%"
-        logging.info(f"자동 매도 실행: {sell_command}")
-        await send_message_with_retry(target_bot_id, sell_command, "자동 SELL 명령")
-    except asyncio.CancelledError:
-        logging.info(f"자동 매도 취소됨: {ca}")
-    except Exception as e:
-        logging.error(f"자동 매도 실패 ({ca}): {e}")
-
-# --- NLF WebSocket 핸들러 ---
-async def handle_nlf_websocket():
-    """NLF WebSocket에 연결하여 실시간 리스팅 정보를 수신합니다."""
-    if not NLF_ENABLED:
-        logging.info("NLF WebSocket이 비활성화되어 있습니다.")
-        return
-    
-    if not NLF_API_KEY:
-        logging.warning("NLF_API_KEY가 설정되지 않았습니다. WebSocket 연결을 건너뜁니다.")
-        return
-    
-    retry_delay = 5
-    while True:
-        try:
-            logging.info(f"NLF WebSocket 연결 중: {NLF_WS_URL}")
-            # SSL 인증서 검증 비활성화
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-            
-            # API 키를 헤더에 포함하여 연결 (NLF API 형식)
-            headers = {"authorization": f"Bearer {NLF_API_KEY}"}
-            
-            async with websockets.connect(NLF_WS_URL, ssl=ssl_context, additional_headers=headers) as websocket:
-                logging.info("NLF WebSocket 연결 성공, 메시지 수신 대기 중...")
-                
-                async for message in websocket:
-                    try:
-                        data = json.loads(message)
-                        
-                        # Binance Alpha 필터링
-                        if (data.get("exchange") == "binance" and 
-                            data.get("type") == "alpha"):
-                            
-                            # detections 배열에서 BSC 체인 찾기
-                            detections = data.get("detections", [])
-                            for detection in detections:
-                                onchain = detection.get("onchain", {})
-                                chain = onchain.get("chain")
-                                ca = onchain.get("contract")
-                                
-                                if chain == "bsc" and ca:
-                                    logging.info(f"NLF WebSocket에서 Binance Alpha BSC 발견: {ca}")
-                                    
-                                    # 중복 방지 체크
-                                    if ca in processed_cas:
-                                        logging.info(f"이미 처리된 CA입니다 (WebSocket). 건너뜁니다: {ca}")
-                                        continue
-                                    
-                                    # 매수 명령 전송
-                                    command_to_send = f"/buy {ca} {GMGN_BUY_AMOUNT}"
-                                    logging.info(f"매수 명령 전송 시도 (WebSocket): {command_to_send}")
-                                    
-                                    if await send_message_with_retry(target_bot_id, command_to_send, "BUY 명령 (WebSocket)"):
-                                        processed_cas.add(ca)
-                                        # 자동 매도 예약
-                                        asyncio.create_task(schedule_auto_sell(ca, AUTO_SELL_DELAY_SECONDS))
-                        
-                    except json.JSONDecodeError:
-                        logging.error(f"WebSocket 메시지 파싱 실패: {message}")
-                    except Exception as e:
-                        logging.error(f"WebSocket 메시지 처리 중 오류: {e}")
-                        
-        except websockets.exceptions.WebSocketException as e:
-            logging.error(f"NLF WebSocket 연결 오류: {e}")
-        except Exception as e:
-            logging.error(f"NLF WebSocket 예상치 못한 오류: {e}")
-        
-        logging.info(f"{retry_delay}초 후 재연결 시도...")
-        await asyncio.sleep(retry_delay)
-        retry_delay = min(retry_delay * 2, 60)  # 최대 60초까지 증가
-
-# --- 종료 처리 함수 ---
-async def shutdown(sig, loop):
-    logging.info(f"신호 {sig.name} 수신됨. 종료 시작...")
-    if client.is_connected():
-        await client.disconnect()
-    
-    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
-    [task.cancel() for task in tasks]
-    await asyncio.gather(*tasks, return_exceptions=True)
-    loop.stop()
-
-# --- 중복 처리 방지 셋 ---
-processed_cas = set()
-
-# --- 이벤트 핸들러 ---
-# --- 이벤트 핸들러 ---
-@client.on(events.NewMessage(chats=source_bot_ids))
-async def handler(event):
+# 다중 프로세스 모드에서 워커가 브로커로 지연 시간 메트릭을 보내는 간격 (초)
+BROKER_REPORT_SECONDS = 10
+
+
+class AlphaSniper:
+    """설정(config.Config)으로 텔레그램 클라이언트, 매수 파이프라인, 피드를 구성하고 실행합니다."""
+
+    def __init__(self, config, env_path=ENV_PATH):
+        self.config = config
+
+        # 텔레그램 클라이언트 생성
+        self.client = TelegramClient(config.session_name, int(config.api_id), config.api_hash)
+
+        # 대상 봇/소스 채널의 InputPeer 캐시 (시작 시 미리 해석, 세션 파일 옆에 저장)
+        self.peers = PeerCache(self.client, f"{config.session_name}.peers.json")
+
+        # --- 매수 파이프라인 ---
+        # 발신 큐(속도 제한, FloodWait 처리, 매수 우선) -> 주문 라우터(다중 봇) -> 자동 매도 스케줄러
+        # 확정된 CA는 세션 파일 옆의 SQLite 파일에, 예약 매도는 JSON 파일에 저장되어 재시작 후에도 유지됩니다.
+        self.dedup = DedupService(
+            store=DedupStore(f"{config.session_name}.dedup.sqlite"),
+            ttl=int(config.dedup_ttl_hours * 3600),
+            max_entries=config.dedup_max_entries,
+        )
+        exit_rules = parse_exit_rules(config.exit_rules) if config.exit_rules else None
+        price_source = load_price_source(config.price_source)
+        if exit_rules and price_source is None and any(rule.needs_price for rule in exit_rules):
+            logging.warning("PRICE_SOURCE가 설정되지 않아 TP/SL 규칙은 실행되지 않습니다 (시간 규칙만 적용).")
+        self.pipeline = build_pipeline(
+            self.peers.send,
+            config.target_bot_ids,
+            self.dedup,
+            f"{config.session_name}.sells.json",
+            buy_amount=config.buy_amount,
+            sell_delay=config.auto_sell_delay_seconds,
+            sell_percent=config.auto_sell_percent,
+            order_mode=config.order_mode,
+            hedge_delay=config.hedge_delay_ms / 1000,
+            rate=config.outbound_rate,
+            burst=config.outbound_burst,
+            buy_queue_timeout=config.buy_queue_timeout,
+            exit_rules=exit_rules,
+            price_source=price_source,
+            ledger_path=f"{config.session_name}.positions.sqlite",
+            eval_interval=config.exit_eval_interval,
+        )
+        tracker.register_section("races", self.dedup.race_summary)
+        tracker.register_section("bots", self.pipeline.router.summary)
+        tracker.register_section("outbound", self.pipeline.outbound.summary)
+        tracker.register_section("peers", self.peers.summary)
+        tracker.register_section("positions", self.pipeline.exit_engine.summary)
+
+        # 이벤트 루프 지연과 느린 콜백 감시
+        self.monitor = LoopMonitor(config.loop_monitor_interval, config.slow_callback_ms / 1000)
+        tracker.register_section("loop", self.monitor.summary)
+
+        # 매수 전 검사 (검사나 블랙리스트/화이트리스트가 설정된 경우에만)
+        checkers = load_checkers(config.pre_trade_checks)
+        blacklist, whitelist = load_ca_list(config.ca_blacklist_file), load_ca_list(config.ca_whitelist_file)
+        if checkers or blacklist or whitelist:
+            self._install_pre_trade(config, checkers, blacklist, whitelist)
+
+        # 다중 프로세스 모드: 공유 브로커로 계정 간 중복 방지와 포지션 한도 확인
+        if config.broker_address:
+            self.pipeline.broker = BrokerClient(config.broker_address, config.worker_name or config.session_name,
+                                                config.account)
+
+        # --- 이벤트 핸들러 ---
+        # 새 메시지 + 수정된 메시지 + 앨범, 채널별 사전 필터와 수신 통계
+        self.channel_filters = parse_channel_filters(config.channel_filters)
+        self.telegram_feed = register_telegram_feed(self.client, config.source_bot_ids, self.pipeline)
+        self.ingest = self.telegram_feed.ingest
+        tracker.register_section("channels", self.ingest.summary)
+
+        # 채널별 마지막 메시지 ID (재시작/재연결 후 놓친 메시지 확인용, 세션 파일 옆에 저장)
+        self.cursors = CursorStore(f"{config.session_name}.cursors.json")
+        self.cursors.load()
+        self.ingest.cursors = self.cursors
+        self.backfill = Backfill(self.client, self.ingest, self.cursors, max_age=config.backfill_max_age,
+                                 batch=config.backfill_batch)
+        tracker.register_section("backfill", self.backfill.summary)
+
+        # 매매 기록: 신호 -> 선점 -> 전송 -> 확인 -> 매도 단계를 구조화해 저장 (python journal.py로 내보내기)
+        if config.journal_enabled:
+            self.pipeline.journal = TradeJournal(f"{config.session_name}.journal", config.journal_flush_seconds)
+            tracker.register_section("journal", self.pipeline.journal.summary)
+
+        # 설정 다시 읽기 (reloader.py)
+        self.nlf_task = None
+        self.reloader = ConfigReloader(config, self.apply_config, env_path=env_path,
+                                       interval=config.config_watch_seconds)
+        tracker.register_section("config", self.reloader.summary)
+
+        # 제어 API (매수 일시 중지, 수동 매도/예약 취소, 매수 금액/감시 채널 변경)
+        self.control = ControlServer(self.pipeline, tracker, get_sources=lambda: self.config.source_bot_ids,
+                                     set_sources=self.set_sources, set_buy_amount=self.set_buy_amount,
+                                     token=config.control_token)
+
+    def bind_source_channels(self):
+        """
+        소스 채널(사용자명/ID)을 채팅 ID로 바꿔 CHANNEL_FILTERS와 놓친 메시지 확인 대상에 적용합니다.
+        워밍업으로 InputPeer를 해석한 뒤 호출합니다.
+        """
+        unknown = set(self.channel_filters) - {str(channel) for channel in self.config.source_bot_ids}
+        if unknown:
+            logging.warning(f"CHANNEL_FILTERS에 SOURCE_BOT_ID에 없는 채널이 있습니다: {', '.join(sorted(unknown))}")
+        for channel in self.config.source_bot_ids:
+            tokens = self.channel_filters.get(str(channel))
+            entity = self.peers.resolve(channel)
+            try:
+                chat_id = channel if isinstance(channel, int) else get_peer_id(entity)
+            except (TypeError, ValueError):
+                logging.warning(f"채널 ID를 확인하지 못해 기본 사전 필터를 사용하고 놓친 메시지를 확인하지 않습니다: {channel}")
+                continue
+            self.ingest.channel(chat_id).name = str(channel)
+            self.backfill.channels[chat_id] = entity
+            if tokens is not None:
+                self.ingest.set_filter(chat_id, tokens)
+                logging.info(f"채널 사전 필터: {channel} -> {' | '.join(tokens)}")
+
+    def _subscribe_sources(self, sources):
+        """감시 채널 핸들러를 다시 등록하고 사전 필터/놓친 메시지 확인 대상을 갱신합니다 (await 없음)."""
+        self.config.source_bot_ids = sources
+        self.telegram_feed.subscribe(sources)
+        self.backfill.channels.clear()
+        self.ingest.clear_filters()
+        self.bind_source_channels()
+        logging.info(f"모니터링 대상 변경: {', '.join(map(str, sources))}")
+
+    async def _after_subscribe(self):
+        await self.telegram_feed.resolve()
+        # 새 채널은 현재 위치부터 기록 (과거 메시지는 매수하지 않음)
+        await self.backfill.catch_up("sources")
+
+    async def set_sources(self, sources):
+        """재시작 없이 감시 채널을 바꿉니다 (새 채널 해석 -> 핸들러 재등록 -> 필터/놓친 메시지 확인 대상 갱신)."""
+        sources = list(sources)
+        if not sources:
+            raise ValueError("감시할 채널이 비어 있습니다.")
+        await self.peers.warm_up(sources)
+        self._subscribe_sources(sources)
+        await self._after_subscribe()
+        return sources
+
+    def _install_pre_trade(self, config, checkers, blacklist, whitelist):
+        self.pipeline.pre_trade = PreTradeFilter(
+            checkers,
+            budget=config.pre_trade_budget_ms / 1000,
+            default_allow=config.pre_trade_default != "deny",
+            blacklist=blacklist,
+            whitelist=whitelist,
+            cache=TTLCache(config.pre_trade_cache_size),
+        )
+        tracker.register_section("filter", self.pipeline.pre_trade.summary)
+
+    def set_buy_amount(self, amount):
+        """제어 API: 매수 금액을 바꿉니다 (.env는 그대로, 설정 다시 읽기에서 GMGN_BUY_AMOUNT가 바뀔 때까지 유지)."""
+        self.config.buy_amount = amount
+        self.pipeline.buy_amount = amount
+
+    def _start_nlf(self):
+        """NLF WebSocket 피드를 (다시) 시작합니다. 비활성화되어 있으면 아무것도 하지 않습니다."""
+        if self.nlf_task is not None:
+            self.nlf_task.cancel()
+            self.nlf_task = None
+        if self.config.nlf_enabled and self.config.nlf_api_key:
+            self.nlf_task = asyncio.create_task(run_nlf_feed(self.config, self.pipeline, tracker))
+        else:
+            logging.info("NLF WebSocket 비활성화 (텔레그램만 사용)")
+
+    async def apply_config(self, new, changes):
+        """
+        다시 읽은 설정(config.RELOADABLE 중 바뀐 것)을 적용합니다 (reloader.ConfigReloader의 apply).
+        실패할 수 있는 준비(파싱, 파일 읽기, 채널 해석)를 먼저 모두 끝낸 뒤, await 없이 한 번에 값을 바꿉니다.
+        """
+        pipeline = self.pipeline
+        # 1) 준비: 여기서 예외가 나면 아무것도 바뀌지 않음
+        channel_filters = parse_channel_filters(new.channel_filters)
+        exit_rules = None
+        if changes.keys() & {"exit_rules", "auto_sell_delay_seconds", "auto_sell_percent"}:
+            exit_rules = (parse_exit_rules(new.exit_rules) if new.exit_rules
+                          else [TimeExit(new.auto_sell_delay_seconds, new.auto_sell_percent)])
+        blacklist = whitelist = None
+        if changes.keys() & {"ca_blacklist_file", "ca_whitelist_file"}:
+            blacklist, whitelist = load_ca_list(new.ca_blacklist_file), load_ca_list(new.ca_whitelist_file)
+        sources_changed = "source_bot_ids" in changes
+        if sources_changed:
+            if not new.source_bot_ids:
+                raise ValueError("감시할 채널이 비어 있습니다.")
+            await self.peers.warm_up(new.source_bot_ids)
+
+        # 2) 적용 (이 사이에는 await가 없어 매수 경로는 이전 값 또는 새 값만 봄)
+        # 바뀐 설정만 적용 (제어 API로 바꾼 매수 금액 등은 다른 설정이 바뀌어도 유지)
+        for name in changes:
+            setattr(self.config, name, getattr(new, name))
+        if "buy_amount" in changes:
+            pipeline.buy_amount = new.buy_amount
+        if "order_mode" in changes:
+            pipeline.router.mode = new.order_mode
+        if "hedge_delay_ms" in changes:
+            pipeline.router.hedge_delay = new.hedge_delay_ms / 1000
+        if "backfill_max_age" in changes:
+            self.backfill.max_age = new.backfill_max_age
+        if exit_rules is not None:
+            pipeline.exit_engine.set_rules(exit_rules)
+        if pipeline.pre_trade is not None:
+            if "pre_trade_budget_ms" in changes:
+                pipeline.pre_trade.budget = new.pre_trade_budget_ms / 1000
+            if "pre_trade_default" in changes:
+                pipeline.pre_trade.default_allow = new.pre_trade_default != "deny"
+            if blacklist is not None:
+                pipeline.pre_trade.blacklist, pipeline.pre_trade.whitelist = blacklist, whitelist
+        elif blacklist or whitelist:
+            # 시작할 때 검사/목록이 없어 매수 전 검사가 꺼져 있었으면 목록만으로 새로 만듦
+            self._install_pre_trade(self.config, [], blacklist, whitelist)
+        self.channel_filters = channel_filters
+        if sources_changed:
+            self._subscribe_sources(new.source_bot_ids)
+        elif "channel_filters" in changes:
+            self.ingest.clear_filters()
+            self.bind_source_channels()
+        if any(name.startswith("nlf_") for name in changes):
+            self._start_nlf()
+
+        # 3) 후속 작업 (새 채널 필터 해석, 놓친 메시지 확인)
+        if sources_changed:
+            await self._after_subscribe()
+
+    # --- 종료 처리 함수 ---
+    async def shutdown(self, sig, loop):
+        logging.info(f"신호 {sig.name} 수신됨. 종료 시작...")
+        self.cursors.save()
+        if self.pipeline.journal is not None:
+            self.pipeline.journal.flush_sync()
+        if self.client.is_connected():
+            await self.client.disconnect()
+
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        [task.cancel() for task in tasks]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        loop.stop()
+
+    def dump_profile(self):
+        """SIGUSR1: 이벤트 루프 스레드를 PROFILE_SECONDS초 동안 샘플링해 파일로 저장합니다."""
+        path = f"{self.config.session_name}.profile.{time.strftime('%Y%m%d-%H%M%S')}.txt"
+        self.monitor.start_profile(self.config.profile_seconds, path)
+
+    async def run(self):
+        config, client, peers, pipeline = self.config, self.client, self.peers, self.pipeline
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda s=sig: asyncio.create_task(self.shutdown(s, loop)))
+        if hasattr(signal, "SIGUSR1"):  # 윈도우에는 없음
+            loop.add_signal_handler(signal.SIGUSR1, self.dump_profile)
+
+        # 이벤트 루프 감시 시작 (느린 콜백 계측은 모든 콜백에 적용)
+        self.monitor.install()
+        if config.loop_monitor_interval > 0:
+            asyncio.create_task(self.monitor.run())
+
+        logging.info("텔레그램 클라이언트 시작 중...")
+        if not config.phone_number:
+            await client.start()
+        else:
+            await client.start(phone=config.phone_number)
+
+        logging.info("텔레그램 클라이언트 시작됨.")
+        logging.info(f"모니터링 대상: {', '.join(map(str, config.source_bot_ids))}")
+        logging.info(f"매수 명령 대상: {', '.join(map(str, config.target_bot_ids))} (모드: {config.order_mode})")
+        logging.info(f"매수 금액: {config.buy_amount} BNB")
+
+        # 워밍업: 대상 봇/소스 채널 InputPeer 미리 해석, 이벤트 필터 해석, 연결 유지 핑 시작
+        peers.load()
+        await peers.warm_up(config.target_bot_ids + config.source_bot_ids)
+        self.bind_source_channels()
+        await self.telegram_feed.resolve()
+        if config.keepalive_seconds > 0:
+            asyncio.create_task(peers.keep_alive(config.keepalive_seconds))
+
+        # 발신 큐 시작 (모든 매수/매도 전송이 거쳐 감)
+        asyncio.create_task(pipeline.outbound.run())
+
+        # 이전 실행에서 매수한 CA 복원 (첫 매수 전에 미리 로드)
+        self.dedup.load()
+
+        # 대기 중이던 자동 매도 복원 및 타이머 시작 (실행 시각이 지난 매도는 즉시 실행)
+        pipeline.sell_scheduler.load()
+        asyncio.create_task(pipeline.sell_scheduler.run())
+
+        # 청산 엔진 시작 (장부의 미청산 포지션은 재시작 후에도 이어서 평가)
+        asyncio.create_task(pipeline.exit_engine.run())
+
+        # 브로커에 미청산 포지션(장부 기준)을 알리고 지연 시간 메트릭을 주기적으로 보고
+        if pipeline.broker is not None:
+            open_cas = {p.ca for p in pipeline.exit_engine.ledger.open_positions.values()}
+            await pipeline.broker.sync(sorted(open_cas), config.buy_amount)
+            asyncio.create_task(pipeline.broker.report_periodically(tracker, BROKER_REPORT_SECONDS))
+
+        # 연결이 끊겼던 동안(재시작 포함) 올라온 채널 메시지 확인: 시작 시 한 번, 이후 자동 재연결마다
+        if config.backfill_enabled:
+            self.backfill.attach(client)
+            asyncio.create_task(self.backfill.catch_up("restart"))
+            if config.backfill_interval > 0:
+                asyncio.create_task(self.backfill.run_periodically(config.backfill_interval))
+        asyncio.create_task(self.cursors.flush_periodically())
+        if pipeline.journal is not None:
+            asyncio.create_task(pipeline.journal.run())
+
+        # NLF WebSocket 시작 (활성화된 경우에만 websockets 로드)
+        self._start_nlf()
+
+        # 설정 다시 읽기: .env 변경 감지와 SIGHUP (연결을 유지한 채 바뀐 설정만 적용)
+        if hasattr(signal, "SIGHUP"):  # 윈도우에는 없음
+            loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.create_task(self.reloader.reload("SIGHUP")))
+        if config.config_watch_seconds > 0:
+            asyncio.create_task(self.reloader.run())
+
+        # 제어 API / 대시보드 (로컬 전용)
+        if config.control_address:
+            await self.control.serve(config.control_address)
+
+        # 지연 시간 계측 출력
+        if config.metrics_port:
+            await tracker.serve_metrics("127.0.0.1", config.metrics_port)
+        if config.metrics_dump_seconds > 0:
+            asyncio.create_task(tracker.dump_periodically(config.metrics_dump_seconds))
+
+        logging.info(f"매수 준비 완료: 시작 후 {(time.perf_counter() - _STARTED) * 1000:.0f}ms")
+        logging.info("종료하려면 Ctrl+C를 누르세요...")
+
+        await client.disconnected
+
+
+def startup_check():
     """
-    NewListingsFeed 또는 Newsbothub로부터 새 메시지를 받았을 때 실행되는 핸들러
-    1. Binance Wallet URL (NewListingsFeed 스타일)
-    2. 'Binance alpha' 키워드 + 'source: ... (bsc)' (Newsbothub 스타일)
-    위 패턴을 찾아 CA를 추출하고 매수 명령을 전송합니다.
+    --startup-check: 모든 모듈을 불러온 뒤 소요 시간을 출력하고 바로 종료합니다.
+    build_executable.py --measure가 실행 파일의 콜드 스타트 시간을 잴 때 사용합니다.
     """
-    message_text = event.message.text
-    sender_id = event.sender_id
-    
-    # logging.info(f"메시지 수신 ({sender_id}):\n{message_text}") # 디버그용 로그
-    
-    extracted_ca = None
-
-    # 1. Binance Wallet URL 매칭 확인 (우선순위 1)
-    url_match = re.search(BINANCE_URL_REGEX, message_text)
-    if url_match:
-        extracted_ca = url_match.group(1)
-        logging.info(f"패턴1(Binance URL) 발견! 추출된 CA: {extracted_ca}")
-
-    # 2. Newsbothub 스타일 확인 (우선순위 2 - URL 매칭 실패 시)
-    if not extracted_ca:
-        # 'live on Binance alpha' 키워드가 있는지 확인 (대소문자 무시)
-        if "live on Binance alpha" in message_text.lower():
-            source_match = re.search(NEWSBOTHUB_SOURCE_REGEX, message_text, re.IGNORECASE)
-            if source_match:
-                extracted_ca = source_match.group(1)
-                logging.info(f"패턴2(Newsbothub/live on Binance alpha) 발견! 추출된 CA: {extracted_ca}")
-
-    if extracted_ca:
-        # 중복 방지 체크
-        if extracted_ca in processed_cas:
-            logging.info(f"이미 처리된 CA입니다. 건너뜁니다: {extracted_ca}")
-            return
-            
-        # 매수 명령 구성 (/buy [CA] [Amount])
-        command_to_send = f"/buy {extracted_ca} {GMGN_BUY_AMOUNT}"
-        
-        logging.info(f"매수 명령 전송 시도: {command_to_send}")
-        if await send_message_with_retry(target_bot_id, command_to_send, "BUY 명령"):
-            processed_cas.add(extracted_ca)
-            # 자동 매도 예약
-            asyncio.create_task(schedule_auto_sell(extracted_ca, AUTO_SELL_DELAY_SECONDS))
-    else:
-        # logging.info("유효한 CA 패턴을 찾지 못했습니다.")
-        pass
+    print(json.dumps({"import_ms": round((time.perf_counter() - _STARTED) * 1000, 1)}))
 
-async def main():
-    loop = asyncio.get_running_loop()
-    for sig in (signal.SIGINT, signal.SIGTERM):
-        loop.add_signal_handler(sig, lambda s=sig: asyncio.create_task(shutdown(s, loop)))
-
-    logging.info("텔레그램 클라이언트 시작 중...")
-    if not phone_number:
-        await client.start()
-    else:
-        await client.start(phone=phone_number)
-
-    logging.info("텔레그램 클라이언트 시작됨.")
-    logging.info(f"모니터링 대상: {', '.join(map(str, source_bot_ids))}")
-    logging.info(f"매수 명령 대상: {target_bot_id}")
-    logging.info(f"매수 금액: {GMGN_BUY_AMOUNT} BNB")
-    
-    # NLF WebSocket 시작
-    if NLF_ENABLED and NLF_API_KEY:
-        logging.info(f"NLF WebSocket 활성화: {NLF_WS_URL}")
-        asyncio.create_task(handle_nlf_websocket())
-    else:
-        logging.info("NLF WebSocket 비활성화 (텔레그램만 사용)")
-    
-    logging.info("종료하려면 Ctrl+C를 누르세요...")
-
-    await client.disconnected
 
-if __name__ == '__main__':
+def main():
+    if "--startup-check" in sys.argv:
+        startup_check()
+        return
+    # 로그 출력은 별도 스레드에서 (매수 경로의 logging 호출이 콘솔 I/O로 막히지 않도록)
+    setup_queue_logging()
+    if "--supervisor" in sys.argv:
+        from supervisor import run_supervisor
+        index = sys.argv.index("--supervisor") + 1
+        run_supervisor(sys.argv[index] if index < len(sys.argv) else "workers.json")
+        return
+    # 워커 프로세스는 설정 마법사를 실행하지 않음 (입력 대기 방지)
+    app = AlphaSniper(load_config(interactive="ALPHASNIPER_WORKER" not in os.environ))
     try:
-        asyncio.run(main())
+        asyncio.run(app.run())
     except (KeyboardInterrupt, SystemExit):
         pass
     except Exception as e:
-        logging.critical(f"예상치 못한 오류: {e}", exc_info=True)
\ No newline at end of file
+        logging.critical(f"예상치 못한 오류: {e}", exc_info=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""이벤트 루프 상태 감시: 루프 지연과 느린 콜백 측정, 요청 시 스택 샘플링 프로파일, 로그 출력 스레드 분리."""
+import sys
+import time
+import queue
+import atexit
+import asyncio
+import logging
+import threading
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+
+from latency import RollingHistogram
+
+# 느린 콜백 통계에 보관할 최대 항목 수 (이름별)
+MAX_SLOW_ENTRIES = 256
+
+
+def describe_callback(handle):
+    """이벤트 루프 Handle이 실행하는 코루틴/함수 이름 (태스크 단계면 코루틴의 qualname)"""
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", None) or repr(coro)
+    return getattr(callback, "__qualname__", None) or repr(callback)
+
+
+class LoopMonitor:
+    """
+    이벤트 루프 지연(interval마다 깨어난 시각의 늦음)과 slow_threshold초 이상 걸린 콜백을 기록합니다.
+    콜백 계측은 asyncio.Handle._run을 감싸 구현하며, install()/uninstall()로 켜고 끕니다.
+    """
+
+    def __init__(self, interval=0.1, slow_threshold=0.05, window=4096, clock=time.perf_counter):
+        self.interval = interval
+        self.slow_threshold = slow_threshold  # 0이면 콜백 계측 비활성화
+        self._clock = clock
+        self.lag = RollingHistogram(window)
+        self.max_lag_ms = 0.0
+        self.slow = {}  # 코루틴/함수 이름 -> [횟수, 최대 ms, 합계 ms]
+        self.slow_total = 0
+        self.profiler = None
+        self._original_run = None
+
+    # --- 느린 콜백 계측 ---
+    def install(self):
+        if self._original_run is not None or self.slow_threshold <= 0:
+            return
+        original = self._original_run = asyncio.Handle._run
+        clock, monitor = self._clock, self
+
+        def _run(handle):
+            started = clock()
+            try:
+                original(handle)
+            finally:
+                elapsed = clock() - started
+                if elapsed >= monitor.slow_threshold:
+                    monitor.record_slow(describe_callback(handle), elapsed)
+
+        asyncio.Handle._run = _run
+
+    def uninstall(self):
+        if self._original_run is not None:
+            asyncio.Handle._run = self._original_run
+            self._original_run = None
+
+    def record_slow(self, name, elapsed):
+        elapsed_ms = elapsed * 1000
+        self.slow_total += 1
+        entry = self.slow.get(name)
+        if entry is None:
+            if len(self.slow) >= MAX_SLOW_ENTRIES:
+                name = "(기타)"
+                entry = self.slow.setdefault(name, [0, 0.0, 0.0])
+            else:
+                entry = self.slow[name] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] = max(entry[1], elapsed_ms)
+        entry[2] += elapsed_ms
+        logging.warning(f"느린 콜백: {name} {elapsed_ms:.1f}ms 동안 이벤트 루프 점유")
+
+    # --- 루프 지연 측정 ---
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - started - self.interval) * 1000)
+            self.lag.record(lag_ms)
+            if lag_ms > self.max_lag_ms:
+                self.max_lag_ms = lag_ms
+
+    # --- 프로파일 ---
+    def start_profile(self, duration, path, thread_id=None):
+        """duration초 동안 이벤트 루프 스레드를 샘플링해 path에 저장합니다 (이미 실행 중이면 무시)."""
+        if self.profiler is not None and self.profiler.running:
+            logging.info("프로파일 수집이 이미 진행 중입니다.")
+            return None
+        self.profiler = SamplingProfiler(thread_id or threading.get_ident())
+        self.profiler.start(duration, path)
+        logging.info(f"프로파일 수집 시작: {duration:g}초 -> {path}")
+        return self.profiler
+
+    def summary(self):
+        slowest = sorted(self.slow.items(), key=lambda item: item[1][2], reverse=True)[:10]
+        return {
+            "lag_ms": self.lag.summary(),
+            "max_lag_ms": round(self.max_lag_ms, 3),
+            "slow_callbacks": self.slow_total,
+            "slowest": {
+                name: {"count": count, "max_ms": round(max_ms, 1), "total_ms": round(total_ms, 1)}
+                for name, (count, max_ms, total_ms) in slowest
+            },
+        }
+
+
+class SamplingProfiler:
+    """다른 스레드에서 대상 스레드의 호출 스택을 interval초마다 샘플링합니다."""
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # 'module:func;module:func' (바깥 -> 안쪽) -> 샘플 수
+        self.samples = 0
+        self.running = False
+        self._thread = None
+
+    @staticmethod
+    def collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is not None:
+            self.stacks[self.collapse(frame)] += 1
+            self.samples += 1
+
+    def top(self, limit=15):
+        """가장 많이 샘플링된 가장 안쪽 함수 (self time 기준)"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _collect(self, duration, path):
+        deadline = time.monotonic() + duration
+        try:
+            while time.monotonic() < deadline:
+                self.sample()
+                time.sleep(self.interval)
+            self.write(path)
+            lines = [f"  {count * 100 / max(1, self.samples):5.1f}%  {name}" for name, count in self.top()]
+            logging.info(f"프로파일 저장됨: {path} (샘플 {self.samples}개)\n" + "\n".join(lines))
+        except Exception as e:
+            logging.error(f"프로파일 수집 실패: {e}")
+        finally:
+            self.running = False
+
+    def start(self, duration, path):
+        self.running = True
+        self._thread = threading.Thread(target=self._collect, args=(duration, path), name="profiler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def setup_queue_logging():
+    """
+    루트 로거의 출력 핸들러를 QueueListener 스레드로 옮깁니다.
+    이벤트 루프에서의 logging 호출은 큐에 넣기만 하므로 콘솔/파일 I/O로 막히지 않습니다.
+    """
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return None
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    listener.start()
+
+    def flush():
+        if listener._thread is not None:  # 이미 stop()된 경우 제외
+            listener.stop()  # 종료 시 남은 로그 출력
+
+    atexit.register(flush)
+    return listener
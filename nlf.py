@@ -0,0 +1,283 @@
+import json
+import time
+import asyncio
+import logging
+
+# --- JSON 백엔드 (orjson > msgspec > 표준 json 순으로 사용) ---
+try:
+    import orjson
+
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+
+        JSON_BACKEND = "msgspec"
+        _decoder = msgspec.json.Decoder()
+
+        def _loads(raw):
+            try:
+                return _decoder.decode(raw)
+            except msgspec.DecodeError as e:
+                raise ValueError(str(e)) from e
+    except ImportError:
+        JSON_BACKEND = "json"
+        _loads = json.loads
+
+# 바이트 단위 사전 필터: 이 토큰이 모두 있는 프레임만 JSON 파싱합니다.
+# (exchange == "binance", type == "alpha", chain == "bsc" 조건의 필요 조건)
+PREFILTER_TOKENS = ("binance", "alpha", "bsc")
+_PREFILTER_BYTES = tuple(t.encode() for t in PREFILTER_TOKENS)
+
+
+class Detection:
+    """NLF 리스팅 프레임의 온체인 감지 정보 하나"""
+
+    __slots__ = ("chain", "contract")
+
+    def __init__(self, chain, contract):
+        self.chain = chain
+        self.contract = contract
+
+    def __repr__(self):
+        return f"Detection(chain={self.chain!r}, contract={self.contract!r})"
+
+
+class Listing:
+    """Binance Alpha 리스팅 프레임 (디코딩 결과)"""
+
+    __slots__ = ("exchange", "type", "detections", "received_at", "decode_ms")
+
+    def __init__(self, exchange, type, detections, received_at, decode_ms):
+        self.exchange = exchange
+        self.type = type
+        self.detections = detections  # Detection 튜플
+        self.received_at = received_at  # 수신 시각 (perf_counter)
+        self.decode_ms = decode_ms  # 사전 필터 + 파싱에 걸린 시간
+
+    def bsc_contracts(self):
+        return [d.contract for d in self.detections if d.chain == "bsc" and d.contract]
+
+
+def prefilter(raw):
+    """파싱 없이 관련 없는 프레임을 걸러냅니다. 매수 대상일 가능성이 있으면 True."""
+    tokens = _PREFILTER_BYTES if isinstance(raw, (bytes, bytearray, memoryview)) else PREFILTER_TOKENS
+    for token in tokens:
+        if token not in raw:
+            return False
+    return True
+
+
+def decode_frame(raw, received_at=None, prefiltered=False):
+    """
+    NLF 프레임을 디코딩합니다. Binance Alpha 리스팅이 아니면 None을 반환합니다.
+    JSON이 잘못된 경우 ValueError를 발생시킵니다.
+    호출한 쪽에서 이미 prefilter()를 통과시켰다면 prefiltered=True로 중복 검사를 건너뜁니다.
+    """
+    start = time.perf_counter()
+    if received_at is None:
+        received_at = start
+    if not prefiltered and not prefilter(raw):
+        return None
+
+    data = _loads(raw)
+    if not isinstance(data, dict):
+        return None
+    # Binance Alpha 필터링
+    if data.get("exchange") != "binance" or data.get("type") != "alpha":
+        return None
+
+    detections = []
+    for detection in data.get("detections") or ():
+        onchain = detection.get("onchain") or {}
+        detections.append(Detection(onchain.get("chain"), onchain.get("contract")))
+    return Listing(
+        data["exchange"], data["type"], tuple(detections), received_at,
+        (time.perf_counter() - start) * 1000,
+    )
+
+
+# --- 다중 연결 관리 ---
+class NLFLink:
+    """NLF WebSocket 연결 하나의 상태 (핑 지연, 수신 수, 재연결 횟수)"""
+
+    __slots__ = ("index", "url", "connected", "rtt_ms", "frames", "first", "reconnects", "backoff",
+                 "last_frame", "last_error")
+
+    def __init__(self, index, url, backoff):
+        self.index = index
+        self.url = url
+        self.connected = False
+        self.rtt_ms = None  # 핑/퐁 지연 EWMA
+        self.frames = 0
+        self.first = 0  # 다른 연결보다 먼저 받은 (중복 제거 후 처리된) 프레임 수
+        self.reconnects = 0
+        self.backoff = backoff
+        self.last_frame = None
+        self.last_error = None
+
+    @property
+    def name(self):
+        return f"{self.url}#{self.index}"
+
+    def summary(self):
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "rtt_ms": round(self.rtt_ms, 2) if self.rtt_ms is not None else None,
+            "frames": self.frames,
+            "first": self.first,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
+
+
+class NLFConnectionManager:
+    """
+    NLF WebSocket에 여러 개의 연결(여러 지역 엔드포인트 가능)을 동시에 유지하는 핫 스탠바이 관리자.
+    - 모든 연결이 프레임을 받고, 가장 먼저 도착한 프레임만 on_frame으로 전달합니다 (연결 간 중복 제거).
+    - 핑/퐁으로 연결별 지연을 측정하고, 응답이 없는 연결은 즉시 끊고 재연결합니다.
+    - 재연결 대기는 짧게 시작해 두 배씩 늘어나며, 연결에 성공하면 초기값으로 돌아갑니다.
+    - 연결된 링크 중 핑 지연이 가장 낮은 링크를 주 링크(primary)로 표시합니다.
+    on_frame(raw, source, received_at)은 동기 함수여야 합니다 (예: Pipeline.submit_nlf_frame).
+    on_frame에는 prefilter()를 통과한 프레임만 전달되므로 받는 쪽에서 다시 거를 필요가 없습니다.
+    """
+
+    def __init__(self, urls, on_frame, connections_per_url=2, connect=None, connect_kwargs=None,
+                 ping_interval=5.0, ping_timeout=3.0, backoff_initial=0.5, backoff_max=10.0,
+                 dedup_window=30.0, dedup_max=4096, clock=time.monotonic):
+        if connect is None:
+            import websockets
+            connect = websockets.connect
+        self.on_frame = on_frame
+        self.links = [
+            NLFLink(i, url, backoff_initial)
+            for url in urls
+            for i in range(connections_per_url)
+        ]
+        self._connect = connect
+        # 핑은 직접 보내므로 라이브러리 내장 keepalive는 끄고, 종료 대기는 짧게
+        self._connect_kwargs = {"ping_interval": None, "close_timeout": 1, **(connect_kwargs or {})}
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.dedup_window = dedup_window
+        self.dedup_max = dedup_max
+        self._clock = clock
+        self._seen = {}  # 최근 프레임(bytes) -> 처음 받은 시각 (삽입 순서 = 시간 순서)
+        self.duplicates = 0
+        self._primary = None
+
+    # --- 프레임 처리 ---
+    def _on_raw(self, link, raw, received_at):
+        link.frames += 1
+        link.last_frame = self._clock()
+        # 매수 대상이 될 수 없는 프레임은 중복 검사 없이 버림
+        if not prefilter(raw):
+            return
+        if isinstance(raw, str):
+            raw = raw.encode()
+        now = link.last_frame
+        seen = self._seen
+        if raw in seen:
+            self.duplicates += 1
+            return
+        # 오래된 기록 정리 (가장 오래된 것부터)
+        while seen:
+            oldest, ts = next(iter(seen.items()))
+            if now - ts <= self.dedup_window and len(seen) < self.dedup_max:
+                break
+            del seen[oldest]
+        seen[raw] = now
+        link.first += 1
+        self.on_frame(raw, link.url, received_at)
+
+    # --- 연결 상태 ---
+    @property
+    def primary(self):
+        """연결된 링크 중 핑 지연이 가장 낮은 링크 (측정 전이면 먼저 연결된 링크)"""
+        healthy = [link for link in self.links if link.connected]
+        if not healthy:
+            return None
+        return min(healthy, key=lambda link: (link.rtt_ms is None, link.rtt_ms or 0.0, link.index))
+
+    def _update_primary(self):
+        primary = self.primary
+        if primary is not self._primary:
+            self._primary = primary
+            if primary is not None:
+                logging.info(f"NLF 주 링크 변경: {primary.name} (핑 {primary.rtt_ms or 0:.1f}ms)")
+            else:
+                logging.warning("NLF WebSocket 연결이 모두 끊겼습니다.")
+
+    async def _keepalive(self, link, websocket):
+        """핑/퐁 지연을 측정합니다. 응답이 없으면 TimeoutError로 연결을 끊습니다."""
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            sent = time.perf_counter()
+            pong = await websocket.ping()
+            # wait_for는 퐁 도착과 취소가 겹치면 취소를 삼킬 수 있어 (Python 3.11) wait로 기다림
+            done, _ = await asyncio.wait({pong}, timeout=self.ping_timeout)
+            if not done:
+                pong.cancel()
+                raise asyncio.TimeoutError(f"{self.ping_timeout}초 동안 퐁 응답 없음")
+            rtt = (time.perf_counter() - sent) * 1000
+            link.rtt_ms = rtt if link.rtt_ms is None else link.rtt_ms * 0.7 + rtt * 0.3
+            self._update_primary()
+
+    async def _receive(self, link, websocket):
+        # 프레임은 bytes 그대로 받아 사전 필터링 (UTF-8 디코딩 생략)
+        while True:
+            raw = await websocket.recv(decode=False)
+            self._on_raw(link, raw, time.perf_counter())
+
+    async def _session(self, link, websocket):
+        receiver = asyncio.create_task(self._receive(link, websocket))
+        pinger = asyncio.create_task(self._keepalive(link, websocket))
+        try:
+            done, _ = await asyncio.wait({receiver, pinger}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            receiver.cancel()
+            pinger.cancel()
+        for task in done:
+            task.result()  # 연결 종료 원인(예외)을 그대로 전달
+
+    async def run_link(self, link):
+        """링크 하나를 계속 연결 상태로 유지합니다."""
+        while True:
+            try:
+                logging.info(f"NLF WebSocket 연결 중: {link.name}")
+                async with self._connect(link.url, **self._connect_kwargs) as websocket:
+                    link.connected = True
+                    link.backoff = self.backoff_initial  # 연결 성공 시 대기 시간 초기화
+                    logging.info(f"NLF WebSocket 연결 성공: {link.name}")
+                    self._update_primary()
+                    await self._session(link, websocket)
+            except Exception as e:
+                link.last_error = f"{type(e).__name__}: {e}"
+                logging.error(f"NLF WebSocket 연결 오류 ({link.name}): {link.last_error}")
+            finally:
+                if link.connected:
+                    link.connected = False
+                    link.rtt_ms = None
+                    self._update_primary()
+
+            link.reconnects += 1
+            logging.info(f"{link.backoff:.1f}초 후 재연결 시도: {link.name}")
+            await asyncio.sleep(link.backoff)
+            link.backoff = min(link.backoff * 2, self.backoff_max)
+
+    async def run(self):
+        """모든 링크를 동시에 실행합니다."""
+        await asyncio.gather(*(self.run_link(link) for link in self.links))
+
+    def summary(self):
+        primary = self.primary
+        return {
+            "primary": primary.name if primary else None,
+            "connected": sum(1 for link in self.links if link.connected),
+            "duplicates": self.duplicates,
+            "links": {link.name: link.summary() for link in self.links},
+        }
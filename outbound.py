@@ -0,0 +1,190 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+
+from telethon.errors import FloodWaitError
+
+from latency import RollingHistogram
+
+# 우선순위 (낮을수록 먼저 전송)
+PRIORITY_BUY = 0
+PRIORITY_SELL = 10
+PRIORITY_NAMES = {PRIORITY_BUY: "buy", PRIORITY_SELL: "sell"}
+
+
+class TokenBucket:
+    """초당 rate개, 최대 burst개까지 모아 둘 수 있는 토큰 버킷 (rate <= 0이면 제한 없음)"""
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self.tokens = float(self.burst)
+        self._last = clock()
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait_time(self, now=None):
+        """토큰 하나를 쓸 수 있을 때까지 기다려야 하는 시간 (초)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(self._clock() if now is None else now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        if self.rate <= 0:
+            return
+        self._refill(self._clock() if now is None else now)
+        self.tokens -= 1
+
+
+class OutboundItem:
+    __slots__ = ("priority", "seq", "target", "message", "kwargs", "future", "enqueued", "deadline", "timer")
+
+    def __init__(self, priority, seq, target, message, kwargs, future, enqueued, deadline):
+        self.priority = priority
+        self.seq = seq
+        self.target = target
+        self.message = message
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued = enqueued
+        self.deadline = deadline
+        self.timer = None  # 큐에서 기다리는 동안의 기한 타이머 (전송을 시작하면 취소)
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class OutboundQueue:
+    """
+    모든 발신 메시지(매수, 자동 매도)가 거쳐 가는 단일 전송 큐.
+    - 토큰 버킷으로 계정 전체의 전송 속도를 제한합니다.
+    - FloodWaitError를 받으면 안내된 시간 동안 모든 전송을 멈추고, 해당 메시지를 큐 앞쪽에 다시 넣습니다.
+    - 매수(PRIORITY_BUY)가 매도(PRIORITY_SELL)보다 먼저 전송됩니다.
+    전송 자체는 별도 태스크로 실행되므로 느린 전송이 다음 메시지를 막지 않습니다.
+    """
+
+    def __init__(self, send, rate=5.0, burst=5, clock=time.monotonic):
+        self._send = send  # async def send(target, message, **kwargs)
+        self._clock = clock
+        self.bucket = TokenBucket(rate, burst, clock)
+        self._heap = []
+        self._seq = itertools.count()
+        self._ready = asyncio.Event()
+        self._inflight = set()
+        self.flood_until = 0.0
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0.0
+        self.sent = 0
+        self.expired = 0
+        self._waits = {}
+
+    def depth(self, priority=None):
+        if priority is None:
+            return len(self._heap)
+        return sum(1 for item in self._heap if item.priority == priority)
+
+    async def submit(self, target, message, priority=PRIORITY_SELL, timeout=None, **kwargs):
+        """메시지를 큐에 넣고 전송이 끝날 때까지 기다립니다. timeout초 안에 전송을 시작하지 못하면 TimeoutError."""
+        now = self._clock()
+        item = OutboundItem(
+            priority, next(self._seq), target, message, kwargs,
+            asyncio.get_running_loop().create_future(), now,
+            now + timeout if timeout is not None else None,
+        )
+        heapq.heappush(self._heap, item)
+        self._ready.set()
+        if timeout is not None:
+            item.future.add_done_callback(lambda _: self._disarm(item))
+            self._arm(item)
+        return await item.future
+
+    def _arm(self, item):
+        """FloodWait/속도 제한으로 전송 루프가 대기 중이어도 큐에 있는 메시지는 기한에 맞춰 바로 실패 처리"""
+        if item.deadline is not None and not item.future.done():
+            delay = max(0.0, item.deadline - self._clock())
+            item.timer = asyncio.get_running_loop().call_later(delay, self._expire, item)
+
+    @staticmethod
+    def _disarm(item):
+        if item.timer is not None:
+            item.timer.cancel()
+            item.timer = None
+
+    def _expire(self, item):
+        if not item.future.done():
+            self.expired += 1
+            item.future.set_exception(asyncio.TimeoutError(f"전송 대기 시간 초과 ({item.target}): {item.message}"))
+
+    async def run(self):
+        """큐에서 우선순위가 가장 높은 메시지를 꺼내 속도 제한에 맞춰 전송하는 루프"""
+        while True:
+            if not self._heap:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            now = self._clock()
+            wait = max(self.flood_until - now, self.bucket.wait_time(now))
+            if wait > 0:
+                # 대기 중 더 높은 우선순위 메시지가 들어와도 대기 후 다시 고르므로 순서가 보장됩니다.
+                await asyncio.sleep(wait)
+                continue
+
+            item = heapq.heappop(self._heap)
+            if item.future.done():
+                continue  # 요청자가 취소함
+            if item.deadline is not None and now > item.deadline:
+                self._expire(item)
+                continue
+            # 전송을 시작한 메시지는 기한이 지나도 실패 처리하지 않음 (이미 전달됐을 수 있음)
+            self._disarm(item)
+
+            self.bucket.take(now)
+            self._wait_hist(item.priority).record((now - item.enqueued) * 1000)
+            task = asyncio.create_task(self._deliver(item))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    def _wait_hist(self, priority):
+        hist = self._waits.get(priority)
+        if hist is None:
+            hist = self._waits[priority] = RollingHistogram()
+        return hist
+
+    async def _deliver(self, item):
+        try:
+            result = await self._send(item.target, item.message, **item.kwargs)
+        except FloodWaitError as e:
+            self.flood_waits += 1
+            self.flood_wait_seconds += e.seconds
+            self.flood_until = max(self.flood_until, self._clock() + e.seconds)
+            logging.warning(f"FloodWait: {e.seconds}초 동안 전송 중지 후 재전송합니다 ({item.target}: {item.message})")
+            if not item.future.done():
+                heapq.heappush(self._heap, item)  # 같은 seq로 다시 넣어 순서 유지
+                self._arm(item)  # 다시 큐에서 기다리므로 남은 기한으로 타이머 재설정
+                self._ready.set()
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+        else:
+            self.sent += 1
+            if not item.future.done():
+                item.future.set_result(result)
+
+    def summary(self):
+        return {
+            "depth": {PRIORITY_NAMES.get(p, str(p)): self.depth(p) for p in PRIORITY_NAMES},
+            "wait_ms": {PRIORITY_NAMES.get(p, str(p)): h.summary() for p, h in self._waits.items()},
+            "sent": self.sent,
+            "expired": self.expired,
+            "flood_waits": self.flood_waits,
+            "flood_wait_seconds": self.flood_wait_seconds,
+            "flood_blocked_for": round(max(0.0, self.flood_until - self._clock()), 3),
+        }
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+
+from telethon.tl.functions import PingRequest
+from telethon.tl.types import InputPeerUser, InputPeerChannel, InputPeerChat, InputPeerSelf
+
+from latency import RollingHistogram
+
+# 직렬화 가능한 InputPeer 타입
+_PEER_TYPES = {cls.__name__: cls for cls in (InputPeerUser, InputPeerChannel, InputPeerChat, InputPeerSelf)}
+
+
+def peer_to_dict(peer):
+    data = peer.to_dict()
+    if data.get("_") not in _PEER_TYPES:
+        return None
+    return data
+
+
+def peer_from_dict(data):
+    data = dict(data)
+    cls = _PEER_TYPES[data.pop("_")]
+    return cls(**data)
+
+
+class PeerCache:
+    """
+    대상 봇/소스 채널의 InputPeer를 시작 시 미리 해석해 메모리와 파일(<세션>.peers.json)에 보관합니다.
+    전송 시 '@GMGN_bsc_bot' 같은 사용자명 대신 캐시된 InputPeer를 사용하므로,
+    첫 매수에서도 사용자명 해석(세션 DB 조회 또는 ResolveUsername 요청)을 거치지 않습니다.
+    첫 전송과 이후 전송의 소요 시간을 따로 기록해 콜드 스타트 비용을 확인할 수 있습니다.
+    """
+
+    def __init__(self, client, path=None, clock=time.perf_counter):
+        self.client = client
+        self.path = path
+        self._clock = clock
+        self._peers = {}  # str(entity) -> InputPeer
+        self.first_send_ms = None
+        self.send_ms = RollingHistogram()  # 첫 전송 이후의 전송 시간
+        self.keepalive_ms = RollingHistogram()  # 연결 유지 핑 왕복 시간
+        self.warm_up_ms = None
+
+    # --- 저장/복원 ---
+    def load(self):
+        """저장된 InputPeer를 불러옵니다. 불러온 개수를 반환합니다."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            for key, peer in data.items():
+                self._peers[key] = peer_from_dict(peer)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.error(f"InputPeer 캐시 파일 읽기 실패 ({self.path}): {e}")
+            return 0
+        return len(self._peers)
+
+    def _save(self):
+        if not self.path:
+            return
+        data = {}
+        for key, peer in self._peers.items():
+            serialized = peer_to_dict(peer)
+            if serialized is not None:
+                data[key] = serialized
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.error(f"InputPeer 캐시 파일 저장 실패 ({self.path}): {e}")
+
+    # --- 해석 ---
+    def resolve(self, entity):
+        """캐시된 InputPeer가 있으면 반환하고, 없으면 entity를 그대로 반환합니다."""
+        return self._peers.get(str(entity), entity)
+
+    def __contains__(self, entity):
+        return str(entity) in self._peers
+
+    async def warm_up(self, entities):
+        """
+        캐시에 없는 엔티티를 해석해 저장하고, 연결을 한 번 왕복시켜 세션을 데웁니다.
+        해석에 실패한 엔티티는 전송 시 원래 값(사용자명/ID)으로 해석됩니다.
+        """
+        started = self._clock()
+        resolved = 0
+        for entity in entities:
+            key = str(entity)
+            if key in self._peers:
+                continue
+            try:
+                self._peers[key] = await self.client.get_input_entity(entity)
+                resolved += 1
+            except Exception as e:
+                logging.warning(f"엔티티 해석 실패 ({entity}): {e}")
+        if resolved:
+            self._save()
+        await self.ping()
+        self.warm_up_ms = (self._clock() - started) * 1000
+        logging.info(f"엔티티 캐시 준비 완료: {len(self._peers)}개 (새로 해석 {resolved}개, {self.warm_up_ms:.1f}ms)")
+
+    # --- 전송 / 연결 유지 ---
+    async def send(self, target, message, **kwargs):
+        """캐시된 InputPeer로 메시지를 전송합니다 (outbound.OutboundQueue의 send 함수로 사용)."""
+        started = self._clock()
+        result = await self.client.send_message(self.resolve(target), message, **kwargs)
+        elapsed = (self._clock() - started) * 1000
+        if self.first_send_ms is None:
+            self.first_send_ms = elapsed
+            logging.info(f"첫 전송 소요 시간: {elapsed:.1f}ms")
+        else:
+            self.send_ms.record(elapsed)
+        return result
+
+    async def ping(self):
+        """MTProto 핑을 한 번 보내고 왕복 시간(ms)을 기록합니다."""
+        started = self._clock()
+        try:
+            await self.client(PingRequest(ping_id=random.getrandbits(63)))
+        except Exception as e:
+            logging.warning(f"연결 유지 핑 실패: {e}")
+            return None
+        rtt = (self._clock() - started) * 1000
+        self.keepalive_ms.record(rtt)
+        return rtt
+
+    async def keep_alive(self, interval):
+        """interval초마다 핑을 보내 연결을 유지합니다."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.ping()
+
+    def summary(self):
+        return {
+            "cached": len(self._peers),
+            "warm_up_ms": round(self.warm_up_ms, 3) if self.warm_up_ms is not None else None,
+            "first_send_ms": round(self.first_send_ms, 3) if self.first_send_ms is not None else None,
+            "send_ms": self.send_ms.summary(),
+            "keepalive_ms": self.keepalive_ms.summary(),
+        }
@@ -0,0 +1,275 @@
+import time
+import asyncio
+import logging
+
+import nlf
+import journal
+from latency import tracker as default_tracker
+from extractors import extract_all_cas
+from router import OrderRouter
+from outbound import OutboundQueue, PRIORITY_BUY, PRIORITY_SELL
+from scheduler import SellScheduler
+from positions import ExitEngine, PositionLedger, TimeExit, DEFAULT_EVAL_INTERVAL
+
+# 재시도 설정
+MAX_RETRIES = 3 # 메시지 전송 최대 재시도 횟수
+
+
+# --- 메시지 전송 재시도 함수 ---
+async def send_message_with_retry(outbound, target, message, command_desc, reply_to=None, trace=None,
+                                  priority=PRIORITY_SELL):
+    """지정된 대상에게 재시도 로직을 포함하여 메시지를 전송합니다. FloodWait는 발신 큐가 처리합니다."""
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            if trace:
+                trace.mark(f"send_{attempt}")
+            if reply_to:
+                await outbound.submit(target, message, priority, reply_to=reply_to)
+            else:
+                await outbound.submit(target, message, priority)
+            if trace:
+                trace.mark("ack")
+                logging.info(f"봇 ('{target}')에게 {command_desc} 명령 성공: '{message}' (수신 후 {trace.elapsed_ms('ack'):.1f}ms)")
+            else:
+                logging.info(f"봇 ('{target}')에게 {command_desc} 명령 성공: '{message}'")
+            return True
+        except Exception as e:
+            logging.error(f"{command_desc} 전송 실패 (시도 {attempt}/{MAX_RETRIES}): {e}")
+            if attempt < MAX_RETRIES:
+                await asyncio.sleep(1) # 잠시 대기
+    return False
+
+
+class Pipeline:
+    """
+    텔레그램 메시지와 NLF WebSocket 프레임을 처리하는 매수 파이프라인.
+    CA 추출 -> 선점(중복 방지) -> 매수 전 검사 -> 매수 전송(라우터) -> 포지션 기록(청산 엔진) 순으로 진행되며,
+    실제 실행(main.py)과 오프라인 재생(replay.py)이 같은 코드를 사용합니다.
+    """
+
+    def __init__(self, dedup, router, outbound, sell_scheduler, buy_amount, tracker=default_tracker):
+        self.dedup = dedup
+        self.router = router
+        self.outbound = outbound
+        self.sell_scheduler = sell_scheduler
+        self.exit_engine = None  # positions.ExitEngine (포지션 장부 + 청산 규칙)
+        self.buy_amount = buy_amount
+        self.tracker = tracker
+        self.broker = None  # 다중 프로세스 모드: broker.BrokerClient (계정 간 중복 방지, 포지션 한도)
+        self.pre_trade = None  # filters.PreTradeFilter (매수 전 검사, 없으면 바로 매수)
+        self.journal = None  # journal.TradeJournal (매매 단계별 구조화 기록, 없으면 기록하지 않음)
+        self.paused = False  # 제어 API로 매수 일시 중지 (매도는 계속 실행)
+        self.paused_skips = 0
+        self._listing_tasks = set()  # 진행 중인 NLF 매수 태스크 (GC 방지)
+        self._broker_tasks = set()  # 진행 중인 브로커 알림 태스크 (GC 방지)
+
+    def _record(self, event, feed="", ca=None, a=0.0, b=0.0, bot=""):
+        if self.journal is not None:
+            self.journal.record(event, feed, ca, a, b, bot)
+
+    def open_position_on_ack(self, ca, feed, trace):
+        """매수 전송이 확인된 봇마다 포지션을 장부에 기록하는 콜백을 반환합니다 (청산은 ExitEngine이 결정)."""
+        sent_ms = trace.since_start_ms()
+
+        def on_ack(bot):
+            latency_ms = trace.since_start_ms()
+            self._record(journal.ACK, feed, ca, latency_ms, latency_ms - sent_ms, bot)
+            self.exit_engine.open(ca, self.buy_amount, feed, latency_ms, bot)
+
+        return on_ack
+
+    def sell(self, ca, percent, bot=None):
+        """청산 엔진이 결정한 매도를 자동 매도 스케줄러에 넘깁니다 (즉시 실행, 실패 시 재시도)."""
+        delay = 0  # 실행 시점은 청산 엔진이 정하므로 스케줄러는 바로 실행
+        self._record(journal.SELL_SCHEDULED, "", ca, percent, delay, bot or "")
+        return self.sell_scheduler.schedule(ca, delay, percent, bot=bot)
+
+    def close_position(self, ca):
+        """청산 규칙을 모두 소진한 CA: 브로커의 포지션 슬롯을 해제합니다 (남은 물량은 수동 매도)."""
+        if self.broker is None:
+            return
+        task = asyncio.create_task(self.broker.close(ca))
+        self._broker_tasks.add(task)
+        task.add_done_callback(self._broker_tasks.discard)
+
+    async def send_auto_sell(self, order):
+        """예약된 매도 명령을 매수를 실행한 봇에게 전송합니다."""
+        sell_command = f"/sell {order.ca} {order.percent}%"
+        sent = await send_message_with_retry(
+            self.outbound, order.bot or self.router.bots[0], sell_command, "자동 SELL 명령"
+        )
+        self._record(journal.SELL_SENT, "", order.ca, order.percent, 1.0 if sent else 0.0, order.bot or "")
+        if sent and self.broker is not None and order.percent >= 100:
+            await self.broker.close(order.ca)
+        return sent
+
+    async def buy(self, ca, feed, trace, command_desc="BUY 명령"):
+        """CA를 선점하고 매수 명령을 전송합니다. 전송이 확인되면 True를 반환합니다."""
+        if self.journal is not None:
+            origin_ms = (trace.received_wall - trace.origin_ts) * 1000 if trace.origin_ts is not None else -1.0
+            self.journal.record(journal.SIGNAL, feed, ca, origin_ms, trace.since_start_ms())
+        if self.paused:
+            self._record(journal.PAUSED, feed, ca)
+            self.paused_skips += 1
+            logging.info(f"매수가 일시 중지되어 건너뜁니다: {ca}")
+            return False
+
+        # 중복 방지: 전송 전에 선점 (다른 피드와 경쟁)
+        claimed = self.dedup.claim(ca, feed)
+        trace.mark("dedup")
+        if not claimed:
+            self._record(journal.DUPLICATE, feed, ca)
+            logging.info(f"이미 처리된 CA입니다. 건너뜁니다: {ca}")
+            return False
+        self._record(journal.CLAIM, feed, ca)
+
+        # 매수 전 검사 (블랙리스트/화이트리스트, 허니팟/유동성 등): 선점한 상태로 실행해 다른 피드는 기다리지 않고 건너뜀
+        if self.pre_trade is not None:
+            decision = await self.pre_trade.evaluate(ca)
+            trace.mark("filter")
+            if decision.timed_out:
+                logging.warning(f"매수 전 검사 시간 초과 ({', '.join(decision.timed_out)}): {ca}")
+            if not decision.allowed:
+                self._record(journal.FILTERED, feed, ca, decision.elapsed_ms)
+                logging.info(f"매수 전 검사에서 거부되었습니다 ({'; '.join(decision.reasons)}): {ca}")
+                self.dedup.release(ca)
+                return False
+
+        # 다중 프로세스 모드: 같은 계정의 다른 워커와 중복, 계정별 포지션 한도 확인
+        if self.broker is not None:
+            verdict = await self.broker.claim(ca, feed, self.buy_amount)
+            trace.mark("broker")
+            if verdict != "ok":
+                logging.info(f"브로커가 매수를 거부했습니다 ({verdict}): {ca}")
+                if verdict == "duplicate":
+                    self._record(journal.DUPLICATE, feed, ca)
+                    self.dedup.confirm(ca)
+                else:
+                    self.dedup.release(ca)
+                return False
+
+        # 매수 명령 구성 (/buy [CA] [Amount])
+        command_to_send = f"/buy {ca} {self.buy_amount}"
+        logging.info(f"매수 명령 전송 시도: {command_to_send}")
+        self._record(journal.SEND, feed, ca, self.buy_amount, trace.since_start_ms())
+
+        # 자동 매도는 전송이 확인된 봇마다 예약
+        if await self.router.dispatch(command_to_send, command_desc, trace=trace,
+                                      on_ack=self.open_position_on_ack(ca, feed, trace)):
+            self.dedup.confirm(ca)
+            if self.broker is not None:
+                await self.broker.confirm(ca)
+            return True
+        self._record(journal.SEND_FAILED, feed, ca, trace.since_start_ms())
+        self.dedup.release(ca)
+        if self.broker is not None:
+            await self.broker.release(ca)
+        return False
+
+    async def handle_message(self, event, text=None, edited=False):
+        """
+        NewListingsFeed 또는 Newsbothub로부터 새 메시지(또는 수정된 메시지)를 받았을 때 실행되는 핸들러
+        1. Binance Wallet URL (NewListingsFeed 스타일)
+        2. 'Binance alpha' 키워드 + 'source: ... (bsc)' (Newsbothub 스타일)
+        위 패턴을 찾아 메시지의 모든 CA를 추출하고 매수 명령을 전송합니다.
+        text를 주면 메시지 본문 대신 사용합니다 (숨은 링크/버튼 URL 포함, ingest.message_text 참고).
+        추출된 [(CA, SourceFormat), ...]를 반환합니다.
+        """
+        message = event.message
+        # 수정된 메시지는 내용이 채워진 시각(edit_date)부터 지연 시간 측정
+        message_date = (getattr(message, "edit_date", None) if edited else None) or message.date
+        trace = self.tracker.start("telegram", event.chat_id, message_date.timestamp() if message_date else None)
+        try:
+            # CA 추출 (등록된 모든 포맷을 한 번에 검사, 'live on Binance alpha' 키워드는 대소문자 무시)
+            found = extract_all_cas(message.text if text is None else text)
+            trace.mark("extract")
+            for extracted_ca, source_format in found:
+                logging.info(f"{source_format.description} 발견! 추출된 CA: {extracted_ca}{' (수정된 메시지)' if edited else ''}")
+                await self.buy(extracted_ca, f"telegram:{event.chat_id}", trace)
+        finally:
+            self.tracker.finish(trace)
+        return found
+
+    def decode_nlf_frame(self, raw, source, received_at=None, prefiltered=False):
+        """
+        NLF 프레임을 디코딩합니다 (사전 필터 -> JSON 파싱 -> Binance Alpha 필터).
+        매수 대상이면 (Listing, trace)를, 아니면 None을 반환합니다. received_at은 수신 시각(perf_counter)입니다.
+        연결 계층(NLFConnectionManager)에서 이미 사전 필터를 거친 프레임은 prefiltered=True로 받습니다.
+        """
+        trace = self.tracker.start("nlf", source, started=received_at)
+        try:
+            if not prefiltered and not nlf.prefilter(raw):
+                trace.mark("prefilter")
+                self.tracker.finish(trace)
+                return None
+            listing = nlf.decode_frame(raw, received_at, prefiltered=True)
+            trace.mark("decode")
+        except ValueError:
+            logging.error(f"WebSocket 메시지 파싱 실패: {raw!r}")
+            self.tracker.finish(trace)
+            return None
+        except Exception as e:
+            logging.error(f"WebSocket 메시지 처리 중 오류: {e}")
+            self.tracker.finish(trace)
+            return None
+        if listing is None:
+            self.tracker.finish(trace)
+            return None
+        return listing, trace
+
+    async def process_listing(self, listing, trace):
+        """디코딩된 리스팅의 BSC 컨트랙트를 매수합니다."""
+        # 수신 시각부터 처리 시작까지 (수신 루프 -> 매수 태스크 대기 시간)
+        trace.mark("queue")
+        try:
+            for ca in listing.bsc_contracts():
+                logging.info(f"NLF WebSocket에서 Binance Alpha BSC 발견: {ca}")
+                await self.buy(ca, "nlf", trace, "BUY 명령 (WebSocket)")
+        except Exception as e:
+            logging.error(f"WebSocket 메시지 처리 중 오류: {e}")
+        finally:
+            self.tracker.finish(trace)
+
+    def submit_nlf_frame(self, raw, source, received_at=None, prefiltered=False):
+        """
+        수신 루프용: 디코딩까지만 바로 처리하고 매수는 별도 태스크로 실행합니다.
+        매수 전송을 기다리는 동안에도 수신 루프가 소켓을 계속 읽을 수 있습니다.
+        """
+        decoded = self.decode_nlf_frame(raw, source, received_at, prefiltered)
+        if decoded is None:
+            return None
+        task = asyncio.create_task(self.process_listing(*decoded))
+        self._listing_tasks.add(task)
+        task.add_done_callback(self._listing_tasks.discard)
+        return task
+
+    async def handle_nlf_frame(self, raw, source, received_at=None):
+        """NLF WebSocket 프레임 하나를 처리합니다 (Binance Alpha BSC 리스팅만 매수)."""
+        decoded = self.decode_nlf_frame(raw, source, received_at)
+        if decoded is not None:
+            await self.process_listing(*decoded)
+
+
+def build_pipeline(send, target_bots, dedup, sells_path, buy_amount, sell_delay, sell_percent,
+                   order_mode="hedge", hedge_delay=0.3, rate=5.0, burst=5, buy_queue_timeout=10.0,
+                   tracker=default_tracker, clock=time.time, monotonic=time.monotonic,
+                   exit_rules=None, price_source=None, ledger_path=":memory:", eval_interval=DEFAULT_EVAL_INTERVAL):
+    """
+    발신 큐, 주문 라우터, 포지션 장부/청산 엔진, 자동 매도 스케줄러를 연결한 Pipeline을 만듭니다.
+    send는 async def send(target, message, **kwargs) 형태의 실제(또는 가짜) 텔레그램 전송 함수입니다.
+    exit_rules가 없으면 sell_delay초 후 sell_percent% 매도하는 시간 규칙 하나를 사용합니다.
+    """
+    outbound = OutboundQueue(send, rate=rate, burst=burst, clock=monotonic)
+
+    async def send_to_bot(bot, message):
+        await outbound.submit(bot, message, PRIORITY_BUY, timeout=buy_queue_timeout)
+
+    router = OrderRouter(send_to_bot, target_bots, mode=order_mode, hedge_delay=hedge_delay, max_rounds=MAX_RETRIES)
+    pipeline = Pipeline(dedup, router, outbound, None, buy_amount, tracker=tracker)
+    pipeline.sell_scheduler = SellScheduler(sells_path, pipeline.send_auto_sell, clock=clock)
+    if exit_rules is None:
+        exit_rules = [TimeExit(sell_delay, sell_percent)]
+    pipeline.exit_engine = ExitEngine(PositionLedger(ledger_path), exit_rules, pipeline.sell,
+                                      price_source=price_source, interval=eval_interval, clock=clock,
+                                      on_close=pipeline.close_position)
+    return pipeline
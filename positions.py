@@ -0,0 +1,445 @@
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+
+# 가격 조건이 있을 때 청산 규칙을 평가하는 기본 간격 (초)
+DEFAULT_EVAL_INTERVAL = 1.0
+
+
+class Position:
+    """매수 한 건 (매수를 확인한 봇 기준)"""
+
+    __slots__ = ("id", "ca", "amount", "bought_at", "feed", "latency_ms", "bot", "entry_price",
+                 "remaining", "fired", "status")
+
+    def __init__(self, id, ca, amount, bought_at, feed, latency_ms=None, bot=None, entry_price=None,
+                 remaining=100.0, fired=(), status="open"):
+        self.id = id
+        self.ca = ca
+        self.amount = amount  # 매수 금액 (BNB)
+        self.bought_at = bought_at  # 매수 확인 시각 (epoch 초)
+        self.feed = feed
+        self.latency_ms = latency_ms  # 메시지 수신 -> 매수 확인
+        self.bot = bot
+        self.entry_price = entry_price  # 매수 후 가격 소스에서 처음 확인한 가격
+        self.remaining = remaining  # 남은 비율 (최초 포지션 대비 %)
+        self.fired = set(fired)  # 이미 실행된 청산 규칙 이름
+        self.status = status
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["fired"] = sorted(self.fired)
+        return data
+
+
+# --- 청산 규칙 ---
+class ExitRule:
+    """
+    청산 규칙. evaluate()가 True를 반환하면 최초 포지션의 percent%를 매도합니다.
+    규칙은 포지션마다 한 번만 실행됩니다.
+    """
+
+    needs_price = False
+
+    def __init__(self, name, percent):
+        self.name = name
+        self.percent = percent
+
+    def evaluate(self, position, now, price):
+        raise NotImplementedError
+
+    def next_due(self, position):
+        """시간 기반 규칙이면 실행 시각(epoch 초), 아니면 None"""
+        return None
+
+
+class TimeExit(ExitRule):
+    """매수 후 after초가 지나면 매도 (여러 개를 조합하면 시간 단계별 분할 매도)"""
+
+    def __init__(self, after, percent):
+        super().__init__(f"time:{after:g}s", percent)
+        self.after = after
+
+    def evaluate(self, position, now, price):
+        return now >= position.bought_at + self.after
+
+    def next_due(self, position):
+        return position.bought_at + self.after
+
+
+class TakeProfit(ExitRule):
+    """가격이 진입가의 multiple배 이상이면 매도 (여러 개를 조합하면 단계별 익절)"""
+
+    needs_price = True
+
+    def __init__(self, multiple, percent):
+        super().__init__(f"tp:{multiple:g}x", percent)
+        self.multiple = multiple
+
+    def evaluate(self, position, now, price):
+        return price is not None and position.entry_price and price >= position.entry_price * self.multiple
+
+
+class StopLoss(ExitRule):
+    """가격이 진입가 대비 drawdown(0~1) 이상 하락하면 매도"""
+
+    needs_price = True
+
+    def __init__(self, drawdown, percent=100.0):
+        super().__init__(f"sl:{drawdown * 100:g}%", percent)
+        self.drawdown = drawdown
+
+    def evaluate(self, position, now, price):
+        return price is not None and position.entry_price and price <= position.entry_price * (1 - self.drawdown)
+
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+def _parse_duration(text):
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smh]?)", text)
+    if not match:
+        raise ValueError(f"잘못된 시간 형식: {text}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2) or "s"]
+
+
+def parse_exit_rules(spec):
+    """
+    EXIT_RULES 문자열을 규칙 목록으로 변환합니다. 항목은 콤마로 구분하며 비율은 최초 포지션 대비 %입니다.
+      time:15m:100   매수 15분 후 전량 매도 (s/m/h)
+      tp:2x:50       진입가의 2배에서 50% 매도
+      sl:30%:100     진입가 대비 30% 하락 시 전량 매도
+    같은 조건의 규칙이 두 번 나오면 (예: time:5m:50,time:300s:50) 하나로 합치도록 ValueError를 발생시킵니다.
+    """
+    rules = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        parts = item.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"잘못된 청산 규칙: {item} (형식: 종류:조건:비율)")
+        kind, trigger, percent = parts[0].lower(), parts[1].strip(), float(parts[2].rstrip("%"))
+        if not 0 < percent <= 100:
+            raise ValueError(f"청산 비율은 0~100 사이여야 합니다: {item}")
+        if kind == "time":
+            rules.append(TimeExit(_parse_duration(trigger), percent))
+        elif kind == "tp":
+            rules.append(TakeProfit(float(trigger.lower().rstrip("x")), percent))
+        elif kind == "sl":
+            drawdown = abs(float(trigger.rstrip("%"))) / 100
+            if not 0 < drawdown < 1:  # 0%는 진입가에서 바로, 100% 이상은 절대 실행되지 않음
+                raise ValueError(f"손절 하락률은 0~100% 사이여야 합니다: {item}")
+            rules.append(StopLoss(drawdown, percent))
+        else:
+            raise ValueError(f"알 수 없는 청산 규칙 종류: {kind}")
+        # 규칙은 이름으로 실행 여부를 기록하므로 같은 조건이 두 번 있으면 두 번째는 실행되지 않음
+        if any(rule.name == rules[-1].name for rule in rules[:-1]):
+            raise ValueError(f"중복된 청산 규칙: {item} (같은 조건의 비율은 하나로 합쳐 주세요)")
+    return rules
+
+
+# --- 가격 소스 ---
+class PriceSource:
+    """가격 소스 인터페이스. 여러 CA의 가격을 한 번에 조회합니다 (가격을 모르는 CA는 생략)."""
+
+    async def get_prices(self, cas):
+        return {}
+
+
+class MockPriceSource(PriceSource):
+    """테스트/재생용 로컬 가격 소스. set()으로 가격을 지정하거나 func(ca, now)로 계산합니다."""
+
+    def __init__(self, prices=None, func=None, clock=time.time):
+        self.prices = {ca.lower(): price for ca, price in (prices or {}).items()}
+        self.func = func
+        self._clock = clock
+        self.calls = 0
+
+    def set(self, ca, price):
+        self.prices[ca.lower()] = price
+
+    async def get_prices(self, cas):
+        self.calls += 1
+        result = {}
+        now = self._clock()
+        for ca in cas:
+            price = self.func(ca, now) if self.func else self.prices.get(ca.lower())
+            if price is not None:
+                result[ca] = price
+        return result
+
+
+def load_price_source(spec):
+    """
+    PRICE_SOURCE 설정으로 가격 소스를 만듭니다.
+    비어 있으면 None, 'mock'이면 MockPriceSource, 'module:ClassName'이면 해당 클래스를 인자 없이 생성합니다.
+    """
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    if spec.lower() == "mock":
+        return MockPriceSource()
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"잘못된 가격 소스 형식: {spec} (형식: module:ClassName)")
+    import importlib
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+# --- 포지션 장부 ---
+class PositionLedger:
+    """
+    모든 매수(CA, 금액, 시각, 피드, 지연 시간)와 청산 내역을 기록하는 SQLite 장부.
+    미청산 포지션은 메모리에도 유지되며 재시작 시 복원됩니다.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS positions (id INTEGER PRIMARY KEY AUTOINCREMENT, ca TEXT, amount REAL, "
+            "bought_at REAL, feed TEXT, latency_ms REAL, bot TEXT, entry_price REAL, remaining REAL, "
+            "fired TEXT, status TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS exits (position_id INTEGER, ts REAL, percent REAL, sell_percent REAL, "
+            "reason TEXT, price REAL)"
+        )
+        self._conn.commit()
+        self.open_positions = {}
+        for row in self._conn.execute(
+            "SELECT id, ca, amount, bought_at, feed, latency_ms, bot, entry_price, remaining, fired, status "
+            "FROM positions WHERE status = 'open' ORDER BY id"
+        ):
+            position = Position(*row[:6], json.loads(row[6]) if row[6] else None, *row[7:9],
+                                fired=json.loads(row[9] or "[]"), status=row[10])
+            self.open_positions[position.id] = position
+
+    def open(self, ca, amount, bought_at, feed, latency_ms=None, bot=None):
+        cursor = self._conn.execute(
+            "INSERT INTO positions (ca, amount, bought_at, feed, latency_ms, bot, entry_price, remaining, fired, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, NULL, 100, '[]', 'open')",
+            (ca, amount, bought_at, feed, latency_ms, None if bot is None else json.dumps(bot)),  # 봇 ID 타입(int/str) 유지
+        )
+        self._conn.commit()
+        position = Position(cursor.lastrowid, ca, amount, bought_at, feed, latency_ms, bot)
+        self.open_positions[position.id] = position
+        return position
+
+    def update(self, position):
+        self._conn.execute(
+            "UPDATE positions SET entry_price = ?, remaining = ?, fired = ?, status = ? WHERE id = ?",
+            (position.entry_price, position.remaining, json.dumps(sorted(position.fired)), position.status, position.id),
+        )
+        self._conn.commit()
+        if position.status != "open":
+            self.open_positions.pop(position.id, None)
+
+    def record_exit(self, position, ts, percent, sell_percent, reason, price):
+        self._conn.execute(
+            "INSERT INTO exits VALUES (?, ?, ?, ?, ?, ?)",
+            (position.id, ts, percent, sell_percent, reason, price),
+        )
+        self.update(position)
+
+    def history(self, limit=100):
+        """최근 매수 기록 (최신순)"""
+        rows = self._conn.execute(
+            "SELECT id, ca, amount, bought_at, feed, latency_ms, bot, entry_price, remaining, status "
+            "FROM positions ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        keys = ("id", "ca", "amount", "bought_at", "feed", "latency_ms", "bot", "entry_price", "remaining", "status")
+        history = []
+        for row in rows:
+            entry = dict(zip(keys, row))
+            entry["bot"] = json.loads(entry["bot"]) if entry["bot"] else None
+            history.append(entry)
+        return history
+
+    def exits(self, position_id):
+        return self._conn.execute(
+            "SELECT ts, percent, sell_percent, reason, price FROM exits WHERE position_id = ? ORDER BY ts",
+            (position_id,),
+        ).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+
+# --- 청산 엔진 ---
+class ExitEngine:
+    """
+    모든 미청산 포지션의 청산 규칙을 하나의 루프에서 평가합니다.
+    가격 조건이 있으면 interval초마다 가격 소스를 한 번만(일괄) 조회하고, 시간 규칙만 있으면
+    다음 실행 시각까지 잠듭니다. 매도 전송은 sell(ca, percent, bot) 콜백(자동 매도 스케줄러)에 맡깁니다.
+    규칙을 모두 소진했는데 남은 비율이 있는 포지션은 'exhausted'로 닫고 on_close(ca) 콜백으로 알립니다 (브로커 슬롯 해제).
+    """
+
+    def __init__(self, ledger, rules, sell, price_source=None, interval=DEFAULT_EVAL_INTERVAL, clock=time.time,
+                 on_close=None):
+        self.ledger = ledger
+        self.rules = list(rules)
+        self._sell = sell
+        self._on_close = on_close
+        self.price_source = price_source or PriceSource()
+        self.interval = interval
+        self._clock = clock
+        self._wakeup = asyncio.Event()
+        self._needs_price = any(rule.needs_price for rule in self.rules)
+        self.evaluations = 0
+        self._check_total()
+
+    def set_rules(self, rules):
+        """청산 규칙을 바꿉니다 (설정 다시 읽기). 미청산 포지션에도 새 규칙이 적용되며 이미 실행된 규칙은 다시 실행되지 않습니다."""
+        self.rules = list(rules)
+        self._needs_price = any(rule.needs_price for rule in self.rules)
+        self._check_total()
+        self._wakeup.set()
+
+    def _check_total(self):
+        total = sum(rule.percent for rule in self.rules)
+        if total < 100:
+            logging.warning(f"청산 규칙 비율 합계가 {total:g}%입니다. 모든 규칙이 실행된 뒤 남은 "
+                            f"{100 - total:g}%는 자동으로 매도되지 않으며 포지션은 장부에서 닫힙니다 (수동 매도 필요).")
+
+    def _active_positions(self):
+        """아직 실행되지 않은 규칙이 남아 있는 미청산 포지션"""
+        return [position for position in self.ledger.open_positions.values()
+                if any(rule.name not in position.fired for rule in self.rules)]
+
+    def open(self, ca, amount, feed, latency_ms=None, bot=None):
+        """매수가 확인되면 포지션을 장부에 기록하고 평가 루프를 깨웁니다."""
+        position = self.ledger.open(ca, amount, self._clock(), feed, latency_ms, bot)
+        logging.info(f"포지션 기록: {ca} {amount} BNB (봇 {bot}, {feed})")
+        self._wakeup.set()
+        return position
+
+    async def evaluate(self):
+        """모든 미청산 포지션을 한 번 평가합니다."""
+        positions = self._active_positions()
+        if positions:
+            self.evaluations += 1
+            prices = {}
+            if self._needs_price:
+                try:
+                    prices = await self.price_source.get_prices(sorted({p.ca for p in positions}))
+                except Exception as e:
+                    logging.error(f"가격 조회 실패: {e}")
+            now = self._clock()
+            for position in positions:
+                self._evaluate_position(position, now, prices.get(position.ca))
+        self._close_exhausted()
+
+    def _close_exhausted(self):
+        """
+        규칙을 모두 소진했는데 남은 비율이 있는 포지션(규칙 합계 < 100%, 시간 청산 취소)을 장부에서 닫습니다.
+        열린 채로 두면 브로커의 max_positions 슬롯이 영원히 차 있으므로, 같은 CA의 포지션이 모두 닫히면 on_close(ca)를 호출합니다.
+        """
+        exhausted = [position for position in self.ledger.open_positions.values()
+                     if self.rules and all(rule.name in position.fired for rule in self.rules)]
+        for position in exhausted:
+            position.status = "exhausted"
+            self.ledger.update(position)
+            logging.warning(f"청산 규칙을 모두 실행했습니다: {position.ca} 남은 {position.remaining:g}%는 수동으로 매도하세요.")
+        if self._on_close is None:
+            return
+        open_cas = {p.ca.lower() for p in self.ledger.open_positions.values()}
+        for ca in dict.fromkeys(p.ca for p in exhausted):
+            if ca.lower() not in open_cas:
+                self._on_close(ca)
+
+    def _evaluate_position(self, position, now, price):
+        if price is not None and position.entry_price is None:
+            position.entry_price = price  # 매수 후 첫 가격을 진입가로 사용
+            self.ledger.update(position)
+        triggered = [rule for rule in self.rules
+                     if rule.name not in position.fired and rule.evaluate(position, now, price)]
+        if not triggered:
+            return
+        position.fired.update(rule.name for rule in triggered)
+        self._exit(position, sum(rule.percent for rule in triggered), "+".join(rule.name for rule in triggered), now, price)
+
+    def _exit(self, position, percent, reason, now, price=None):
+        """최초 포지션 대비 percent%를 매도합니다 (남은 비율보다 크면 남은 만큼)."""
+        percent = min(position.remaining, percent)
+        if percent <= 0:
+            self.ledger.update(position)
+            return
+        # 봇의 /sell 비율은 현재 보유량 기준이므로 남은 비율로 환산
+        sell_percent = 100.0 if percent >= position.remaining - 1e-9 else round(percent / position.remaining * 100, 4)
+        position.remaining = max(0.0, position.remaining - percent)
+        if position.remaining <= 1e-9:
+            position.remaining = 0.0
+            position.status = "closed"
+        self.ledger.record_exit(position, now, percent, sell_percent, reason, price)
+        logging.info(f"청산 규칙 실행 ({reason}): {position.ca} {sell_percent:g}% 매도 (남은 비율 {position.remaining:g}%)")
+        self._sell(position.ca, sell_percent, position.bot)
+
+    def manual_exit(self, ca, percent=100.0):
+        """수동 매도: ca의 미청산 포지션마다 현재 보유량의 percent%를 매도합니다. 매도한 포지션 수를 반환합니다."""
+        key = ca.lower()
+        positions = [p for p in self.ledger.open_positions.values() if p.ca.lower() == key]
+        now = self._clock()
+        for position in positions:
+            self._exit(position, position.remaining * min(100.0, percent) / 100, "manual", now)
+        return len(positions)
+
+    def pending_exits(self, position):
+        """아직 실행되지 않은 시간 기반 청산 [{rule, percent, due}] (실행 시각 순)"""
+        exits = [{"rule": rule.name, "percent": rule.percent, "due": rule.next_due(position)}
+                 for rule in self.rules if rule.name not in position.fired]
+        return sorted((e for e in exits if e["due"] is not None), key=lambda e: e["due"])
+
+    def cancel_exits(self, ca):
+        """ca의 미청산 포지션에서 아직 실행되지 않은 시간 기반 청산을 취소합니다. 취소한 규칙 수를 반환합니다."""
+        key = ca.lower()
+        cancelled = 0
+        for position in self.ledger.open_positions.values():
+            if position.ca.lower() != key:
+                continue
+            names = [e["rule"] for e in self.pending_exits(position)]
+            if names:
+                position.fired.update(names)  # 실행된 것으로 표시해 다시 평가하지 않음
+                self.ledger.update(position)
+                cancelled += len(names)
+        self._close_exhausted()
+        return cancelled
+
+    def _next_wakeup(self):
+        due = None
+        positions = self._active_positions()
+        for position in positions:
+            for rule in self.rules:
+                if rule.name in position.fired:
+                    continue
+                at = rule.next_due(position)
+                if at is not None and (due is None or at < due):
+                    due = at
+        timeout = None if due is None else max(0.0, due - self._clock())
+        if self._needs_price and positions:
+            timeout = self.interval if timeout is None else min(timeout, self.interval)
+        return timeout
+
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            await self.evaluate()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._next_wakeup())
+            except asyncio.TimeoutError:
+                pass
+
+    def summary(self):
+        positions = list(self.ledger.open_positions.values())
+        return {
+            "open": len(positions),
+            "exposure": round(sum(p.amount * p.remaining / 100 for p in positions), 8),
+            "rules": [rule.name for rule in self.rules],
+            "evaluations": self.evaluations,
+        }
@@ -0,0 +1,98 @@
+"""설정 다시 읽기: .env가 바뀌거나 SIGHUP을 받으면 검증한 뒤 바로 적용할 수 있는 설정만 적용합니다."""
+import os
+import copy
+import time
+import asyncio
+import logging
+
+from config import ENV_PATH, RELOADABLE, read_config
+
+DEFAULT_WATCH_SECONDS = 2.0
+
+# 로그에 값을 그대로 출력하지 않는 설정
+_SECRETS = {"api_hash", "nlf_api_key", "control_token"}
+
+
+def _describe(name, old, new):
+    if name in _SECRETS:
+        return f"{name} (변경됨)"
+    return f"{name}: {old} -> {new}"
+
+
+class ConfigReloader:
+    """
+    env_path가 바뀌면 (또는 reload() 호출 시) 설정을 다시 읽어 apply(new_config, changes)로 적용합니다.
+    apply는 async def apply(config, {이름: (이전 값, 새 값)})이며, 예외를 내면 아무것도 바뀌지 않은 것으로 봅니다.
+    """
+
+    def __init__(self, config, apply, env_path=ENV_PATH, interval=DEFAULT_WATCH_SECONDS, loader=read_config,
+                 clock=time.time):
+        self.config = config
+        self._loaded = copy.copy(config)  # 마지막으로 적용한 파일 내용 (제어 API로 바꾼 값과 구분)
+        self.env_path = env_path
+        self.interval = interval
+        self._apply = apply
+        self._loader = loader
+        self._clock = clock
+        self._lock = asyncio.Lock()  # 파일 변경과 SIGHUP이 겹쳐도 한 번에 하나씩
+        self._stamp = self._file_stamp()
+        self.reloads = 0
+        self.failures = 0
+        self.pending_restart = set()  # 변경됐지만 재시작해야 적용되는 설정
+        self.last = None
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.env_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    async def reload(self, reason="SIGHUP"):
+        """설정 파일을 다시 읽어 적용합니다. 실제로 바뀐 설정이 적용되면 True를 반환합니다."""
+        async with self._lock:
+            self._stamp = self._file_stamp()
+            try:
+                new = self._loader(self.env_path)
+            except ValueError as e:
+                self.failures += 1
+                self.last = {"reason": reason, "at": self._clock(), "error": str(e)}
+                logging.error(f"설정 다시 읽기 실패 ({reason}), 기존 설정을 유지합니다: {e}")
+                return False
+            changes = self._loaded.changes(new)
+            restart = sorted(name for name in changes if name not in RELOADABLE)
+            live = {name: change for name, change in changes.items() if name in RELOADABLE}
+            if restart:
+                self.pending_restart.update(restart)
+                logging.warning(f"재시작 후 적용되는 설정이 변경되었습니다: {', '.join(restart)}")
+            if not live:
+                self._loaded = new
+                return False
+            try:
+                await self._apply(new, live)
+            except Exception as e:
+                self.failures += 1
+                self.last = {"reason": reason, "at": self._clock(), "error": str(e)}
+                logging.error(f"설정 적용 실패 ({reason}), 기존 설정을 유지합니다: {e}", exc_info=True)
+                return False
+            self._loaded = new
+            self.reloads += 1
+            self.last = {"reason": reason, "at": self._clock(), "changed": sorted(live)}
+            logging.warning(f"설정 변경 적용 ({reason}): " + ", ".join(_describe(n, *live[n]) for n in sorted(live)))
+            return True
+
+    async def run(self):
+        """interval초마다 설정 파일의 수정 시각/크기를 확인합니다."""
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._file_stamp() != self._stamp:
+                await self.reload("file")
+
+    def summary(self):
+        return {
+            "path": self.env_path,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "pending_restart": sorted(self.pending_restart),
+            "last": self.last,
+        }
@@ -0,0 +1,304 @@
+"""
+Offline replay / backtest harness for the message pipeline.
+
+Recorded Telegram messages and NLF WebSocket frames (JSONL, original timestamps) are fed
+through the real pipeline code (ingest.TelegramIngest -> pipeline.Pipeline) on a virtual clock, against a fake
+Telethon client that records every outbound command. A day of traffic replays in seconds.
+
+Record format (one JSON object per line):
+  {"ts": 1765540807.0, "feed": "telegram", "chat_id": -1001, "message_id": 1, "text": "...", "expect_ca": "0x..."}
+  {"ts": 1765540806.2, "feed": "nlf", "frame": {...}}      # frame may also be a raw string
+
+Usage: python replay.py samples/replay_session.jsonl [--sell-delay 900] [--send-latency-ms 50]
+"""
+import os
+import json
+import math
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+from datetime import datetime, timezone
+
+from dedup import DedupService
+from latency import LatencyTracker
+from extractors import extract_ca
+from ingest import TelegramIngest
+from pipeline import build_pipeline
+from positions import TimeExit, parse_exit_rules
+
+DEFAULT_BOT = "@GMGN_bsc_bot"
+
+
+# --- 가상 시계 / 이벤트 루프 ---
+class VirtualClock:
+    """
+    재생용 가상 시계. 이벤트 루프가 한가할 때 다음 타이머 시각으로 바로 이동합니다.
+    루프 시간은 시작 시각 기준 경과 초(elapsed)로 유지합니다. epoch 값(약 1.7e9)에 작은
+    대기 시간을 더하면 부동소수점 정밀도 때문에 시간이 멈출 수 있기 때문입니다.
+    """
+
+    def __init__(self, start=0.0):
+        self.start = start
+        self.elapsed = 0.0
+
+    def time(self):
+        """epoch 초 (파이프라인 구성 요소용)"""
+        return self.start + self.elapsed
+
+    def advance(self, seconds):
+        target = self.elapsed + seconds
+        self.elapsed = target if target > self.elapsed else math.nextafter(self.elapsed, math.inf)
+
+
+class _VirtualSelector:
+    """대기 시간만큼 실제로 기다리는 대신 가상 시계를 앞으로 옮기는 셀렉터 래퍼"""
+
+    def __init__(self, selector, clock):
+        self._selector = selector
+        self._clock = clock
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if events:
+            return events
+        if timeout is None:
+            # 예약된 타이머가 없으면 (다른 스레드 등) 잠시 실제로 대기
+            return self._selector.select(0.01)
+        if timeout > 0:
+            self._clock.advance(timeout)
+        return events
+
+    def __getattr__(self, name):
+        return getattr(self._selector, name)
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """loop.time()과 asyncio.sleep()이 가상 시계를 따르는 이벤트 루프"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self._virtual_clock = clock
+        self._selector = _VirtualSelector(self._selector, clock)
+
+    def time(self):
+        return self._virtual_clock.elapsed
+
+
+def run_virtual(coro, clock):
+    """코루틴을 가상 시간 이벤트 루프에서 실행합니다."""
+    loop = VirtualTimeLoop(clock)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+# --- 가짜 Telethon 객체 ---
+class FakeMessage:
+    __slots__ = ("id", "text", "date", "chat_id")
+
+    def __init__(self, id, text, date, chat_id=None):
+        self.id = id
+        self.text = text
+        self.date = date
+        self.chat_id = chat_id
+
+
+class FakeEvent:
+    """events.NewMessage.Event 중 파이프라인이 사용하는 속성만 흉내 냅니다."""
+
+    def __init__(self, chat_id, message):
+        self.chat_id = chat_id
+        self.sender_id = chat_id
+        self.message = message
+
+
+class FakeClient:
+    """보낸 명령을 기록하는 가짜 TelegramClient (전송 지연과 실패를 흉내 낼 수 있음)"""
+
+    def __init__(self, clock, latency=0.05, fail=None):
+        self._clock = clock
+        self.latency = latency
+        self.fail = fail  # fail(entity, message) -> True면 전송 실패
+        self.sent = []
+        self._ids = 0
+
+    async def send_message(self, entity, message, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail and self.fail(entity, message):
+            raise ConnectionError(f"simulated send failure ({entity})")
+        self._ids += 1
+        self.sent.append({"ts": self._clock.time(), "to": entity, "text": message})
+        return FakeMessage(self._ids, message, datetime.fromtimestamp(self._clock.time(), timezone.utc))
+
+
+def load_records(path):
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+class ReplayEngine:
+    """기록된 메시지를 가상 시간으로 파이프라인에 재생하고 결과를 집계합니다."""
+
+    def __init__(self, records, bots=(DEFAULT_BOT,), buy_amount=0.1, sell_delay=900, sell_percent=100,
+                 send_latency=0.05, fail=None, order_mode="hedge", hedge_delay=0.3, rate=5.0, burst=5,
+                 exit_rules=None, price_source=None):
+        self.records = records
+        self.bots = list(bots)
+        self.options = dict(
+            buy_amount=buy_amount, sell_delay=sell_delay, sell_percent=sell_percent,
+            order_mode=order_mode, hedge_delay=hedge_delay, rate=rate, burst=burst,
+            exit_rules=exit_rules, price_source=price_source,
+        )
+        start = records[0]["ts"] - 1 if records else 0.0
+        self.clock = VirtualClock(start)
+        self.client = FakeClient(self.clock, latency=send_latency, fail=fail)
+        self.tracker = LatencyTracker(clock=self.clock.time)
+        self.dedup = DedupService(clock=self.clock.time, timer=self.clock.time)
+        self.pipeline = None
+        self.ingest = None
+
+    def _dispatch(self, record, tasks):
+        if record["feed"] == "nlf":
+            frame = record["frame"]
+            raw = frame if isinstance(frame, str) else json.dumps(frame)
+            coro = self.pipeline.handle_nlf_frame(raw, record.get("source", "replay"))
+        else:
+            date = datetime.fromtimestamp(record.get("date", record["ts"]), timezone.utc)
+            message = FakeMessage(record.get("message_id", 0), record["text"], date, record.get("chat_id"))
+            # 실제 피드와 같은 경로 (메시지 중복 제거, 채널별 사전 필터, 채널 통계)
+            coro = self.ingest.handle_message(record.get("chat_id"), message)
+        tasks.append(asyncio.get_running_loop().create_task(coro))
+
+    async def _run(self, sells_path):
+        self.pipeline = build_pipeline(
+            self.client.send_message, self.bots, self.dedup, sells_path,
+            tracker=self.tracker, clock=self.clock.time, monotonic=self.clock.time, **self.options,
+        )
+        self.ingest = TelegramIngest(self.pipeline, clock=self.clock.time)
+        loop = asyncio.get_running_loop()
+        workers = [
+            loop.create_task(self.pipeline.outbound.run()),
+            loop.create_task(self.pipeline.sell_scheduler.run()),
+            loop.create_task(self.pipeline.exit_engine.run()),
+        ]
+        tasks = []
+        for record in self.records:
+            loop.call_at(record["ts"] - self.clock.start, self._dispatch, record, tasks)
+
+        # 마지막 메시지 이후 자동 매도(재시도 포함)가 모두 끝날 때까지 가상 시간을 진행
+        if self.records:
+            hold = max([self.options["sell_delay"]] + [r.after for r in self.options["exit_rules"] or () if isinstance(r, TimeExit)])
+            horizon = self.records[-1]["ts"] + hold + 300
+            await asyncio.sleep(max(0.0, horizon - self.clock.time()))
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def run(self):
+        """재생을 실행하고 결과 보고서(dict)를 반환합니다."""
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory() as tmp:
+            run_virtual(self._run(os.path.join(tmp, "replay.sells.json")), self.clock)
+        wall = time.perf_counter() - started
+        return self.report(wall)
+
+    def extraction_accuracy(self):
+        """expect_ca가 지정된 텔레그램 메시지에 대한 추출 정확도"""
+        checked, missed, false_positive, wrong = 0, [], [], []
+        for record in self.records:
+            if record["feed"] != "telegram" or "expect_ca" not in record:
+                continue
+            checked += 1
+            result = extract_ca(record["text"])
+            got = result[0] if result else None
+            expected = record["expect_ca"]
+            if expected and not got:
+                missed.append(record.get("message_id"))
+            elif got and not expected:
+                false_positive.append(record.get("message_id"))
+            elif got and got.lower() != expected.lower():
+                wrong.append(record.get("message_id"))
+        return {
+            "checked": checked,
+            "correct": checked - len(missed) - len(false_positive) - len(wrong),
+            "missed": missed,
+            "false_positive": false_positive,
+            "wrong": wrong,
+        }
+
+    def report(self, wall):
+        buys = [s for s in self.client.sent if s["text"].startswith("/buy")]
+        sells = [s for s in self.client.sent if s["text"].startswith("/sell")]
+        span = (self.records[-1]["ts"] - self.records[0]["ts"]) if self.records else 0.0
+        return {
+            "records": len(self.records),
+            "telegram": sum(1 for r in self.records if r["feed"] != "nlf"),
+            "nlf": sum(1 for r in self.records if r["feed"] == "nlf"),
+            "buys": buys,
+            "sells": sells,
+            "pending_sells": len(self.pipeline.sell_scheduler.pending()) if self.pipeline else 0,
+            "open_positions": len(self.pipeline.exit_engine.ledger.open_positions) if self.pipeline else 0,
+            "races": self.dedup.race_summary(),
+            "channels": self.ingest.summary() if self.ingest else {},
+            "extraction": self.extraction_accuracy(),
+            "traffic_span_seconds": span,
+            "wall_seconds": round(wall, 4),
+            "messages_per_sec": round(len(self.records) / wall, 1) if wall > 0 else None,
+            "latency": self.tracker.snapshot(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded traffic through the pipeline on a virtual clock")
+    parser.add_argument("records", help="JSONL file with recorded Telegram messages / NLF frames")
+    parser.add_argument("--bots", default=DEFAULT_BOT, help="comma-separated execution bots")
+    parser.add_argument("--buy-amount", type=float, default=0.1)
+    parser.add_argument("--sell-delay", type=float, default=900, help="auto-sell delay in seconds")
+    parser.add_argument("--sell-percent", type=float, default=100)
+    parser.add_argument("--exit-rules", default=None, help="exit rules, e.g. 'time:5m:50,time:15m:100' (default: sell delay/percent)")
+    parser.add_argument("--send-latency-ms", type=float, default=50, help="simulated send latency")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='[%(levelname) 5s/%(asctime)s] %(name)s: %(message)s',
+                        level=logging.INFO if args.verbose else logging.WARNING)
+
+    engine = ReplayEngine(
+        load_records(args.records),
+        bots=[b.strip() for b in args.bots.split(",") if b.strip()],
+        buy_amount=args.buy_amount,
+        sell_delay=args.sell_delay,
+        sell_percent=args.sell_percent,
+        send_latency=args.send_latency_ms / 1000,
+        exit_rules=parse_exit_rules(args.exit_rules) if args.exit_rules else None,
+    )
+    report = engine.run()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    extraction = report["extraction"]
+    print(f"records: {report['records']} (telegram {report['telegram']}, nlf {report['nlf']})")
+    print(f"traffic span: {report['traffic_span_seconds']:.1f}s, replayed in {report['wall_seconds']:.3f}s "
+          f"({report['messages_per_sec']} msg/s)")
+    print(f"extraction: {extraction['correct']}/{extraction['checked']} correct "
+          f"(missed {extraction['missed']}, false positive {extraction['false_positive']}, wrong {extraction['wrong']})")
+    print(f"buys: {len(report['buys'])}, sells: {len(report['sells'])}, pending sells: {report['pending_sells']}")
+    for command in report["buys"] + report["sells"]:
+        print(f"  {datetime.fromtimestamp(command['ts'], timezone.utc):%Y-%m-%d %H:%M:%S.%f} -> {command['to']}: {command['text']}")
+    print(f"race wins: {report['races']['wins']}")
+
+
+if __name__ == "__main__":
+    main()
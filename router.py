@@ -0,0 +1,161 @@
+import time
+import asyncio
+import logging
+
+from latency import RollingHistogram
+
+# 지수 이동 평균 가중치 (최근 응답 시간 반영 비율)
+EWMA_ALPHA = 0.3
+
+ORDER_MODES = ("hedge", "all")
+
+
+class BotStats:
+    """실행 봇 하나의 전송 성공률과 응답(ack) 지연 통계"""
+
+    __slots__ = ("bot", "index", "sent", "ok", "failed", "fail_streak", "ewma_ms", "latency")
+
+    def __init__(self, bot, index):
+        self.bot = bot
+        self.index = index  # 설정 순서 (통계가 없을 때의 우선순위)
+        self.sent = 0
+        self.ok = 0
+        self.failed = 0
+        self.fail_streak = 0
+        self.ewma_ms = None
+        self.latency = RollingHistogram()
+
+    def record(self, ok, elapsed_ms):
+        self.sent += 1
+        if ok:
+            self.ok += 1
+            self.fail_streak = 0
+            self.latency.record(elapsed_ms)
+            if self.ewma_ms is None:
+                self.ewma_ms = elapsed_ms
+            else:
+                self.ewma_ms += EWMA_ALPHA * (elapsed_ms - self.ewma_ms)
+        else:
+            self.failed += 1
+            self.fail_streak += 1
+
+    def rank_key(self):
+        # 연속 실패가 적고, 평균 응답이 빠르고, 설정 순서가 앞선 봇이 우선
+        ewma = self.ewma_ms if self.ewma_ms is not None else float("inf")
+        return (self.fail_streak, ewma, self.index)
+
+    def summary(self):
+        return {
+            "sent": self.sent,
+            "ok": self.ok,
+            "failed": self.failed,
+            "ewma_ms": round(self.ewma_ms, 3) if self.ewma_ms is not None else None,
+            "latency_ms": self.latency.summary(),
+        }
+
+
+class OrderRouter:
+    """
+    여러 실행 봇(GMGN, 백업 봇 등)으로 매수 명령을 보내는 라우터.
+    - hedge: 가장 빠른 봇(주 봇)에 먼저 보내고, hedge_delay 안에 확인이 없거나 실패하면 다음 봇에도 보냅니다.
+    - all: 모든 봇에 동시에 보냅니다 (봇마다 별도 지갑으로 매수할 때).
+    봇별 성공률과 응답 지연을 기록해 주 봇을 동적으로 선택합니다.
+    """
+
+    def __init__(self, send, bots, mode="hedge", hedge_delay=0.3, max_rounds=3, retry_delay=1.0):
+        if mode not in ORDER_MODES:
+            raise ValueError(f"지원하지 않는 주문 모드입니다: {mode} (가능: {', '.join(ORDER_MODES)})")
+        if not bots:
+            raise ValueError("실행 봇이 최소 한 개 필요합니다.")
+        self._send = send  # async def send(bot, message) -> 실패 시 예외
+        self.stats = {bot: BotStats(bot, i) for i, bot in enumerate(bots)}
+        self.mode = mode
+        self.hedge_delay = hedge_delay
+        self.max_rounds = max_rounds
+        self.retry_delay = retry_delay
+        self._background = set()
+
+    @property
+    def bots(self):
+        return list(self.stats)
+
+    def ranked(self):
+        """우선순위 순으로 정렬된 봇 목록 (첫 번째가 현재 주 봇)"""
+        return [s.bot for s in sorted(self.stats.values(), key=BotStats.rank_key)]
+
+    @property
+    def primary(self):
+        return self.ranked()[0]
+
+    async def _attempt(self, bot, message, command_desc, on_ack):
+        start = time.perf_counter()
+        try:
+            await self._send(bot, message)
+        except Exception as e:
+            self.stats[bot].record(False, 0)
+            logging.error(f"{command_desc} 전송 실패 (봇 '{bot}'): {e}")
+            return None
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.stats[bot].record(True, elapsed_ms)
+        logging.info(f"봇 ('{bot}')에게 {command_desc} 명령 성공: '{message}' ({elapsed_ms:.1f}ms)")
+        if on_ack:
+            on_ack(bot)
+        return bot
+
+    def _keep(self, task):
+        # 승자가 정해진 뒤에도 남은 전송은 끝까지 진행시키고 통계만 기록합니다.
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _round(self, message, command_desc, on_ack, trace, round_no):
+        order = self.ranked() if self.mode == "hedge" else self.bots
+        pending = set()
+        if trace:
+            trace.mark(f"send_{round_no}")
+
+        if self.mode == "all":
+            pending = {asyncio.create_task(self._attempt(b, message, command_desc, on_ack)) for b in order}
+            queue = []
+        else:
+            queue = list(order)
+            pending.add(asyncio.create_task(self._attempt(queue.pop(0), message, command_desc, on_ack)))
+
+        while pending:
+            timeout = self.hedge_delay if queue else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                bot = task.result()
+                if bot is not None:
+                    for rest in pending:
+                        self._keep(rest)
+                    return bot
+            if queue:
+                # 확인 지연(헤지) 또는 실패 -> 다음 봇에도 전송
+                next_bot = queue.pop(0)
+                if not done:
+                    logging.warning(f"{command_desc}: {self.hedge_delay * 1000:.0f}ms 내 확인 없음, 봇 '{next_bot}'에 헤지 전송")
+                pending.add(asyncio.create_task(self._attempt(next_bot, message, command_desc, on_ack)))
+        return None
+
+    async def dispatch(self, message, command_desc, trace=None, on_ack=None):
+        """
+        메시지를 실행 봇으로 전송하고, 가장 먼저 확인된 봇을 반환합니다 (모두 실패 시 None).
+        on_ack(bot)은 전송이 확인된 모든 봇에 대해 호출됩니다 (늦게 확인된 헤지 전송 포함).
+        """
+        for round_no in range(1, self.max_rounds + 1):
+            bot = await self._round(message, command_desc, on_ack, trace, round_no)
+            if bot is not None:
+                if trace:
+                    trace.mark("ack")
+                return bot
+            logging.error(f"{command_desc} 전송 실패 (시도 {round_no}/{self.max_rounds}): 모든 봇 실패")
+            if round_no < self.max_rounds:
+                await asyncio.sleep(self.retry_delay)
+        return None
+
+    def summary(self):
+        return {
+            "mode": self.mode,
+            "primary": str(self.primary),
+            "bots": {str(bot): s.summary() for bot, s in self.stats.items()},
+        }
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+
+# 매도 전송이 실패했을 때 다시 시도하기까지의 대기 시간 (초)
+RETRY_DELAY_SECONDS = 60
+# 예약 매도 하나당 최대 전송 시도 횟수 (send_message_with_retry 호출 단위)
+MAX_SELL_ATTEMPTS = 3
+# 예약 기록 파일이 이 줄 수를 넘고 대기 중인 예약의 두 배보다 커지면 대기 중인 예약만 남기고 다시 씀
+COMPACT_MIN_LINES = 256
+
+
+class SellOrder:
+    """예약된 자동 매도 한 건"""
+
+    __slots__ = ("id", "ca", "due", "percent", "created", "attempts", "bot")
+
+    def __init__(self, id, ca, due, percent, created, attempts=0, bot=None):
+        self.id = id
+        self.ca = ca
+        self.due = due  # 실행 시각 (epoch 초)
+        self.percent = percent
+        self.created = created
+        self.attempts = attempts
+        self.bot = bot  # 매수를 실행한 봇 (None이면 기본 봇)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SellScheduler:
+    """
+    모든 자동 매도를 하나의 타이머 루프(힙)로 관리하는 스케줄러.
+    예약 목록의 변경(예약/재예약/완료/취소)은 파일에 한 줄씩 덧붙여 기록하고 (변경 하나당 O(1)),
+    기록이 쌓이면 대기 중인 예약만 남기도록 원자적으로 다시 씁니다. 시작 시 복원되어 다시 예약됩니다.
+    실행 시각이 지난 매도는 복원 즉시 실행됩니다.
+    """
+
+    def __init__(self, path, send, clock=time.time):
+        self.path = path
+        self._send = send  # async def send(order) -> bool
+        self._clock = clock
+        self._orders = {}
+        self._heap = []
+        self._ids = itertools.count(1)
+        self._wakeup = asyncio.Event()
+        self._inflight = set()
+        self._log_lines = 0  # 예약 기록 파일의 줄 수
+
+    # --- 영구 저장 ---
+    def load(self):
+        """파일에 저장된 예약 매도를 복원합니다."""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            logging.error(f"자동 매도 예약 파일 로드 실패 ({self.path}): {e}")
+            return 0
+        if text.lstrip().startswith("["):
+            try:
+                rows = json.loads(text)  # 이전 형식 (전체 목록 JSON)
+            except ValueError as e:
+                logging.error(f"자동 매도 예약 파일 로드 실패 ({self.path}): {e}")
+                return 0
+            for row in rows:
+                self._orders[row["id"]] = SellOrder(**row)
+        else:
+            for line in text.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 비정상 종료로 잘린 마지막 줄
+                if "put" in record:
+                    self._orders[record["put"]["id"]] = SellOrder(**record["put"])
+                else:
+                    self._orders.pop(record.get("del"), None)
+        for order in self._orders.values():
+            heapq.heappush(self._heap, (order.due, order.id))
+        if self._orders:
+            self._ids = itertools.count(max(self._orders) + 1)
+            overdue = sum(1 for o in self._orders.values() if o.due <= self._clock())
+            logging.info(f"자동 매도 예약 {len(self._orders)}건 복원됨 (실행 시각 경과 {overdue}건은 즉시 실행)")
+        self._compact()
+        self._wakeup.set()
+        return len(self._orders)
+
+    def _compact(self):
+        """대기 중인 예약만 남기고 기록 파일을 원자적으로 다시 씁니다."""
+        lines = [json.dumps({"put": o.to_dict()}) + "\n" for o in sorted(self._orders.values(), key=lambda o: o.id)]
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+            os.replace(tmp_path, self.path)
+            self._log_lines = len(lines)
+        except OSError as e:
+            logging.error(f"자동 매도 예약 파일 저장 실패 ({self.path}): {e}")
+
+    def _append(self, record):
+        """변경 하나를 기록 파일에 덧붙입니다."""
+        if self._log_lines >= COMPACT_MIN_LINES and self._log_lines > 2 * len(self._orders):
+            self._compact()  # 이미 반영된 상태를 다시 쓰므로 이번 변경도 포함됨
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            self._log_lines += 1
+        except OSError as e:
+            logging.error(f"자동 매도 예약 파일 저장 실패 ({self.path}): {e}")
+
+    def _save_order(self, order):
+        self._append({"put": order.to_dict()})
+
+    def _delete_order(self, order_id):
+        self._append({"del": order_id})
+
+    # --- 예약 관리 ---
+    def schedule(self, ca, delay, percent, bot=None):
+        """delay초 후 ca를 percent% 매도하도록 예약합니다. bot은 매수를 실행한 봇입니다."""
+        now = self._clock()
+        order = SellOrder(next(self._ids), ca, now + delay, percent, now, bot=bot)
+        self._orders[order.id] = order
+        heapq.heappush(self._heap, (order.due, order.id))
+        self._save_order(order)
+        self._wakeup.set()
+        logging.info(f"자동 매도 예약됨: {ca} ({delay}초 후)")
+        return order
+
+    def cancel(self, ca_or_id):
+        """예약 ID 또는 CA로 대기 중인 매도를 취소합니다. 취소된 건수를 반환합니다."""
+        if isinstance(ca_or_id, int):
+            targets = [ca_or_id] if ca_or_id in self._orders else []
+        else:
+            key = ca_or_id.lower()
+            targets = [o.id for o in self._orders.values() if o.ca.lower() == key]
+        for order_id in targets:
+            order = self._orders.pop(order_id)
+            self._delete_order(order_id)
+            logging.info(f"자동 매도 취소됨: {order.ca}")
+        return len(targets)
+
+    def pending(self):
+        """대기 중인 예약 매도 목록 (실행 시각 순)"""
+        return sorted(self._orders.values(), key=lambda o: o.due)
+
+    # --- 타이머 루프 ---
+    async def run(self):
+        """실행 시각이 된 매도를 전송하는 단일 타이머 루프"""
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+            while self._heap:
+                due, order_id = self._heap[0]
+                order = self._orders.get(order_id)
+                if order is None or order.due != due:
+                    heapq.heappop(self._heap)  # 취소되었거나 재예약된 항목
+                    continue
+                if due > now:
+                    break
+                heapq.heappop(self._heap)
+                task = asyncio.create_task(self._fire(order))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            timeout = max(0.0, self._heap[0][0] - now) if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, order):
+        order.attempts += 1
+        logging.info(f"자동 매도 실행: /sell {order.ca} {order.percent}%")
+        try:
+            ok = await self._send(order)
+        except Exception as e:
+            logging.error(f"자동 매도 실패 ({order.ca}): {e}")
+            ok = False
+
+        if order.id not in self._orders:
+            return  # 전송 중 취소됨
+        if ok or order.attempts >= MAX_SELL_ATTEMPTS:
+            if not ok:
+                logging.error(f"자동 매도 포기 ({order.ca}): {order.attempts}회 실패")
+            del self._orders[order.id]
+            self._delete_order(order.id)
+        else:
+            order.due = self._clock() + RETRY_DELAY_SECONDS
+            heapq.heappush(self._heap, (order.due, order.id))
+            self._save_order(order)
+            logging.warning(f"자동 매도 재시도 예약 ({order.ca}): {RETRY_DELAY_SECONDS}초 후")
+            self._wakeup.set()
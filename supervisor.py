@@ -0,0 +1,229 @@
+"""슈퍼바이저 모드: 계정/지갑마다 워커 프로세스(main.py)를 실행하고 재시작하며 지연 시간 메트릭을 통합합니다."""
+import os
+import sys
+import json
+import time
+import signal
+import asyncio
+import logging
+
+from dotenv import dotenv_values
+
+from broker import Broker, is_tcp_address
+from config import ENV_PATH
+from latency import LatencyTracker
+
+DEFAULT_BROKER_ADDRESS = "alpha_sniper.broker.sock"
+
+# 워커 재시작 대기 (초): 짧게 시작해 두 배씩 늘리고, 오래 정상 실행된 뒤 종료되면 초기화
+RESTART_DELAY_INITIAL = 1.0
+RESTART_DELAY_MAX = 30.0
+STABLE_AFTER_SECONDS = 60.0
+
+# 종료 시 워커가 스스로 끝나기를 기다리는 시간 (초)
+STOP_TIMEOUT = 10.0
+
+
+class WorkerSpec:
+    """설정 파일의 워커 항목 하나"""
+
+    __slots__ = ("name", "account", "env", "cpu")
+
+    def __init__(self, name, account, env, cpu=None):
+        self.name = name
+        self.account = account
+        self.env = env
+        self.cpu = cpu  # 고정할 CPU 코어 번호 (None이면 고정하지 않음)
+
+
+def load_supervisor_config(path):
+    """
+    슈퍼바이저 설정(JSON)을 읽습니다.
+    {
+      "broker": "alpha_sniper.broker.sock",      # Unix 소켓 경로 또는 host:port
+      "state_dir": ".",                          # 계정별 공유 중복 방지 기록 저장 위치
+      "metrics_port": 0,                         # 통합 메트릭 서버 포트 (0이면 비활성화)
+      "accounts": {"main": {"max_positions": 5, "max_exposure": 0.5}},
+      "workers": [{"name": "main", "cpu": 1, "account": "main", "env": {"SESSION_NAME": "main", ...}}]
+    }
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    workers = []
+    for item in data.get("workers", []):
+        env = {str(k): str(v) for k, v in (item.get("env") or {}).items()}
+        name = item["name"]
+        account = item.get("account") or env.get("SESSION_NAME") or name
+        workers.append(WorkerSpec(name, account, env, item.get("cpu")))
+    if not workers:
+        raise ValueError(f"{path}: workers 항목이 비어 있습니다.")
+    names = [w.name for w in workers]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: 워커 이름이 중복되었습니다: {names}")
+    return {
+        "broker": data.get("broker", DEFAULT_BROKER_ADDRESS),
+        "state_dir": data.get("state_dir", "."),
+        "metrics_port": int(data.get("metrics_port", 0)),
+        "metrics_dump_seconds": float(data.get("metrics_dump_seconds", 60)),
+        "accounts": data.get("accounts", {}),
+        "workers": workers,
+    }
+
+
+def worker_command():
+    """워커 프로세스 실행 명령 (PyInstaller 실행 파일이면 자기 자신)"""
+    if getattr(sys, "frozen", False):
+        return [sys.executable]
+    return [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")]
+
+
+def worker_control_address(address, index, name):
+    """
+    워커별 제어 API 주소. 모든 워커가 같은 .env를 읽으므로 그대로 쓰면 두 번째 워커부터 바인딩에 실패하거나
+    (TCP) 앞 워커의 소켓 파일을 지웁니다 (Unix 소켓). TCP는 포트에 워커 순번을 더하고, Unix 소켓은 파일 이름에 워커 이름을 붙입니다.
+    """
+    if not address:
+        return ""
+    if is_tcp_address(address):
+        host, port = address.rsplit(":", 1)
+        return address if int(port) == 0 else f"{host}:{int(port) + index}"
+    root, ext = os.path.splitext(address)
+    return f"{root}.{name}{ext}"
+
+
+class WorkerState:
+    __slots__ = ("spec", "process", "started", "restarts", "last_exit")
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.process = None
+        self.started = None
+        self.restarts = 0
+        self.last_exit = None
+
+
+class Supervisor:
+    """워커 프로세스를 실행/재시작하고, 공유 브로커와 통합 메트릭 서버를 운영합니다."""
+
+    def __init__(self, config, command=None, broker=None, env_path=ENV_PATH):
+        self.config = config
+        self.command = command or worker_command()
+        self.broker = broker or Broker(state_dir=config["state_dir"])
+        for account, caps in config["accounts"].items():
+            self.broker.configure(account, caps.get("max_positions"), caps.get("max_exposure"))
+        self.workers = [WorkerState(spec) for spec in config["workers"]]
+        # 제어 API 주소: 워커 env에 지정했으면 그대로, 아니면 공통 설정(.env/환경 변수)에서 워커별로 나눔
+        base = {**dotenv_values(env_path), **os.environ}.get("CONTROL_ADDRESS", "")
+        self.control_addresses = {
+            spec.name: spec.env.get("CONTROL_ADDRESS", worker_control_address(base, index, spec.name))
+            for index, spec in enumerate(config["workers"])
+        }
+        used = [address for address in self.control_addresses.values() if address and not address.endswith(":0")]
+        if len(set(used)) != len(used):
+            raise ValueError(f"워커의 제어 API 주소가 중복되었습니다: {self.control_addresses}")
+        self.tracker = LatencyTracker()
+        self.tracker.register_section("broker", self.broker.status)
+        self.tracker.register_section("processes", self.summary)
+        self._stopping = asyncio.Event()
+
+    def worker_env(self, spec):
+        env = dict(os.environ)
+        env.update(spec.env)
+        env["ALPHASNIPER_WORKER"] = spec.name
+        env["ALPHASNIPER_ACCOUNT"] = spec.account
+        env["ALPHASNIPER_BROKER"] = self.config["broker"]
+        env["CONTROL_ADDRESS"] = self.control_addresses[spec.name]
+        # 통합 메트릭은 슈퍼바이저가 제공하므로 워커 env에 따로 지정한 경우에만 워커 메트릭 서버를 염
+        env["METRICS_PORT"] = spec.env.get("METRICS_PORT", "0")
+        return env
+
+    @staticmethod
+    def pin(pid, cpu):
+        """프로세스를 지정한 CPU 코어에 고정합니다 (리눅스 전용)."""
+        if cpu is None:
+            return
+        if not hasattr(os, "sched_setaffinity"):
+            logging.warning(f"이 운영체제에서는 CPU 고정을 지원하지 않습니다 (pid {pid}, cpu {cpu}).")
+            return
+        try:
+            os.sched_setaffinity(pid, {int(cpu)})
+        except OSError as e:
+            logging.warning(f"CPU 고정 실패 (pid {pid}, cpu {cpu}): {e}")
+
+    async def run_worker(self, state):
+        spec = state.spec
+        delay = RESTART_DELAY_INITIAL
+        while not self._stopping.is_set():
+            state.process = await asyncio.create_subprocess_exec(*self.command, env=self.worker_env(spec))
+            state.started = time.monotonic()
+            self.pin(state.process.pid, spec.cpu)
+            logging.info(f"워커 시작: {spec.name} (계정 {spec.account}, pid {state.process.pid}, cpu {spec.cpu})")
+            state.last_exit = await state.process.wait()
+            if self._stopping.is_set():
+                break
+            if time.monotonic() - state.started >= STABLE_AFTER_SECONDS:
+                delay = RESTART_DELAY_INITIAL
+            state.restarts += 1
+            logging.warning(f"워커 종료: {spec.name} (코드 {state.last_exit}), {delay:.0f}초 후 재시작")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, RESTART_DELAY_MAX)
+
+    async def stop(self):
+        """모든 워커에 종료 신호를 보내고 끝날 때까지 기다립니다."""
+        self._stopping.set()
+        running = [s.process for s in self.workers if s.process is not None and s.process.returncode is None]
+        for process in running:
+            process.terminate()
+        for process in running:
+            try:
+                await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                process.kill()
+
+    def summary(self):
+        return {
+            s.spec.name: {
+                "account": s.spec.account,
+                "pid": s.process.pid if s.process else None,
+                "running": s.process is not None and s.process.returncode is None,
+                "restarts": s.restarts,
+                "last_exit": s.last_exit,
+            }
+            for s in self.workers
+        }
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, lambda: asyncio.create_task(self.stop()))
+
+        server = await self.broker.serve(self.config["broker"])
+        if self.config["metrics_port"]:
+            await self.tracker.serve_metrics("127.0.0.1", self.config["metrics_port"])
+        dump = None
+        if self.config["metrics_dump_seconds"] > 0:
+            dump = asyncio.create_task(self.tracker.dump_periodically(self.config["metrics_dump_seconds"]))
+        try:
+            await asyncio.gather(*(self.run_worker(state) for state in self.workers))
+        finally:
+            if dump is not None:
+                dump.cancel()
+            server.close()
+            logging.info("모든 워커가 종료되었습니다.")
+
+
+def run_supervisor(path):
+    logging.info(f"슈퍼바이저 모드: {path}")
+    supervisor = Supervisor(load_supervisor_config(path))
+    try:
+        asyncio.run(supervisor.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format='[%(levelname) 5s/%(asctime)s] %(name)s: %(message)s', level=logging.INFO)
+    run_supervisor(sys.argv[1] if len(sys.argv) > 1 else "workers.json")
@@ -0,0 +1,100 @@
+"""
+Tests for gap recovery after restarts and reconnects (backfill.py)
+"""
+import os
+import asyncio
+import tempfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from backfill import Backfill, CursorStore
+from extractors import extract_all_cas
+from ingest import TelegramIngest
+
+CHAT = -1001234567890
+NOW = 1765540800.0
+
+
+def listing(ca_suffix):
+    return f"https://www.binance.com/en/binancewallet/0x{ca_suffix * 40}/bsc"
+
+
+class FakeChannelClient:
+    def __init__(self, messages):
+        self.messages = messages  # 오래된 것부터
+        self.requests = []
+        self._sender = SimpleNamespace(_auto_reconnect_callback=None)
+
+    async def get_messages(self, entity, limit=None, min_id=0):
+        self.requests.append((entity, limit, min_id))
+        newer = [m for m in self.messages if m.id > min_id]
+        return list(reversed(newer))[:limit]
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.buys = []
+
+    async def handle_message(self, event, text=None, edited=False):
+        found = extract_all_cas(text)
+        self.buys += [(event.message.id, ca) for ca, _ in found]
+        return found
+
+
+def message(id, text, age):
+    return SimpleNamespace(id=id, text=text, date=datetime.fromtimestamp(NOW - age, timezone.utc))
+
+
+def test_restart_catches_up_fresh_messages_only():
+    client = FakeChannelClient([message(1, "old chatter", 3600)])
+    pipeline = RecordingPipeline()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cursors.json")
+        cursors = CursorStore(path)
+        ingest = TelegramIngest(pipeline, clock=lambda: NOW)
+        ingest.cursors = cursors
+        backfill = Backfill(client, ingest, cursors, {CHAT: "@feed"}, max_age=120, clock=lambda: NOW)
+
+        # 처음 보는 채널은 위치만 기록 (과거 메시지는 매수하지 않음)
+        assert asyncio.run(backfill.catch_up()) == 0
+        assert cursors.get(CHAT) == 1 and pipeline.buys == []
+
+        # 연결이 끊긴 동안 올라온 메시지: 오래된 리스팅은 건너뛰고, 최근 것은 순서대로 처리
+        client.messages += [message(2, listing("a"), 600), message(3, "chatter", 60),
+                            message(4, listing("b"), 30), message(5, listing("c"), 5)]
+        reloaded = CursorStore(path)
+        assert reloaded.load() == 1
+        ingest.cursors = reloaded
+        backfill = Backfill(client, ingest, reloaded, {CHAT: "@feed"}, max_age=120, clock=lambda: NOW)
+        assert asyncio.run(backfill.catch_up()) == 3
+        assert client.requests[-1] == ("@feed", 100, 1)
+        assert pipeline.buys == [(4, f"0x{'b' * 40}"), (5, f"0x{'c' * 40}")]
+        assert reloaded.get(CHAT) == 5
+        summary = backfill.summary()
+        assert summary["stale"] == 1 and summary["stale_listings"] == 1 and summary["processed"] == 3
+        assert ingest.summary()[str(CHAT)]["backfilled"] == 3
+
+        # 실시간으로 이미 받은 메시지는 다시 처리하지 않음
+        assert asyncio.run(backfill.catch_up()) == 0
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == f'{{"{CHAT}": 5}}'
+
+
+def test_reconnect_hook_runs_catch_up():
+    client = FakeChannelClient([message(7, "chatter", 1)])
+    cursors = CursorStore()
+    cursors.advance(CHAT, 6)
+    calls = []
+
+    async def original():
+        calls.append("get_me")
+
+    client._sender._auto_reconnect_callback = original
+    ingest = TelegramIngest(RecordingPipeline())
+    ingest.cursors = cursors
+    backfill = Backfill(client, ingest, cursors, {CHAT: "@feed"}, clock=lambda: NOW)
+    assert backfill.attach(client)
+    asyncio.run(client._sender._auto_reconnect_callback())
+    assert calls == ["get_me"]
+    assert backfill.last_run["reason"] == "reconnect" and cursors.get(CHAT) == 7
+    assert not Backfill(object(), None, cursors).attach(object())
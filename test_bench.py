@@ -0,0 +1,39 @@
+"""
+Tests for the end-to-end pipeline benchmark (bench_pipeline.py)
+"""
+import asyncio
+from types import SimpleNamespace
+
+from bench_pipeline import COMPARED_METRICS, compare, run_all
+
+
+def small_args(**overrides):
+    args = dict(duration=0.2, rate=200, nlf_rate=100, listing_every=10, burst=4, positions=5, send_latency_ms=1)
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+
+def test_scenarios_report_metrics():
+    results = asyncio.run(run_all(small_args(), ["telegram", "listing_burst", "auto_sell"]))
+    assert results["telegram"]["messages"] == 40
+    assert results["telegram"]["buys"] == 4
+    assert results["listing_burst"]["buys"] == 4  # 텔레그램/NLF 중복은 한 번만 매수
+    assert results["auto_sell"]["sells"] == 10
+    for metrics in results.values():
+        assert metrics["throughput_per_sec"] > 0
+        assert metrics["loop_lag_p99_ms"] is not None
+        assert "rss_growth_kb" in metrics
+
+
+def test_nlf_websocket_scenario():
+    result = asyncio.run(run_all(small_args(), ["nlf_websocket"]))["nlf_websocket"]
+    assert result["frames"] == 40  # 연결 2개 x 20 프레임
+    assert result["buys"] == 2
+    assert result["duplicates"] == 2
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"telegram": {"throughput_per_sec": 1000.0, "ack_p99_ms": 30.0}}}
+    current = {"telegram": {"throughput_per_sec": 950.0, "ack_p99_ms": 45.0}}
+    assert set(COMPARED_METRICS) >= {"throughput_per_sec", "ack_p99_ms"}
+    assert compare(current, baseline, threshold=20) == ["telegram.ack_p99_ms"]
@@ -0,0 +1,158 @@
+"""
+Tests for the multi-process coordination broker (broker.py) and supervisor (supervisor.py)
+"""
+import os
+import sys
+import json
+import asyncio
+import tempfile
+
+from broker import Broker, BrokerClient
+from dedup import DedupService
+from pipeline import build_pipeline
+from supervisor import Supervisor, load_supervisor_config, worker_control_address
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+CA2 = "0x8f3a1d2b4c5e6f708192a3b4c5d6e7f8091a2b3c"
+CA3 = "0x1111111111111111111111111111111111111111"
+
+
+def test_claims_are_per_account_and_capped():
+    broker = Broker()
+    broker.configure("main", max_positions=2, max_exposure=0.25)
+    assert broker.claim("main", CA, "w1/nlf", 0.1) == "ok"
+    assert broker.claim("main", CA.upper().replace("0X", "0x"), "w2/nlf", 0.1) == "duplicate"
+    assert broker.claim("wallet2", CA, "w3/nlf", 0.1) == "ok"  # 다른 계정은 따로 매수
+    assert broker.claim("main", CA2, "w1/nlf", 0.2) == "max_exposure"
+    assert broker.claim("main", CA2, "w1/nlf", 0.1) == "ok"
+    assert broker.claim("main", CA3, "w1/nlf", 0.01) == "max_positions"
+
+    broker.confirm("main", CA)
+    broker.close("main", CA)  # 매도 완료 -> 포지션 슬롯 반환, 재매수는 계속 차단
+    assert broker.claim("main", CA, "w2/nlf", 0.1) == "duplicate"
+    assert broker.claim("main", CA3, "w1/nlf", 0.01) == "ok"
+    assert broker.status()["accounts"]["main"]["denied"] == {"duplicate": 2, "max_exposure": 1, "max_positions": 1}
+
+
+def test_workers_share_dedup_over_unix_socket():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            address = os.path.join(tmp, "broker.sock")
+            broker = Broker()
+            server = await broker.serve(address)
+            sent = []
+
+            def make_worker(name):
+                async def send(target, message, **kwargs):
+                    sent.append((name, message))
+                pipeline = build_pipeline(send, ["@bot"], DedupService(), os.path.join(tmp, f"{name}.sells.json"),
+                                          buy_amount=0.1, sell_delay=900, sell_percent=100, rate=0)
+                pipeline.broker = BrokerClient(address, name, "main")
+                return pipeline
+
+            workers = [make_worker("w1"), make_worker("w2")]
+            tasks = [asyncio.create_task(p.outbound.run()) for p in workers]
+            frame = json.dumps({"exchange": "binance", "type": "alpha",
+                                "detections": [{"onchain": {"chain": "bsc", "contract": CA}}]})
+            await asyncio.gather(*(p.handle_nlf_frame(frame, "ws") for p in workers))
+            assert len(sent) == 1
+            assert broker.status()["accounts"]["main"]["buys"] == 1
+
+            await workers[0].broker.request("report", metrics={"nlf:ws": {"ack": {"count": 1, "p50": 2.0, "p99": 5.0}}})
+            await workers[1].broker.request("report", metrics={"nlf:ws": {"ack": {"count": 3, "p50": 1.0, "p99": 9.0}}})
+            assert broker.aggregate_latency()["nlf:ws"]["ack"] == {"count": 4, "p50": 2.0, "p99": 9.0}
+
+            for task in tasks:
+                task.cancel()
+            server.close()
+    asyncio.run(run())
+
+
+def test_unreachable_broker_does_not_block_buys():
+    async def run():
+        client = BrokerClient("/nonexistent/broker.sock", "w1", "main")
+        assert await client.claim(CA, "nlf", 0.1) == "ok"
+        assert client.errors == 1
+    asyncio.run(run())
+
+
+def test_slow_claim_is_not_resent():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            received = []
+
+            async def slow_broker(reader, writer):
+                while line := await reader.readline():
+                    received.append(json.loads(line)["op"])
+                    await asyncio.sleep(0.2)  # 선점은 기록했지만 응답이 늦음
+                    writer.write(b'{"verdict": "ok"}\n')
+
+            address = os.path.join(tmp, "broker.sock")
+            server = await asyncio.start_unix_server(slow_broker, address)
+            client = BrokerClient(address, "w1", "main", timeout=0.05)
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            assert await client.claim(CA, "nlf", 0.1) == "ok"  # 다시 보내면 'duplicate'를 받을 수 있으므로 바로 fail-open
+            assert loop.time() - started < 0.1
+            assert received == ["claim"] and client.errors == 1
+            server.close()
+    asyncio.run(run())
+
+
+def test_supervisor_config_and_worker_restart():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "workers.json")
+            with open(path, "w") as f:
+                json.dump({"broker": os.path.join(tmp, "b.sock"), "state_dir": tmp, "metrics_dump_seconds": 0,
+                           "accounts": {"main": {"max_positions": 1}},
+                           "workers": [{"name": "w1", "env": {"SESSION_NAME": "main"}}]}, f)
+            config = load_supervisor_config(path)
+            assert config["workers"][0].account == "main"
+
+            out = os.path.join(tmp, "env.txt")
+            script = f"import os; open({out!r}, 'a').write(os.environ['ALPHASNIPER_WORKER'] + ' ' + os.environ['ALPHASNIPER_ACCOUNT'] + '\\n')"
+            supervisor = Supervisor(config, command=[sys.executable, "-c", script])
+            assert supervisor.broker.account("main").max_positions == 1
+            runner = asyncio.create_task(supervisor.run())
+            await asyncio.sleep(1.5)  # 워커가 바로 종료 -> 1초 후 재시작
+            await supervisor.stop()
+            await asyncio.wait_for(runner, 5)
+            with open(out) as f:
+                lines = f.read().splitlines()
+            assert lines[:2] == ["w1 main", "w1 main"]
+            assert supervisor.summary()["w1"]["restarts"] >= 1
+    asyncio.run(run())
+
+
+def test_workers_get_their_own_control_address():
+    with tempfile.TemporaryDirectory() as tmp:
+        env_path = os.path.join(tmp, ".env")
+        with open(env_path, "w") as f:
+            f.write("CONTROL_ADDRESS=127.0.0.1:8081\nMETRICS_PORT=9100\n")
+        specs = [{"name": name, "env": {}} for name in ("w1", "w2")] + [{"name": "w3", "env": {"CONTROL_ADDRESS": "/tmp/w3.sock"}}]
+        path = os.path.join(tmp, "workers.json")
+        with open(path, "w") as f:
+            json.dump({"broker": os.path.join(tmp, "b.sock"), "state_dir": tmp, "workers": specs}, f)
+        saved = os.environ.pop("CONTROL_ADDRESS", None)
+        try:
+            supervisor = Supervisor(load_supervisor_config(path), env_path=env_path)
+            envs = [supervisor.worker_env(worker.spec) for worker in supervisor.workers]
+            assert [env["CONTROL_ADDRESS"] for env in envs] == ["127.0.0.1:8081", "127.0.0.1:8082", "/tmp/w3.sock"]
+            assert {env["METRICS_PORT"] for env in envs} == {"0"}  # 통합 메트릭은 슈퍼바이저가 제공
+        finally:
+            if saved is not None:
+                os.environ["CONTROL_ADDRESS"] = saved
+    assert worker_control_address("/run/alpha/control.sock", 1, "w2") == "/run/alpha/control.w2.sock"
+    assert worker_control_address("127.0.0.1:0", 3, "w4") == "127.0.0.1:0"
+    assert worker_control_address("", 1, "w2") == ""
+
+
+if __name__ == "__main__":
+    test_claims_are_per_account_and_capped()
+    test_workers_share_dedup_over_unix_socket()
+    test_unreachable_broker_does_not_block_buys()
+    test_slow_claim_is_not_resent()
+    test_supervisor_config_and_worker_restart()
+    test_workers_get_their_own_control_address()
+    print("✅ broker tests passed")
@@ -0,0 +1,43 @@
+"""
+Tests for environment-based configuration (config.py)
+"""
+from config import Config, parse_entity_list
+
+BASE_ENV = {
+    "API_ID": "12345",
+    "API_HASH": "hash",
+    "SOURCE_BOT_ID": "@NewListingsFeed, -1001234",
+    "TARGET_BOT_ID": "@GMGN_bsc_bot,@backup_bot",
+}
+
+
+def test_entity_lists_are_parsed():
+    assert parse_entity_list("@a, 123 ,,-100") == ["@a", 123, -100]
+    assert parse_entity_list(None) == []
+
+
+def test_config_defaults():
+    config = Config(BASE_ENV).validate()
+    assert config.source_bot_ids == ["@NewListingsFeed", -1001234]
+    assert config.target_bot_id == "@GMGN_bsc_bot"
+    assert config.buy_amount == 0.1
+    assert config.auto_sell_delay_seconds == 900
+    assert config.nlf_enabled is False
+    assert config.nlf_ws_urls == ["wss://tokyo.newlistings.pro/v1/new-listings"]
+
+
+def test_missing_required_values_are_rejected():
+    env = dict(BASE_ENV, TARGET_BOT_ID=" , ")
+    try:
+        Config(env).validate()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("config without target bots should be rejected")
+
+
+if __name__ == "__main__":
+    test_entity_lists_are_parsed()
+    test_config_defaults()
+    test_missing_required_values_are_rejected()
+    print("✅ config tests passed")
@@ -0,0 +1,163 @@
+"""
+Tests for the local control API (control.py)
+"""
+import os
+import json
+import asyncio
+import tempfile
+from functools import partial
+
+from control import ControlServer
+from dedup import DedupService
+from latency import LatencyTracker, Trace
+from pipeline import build_pipeline
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+CA2 = "0x8f3a1d2b4c5e6f708192a3b4c5d6e7f8091a2b3c"
+
+
+async def request(port, method, path, body=None, token=None, headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    headers = dict({"Host": f"127.0.0.1:{port}"}, **(headers or {}))
+    if method == "POST":
+        headers.setdefault("Content-Type", "application/json")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    head = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(f"{method} {path} HTTP/1.1\r\n{head}Content-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    if b"application/json" in head:
+        return status, json.loads(payload)
+    return status, payload.decode()
+
+
+def make_server(tmp, sent, **kwargs):
+    async def send(target, message, **kw):
+        sent.append((target, message))
+    pipeline = build_pipeline(send, ["@bot"], DedupService(), os.path.join(tmp, "sells.json"),
+                              buy_amount=0.1, sell_delay=900, sell_percent=100, rate=0)
+    tracker = LatencyTracker()
+    return pipeline, ControlServer(pipeline, tracker, **kwargs)
+
+
+def test_pause_resume_and_state():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            sent = []
+            pipeline, control = make_server(tmp, sent)
+            outbound = asyncio.create_task(pipeline.outbound.run())
+            server = await control.serve("127.0.0.1:0")
+            request_ = partial(request, server.sockets[0].getsockname()[1], token=control.token)
+
+            status, result = await request_("POST", "/api/pause")
+            assert status == 200 and result["paused"] is True
+            await pipeline.buy(CA, "nlf", Trace("nlf", "test"))
+            assert sent == [] and pipeline.paused_skips == 1 and CA not in pipeline.dedup  # 일시 중지 중에는 선점하지 않음
+
+            await request_("POST", "/api/resume")
+            await pipeline.buy(CA, "nlf", Trace("nlf", "test"))
+            await asyncio.sleep(0.05)
+            assert sent == [("@bot", f"/buy {CA} 0.1")]
+
+            status, state = await request_("GET", "/api/state")
+            assert status == 200 and state["status"]["paused"] is False
+            assert [p["ca"] for p in state["positions"]] == [CA]
+            assert [e["rule"] for e in state["positions"][0]["exits"]] == ["time:900s"]
+            assert state["dedup"]["recent"][0]["ca"] == CA
+            status, html = await request_("GET", "/")
+            assert status == 200 and "/api/state" in html
+
+            outbound.cancel()
+            server.close()
+    asyncio.run(run())
+
+
+def test_manual_sell_cancel_and_config():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            sent = []
+            changes = []
+
+            async def set_sources(sources):
+                changes.append(sources)
+                return sources
+
+            pipeline, control = make_server(tmp, sent, get_sources=lambda: ["@feed"], set_sources=set_sources)
+            tasks = [asyncio.create_task(pipeline.outbound.run()), asyncio.create_task(pipeline.sell_scheduler.run())]
+            server = await control.serve("127.0.0.1:0")
+            request_ = partial(request, server.sockets[0].getsockname()[1], token=control.token)
+            pipeline.exit_engine.open(CA, 0.1, "nlf", bot="@bot")
+            pipeline.sell_scheduler.schedule(CA2, 900, 100, "@bot")
+
+            status, result = await request_("POST", "/api/sell", {"ca": CA, "percent": 50})
+            assert status == 200 and result["positions"] == 1
+            status, result = await request_("POST", "/api/sells/cancel", {"ca": CA2})
+            assert status == 200 and result["cancelled"] == 1
+            status, result = await request_("POST", "/api/sells/cancel", {"ca": CA})  # 남은 시간 청산 규칙 취소
+            assert result == {"cancelled": 0, "exits": 1}
+            await asyncio.sleep(0.05)
+            assert sent == [("@bot", f"/sell {CA} 50.0%")]
+            # 남은 규칙이 없으므로 포지션은 장부에서 닫힘 (남은 50%는 수동 매도)
+            assert pipeline.exit_engine.ledger.open_positions == {}
+            assert pipeline.exit_engine.ledger.history()[0]["remaining"] == 50.0
+
+            status, result = await request_("POST", "/api/config", {"buy_amount": 0.25, "sources": "@a, -100123"})
+            assert status == 200 and pipeline.buy_amount == 0.25
+            assert changes == [["@a", -100123]]
+            for bad in ({"buy_amount": -1}, {"ca": "nope"}, {}):
+                status, result = await request_("POST", "/api/config", bad)
+                assert status == 400 and result["error"]
+            assert (await request_("GET", "/api/nothing"))[0] == 404
+            assert (await request_("GET", "/api/pause"))[0] == 405
+
+            for task in tasks:
+                task.cancel()
+            server.close()
+    asyncio.run(run())
+
+
+def test_token_required_for_api():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            _, control = make_server(tmp, [], token="secret")
+            server = await control.serve(os.path.join(tmp, "control.sock"))
+            assert oct(os.stat(os.path.join(tmp, "control.sock")).st_mode & 0o777) == "0o600"
+            server.close()
+            server = await control.serve("127.0.0.1:0")
+            port = server.sockets[0].getsockname()[1]
+            assert (await request(port, "GET", "/api/state"))[0] == 401
+            assert (await request(port, "GET", "/api/state", token="secret"))[0] == 200
+            server.close()
+    asyncio.run(run())
+
+
+def test_browser_requests_from_other_sites_are_rejected():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            _, control = make_server(tmp, [])
+            server = await control.serve("127.0.0.1:0")
+            port = server.sockets[0].getsockname()[1]
+            token = control.token
+            assert token  # TCP에서는 CONTROL_TOKEN이 없어도 토큰 없이 열지 않음
+            assert (await request(port, "POST", "/api/pause"))[0] == 401
+
+            # DNS 리바인딩: 다른 호스트 이름으로 들어온 요청
+            status, _ = await request(port, "GET", "/", headers={"Host": f"evil.example:{port}"})
+            assert status == 403
+            # 다른 사이트에서 보낸 요청 / text/plain으로 보낸 단순 요청
+            status, _ = await request(port, "POST", "/api/pause", {}, token, {"Origin": "https://evil.example"})
+            assert status == 403
+            status, _ = await request(port, "POST", "/api/pause", {}, token, {"Content-Type": "text/plain"})
+            assert status == 415
+
+            # 대시보드 (같은 로컬 주소)
+            status, result = await request(port, "POST", "/api/pause", {}, token,
+                                           {"Host": f"localhost:{port}", "Origin": f"http://localhost:{port}"})
+            assert status == 200 and result["paused"] is True
+            server.close()
+    asyncio.run(run())
@@ -0,0 +1,109 @@
+"""
+Tests for the shared claim-before-send dedup service (dedup.py)
+"""
+import os
+import time
+import asyncio
+import tempfile
+
+from dedup import DedupService, DedupStore
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+
+
+def test_first_claim_wins_across_feeds():
+    dedup = DedupService()
+    assert dedup.claim(CA, "telegram:1") is True
+    assert dedup.claim(CA.upper().replace("0X", "0x"), "nlf") is False
+    assert CA in dedup
+
+    summary = dedup.race_summary()
+    assert summary["wins"] == {"telegram:1": 1}
+    assert "telegram:1>nlf" in summary["lead_ms"]
+    assert summary["recent"][0]["loser"] == "nlf"
+
+
+def test_release_allows_retry_after_failed_send():
+    dedup = DedupService()
+    assert dedup.claim(CA, "nlf")
+    dedup.release(CA)
+    assert CA not in dedup
+    assert dedup.claim(CA, "telegram:1")
+
+
+def test_same_feed_duplicate_is_not_a_race():
+    dedup = DedupService()
+    dedup.claim(CA, "nlf")
+    assert dedup.claim(CA, "nlf") is False
+    assert dedup.race_summary()["wins"] == {}
+
+
+def test_concurrent_feeds_send_only_once():
+    """두 피드가 거의 동시에 같은 CA를 받아도 매수 명령은 한 번만 전송되어야 합니다."""
+    dedup = DedupService()
+    sent = []
+
+    async def feed(name, delay):
+        await asyncio.sleep(delay)
+        if not dedup.claim(CA, name):
+            return
+        await asyncio.sleep(0.01)  # 전송 지연 동안 다른 피드가 도착
+        sent.append(name)
+        dedup.confirm(CA)
+
+    async def run():
+        await asyncio.gather(feed("telegram:1", 0), feed("nlf", 0.001))
+
+    asyncio.run(run())
+    assert sent == ["telegram:1"]
+
+
+def test_confirmed_claims_survive_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "alpha_sniper.dedup.sqlite")
+        first = DedupService(store=DedupStore(path))
+        assert first.claim(CA, "nlf")
+        first.confirm(CA)
+        assert first.claim("0x" + "1" * 40, "nlf")  # 전송 실패로 확정되지 않은 CA
+        first.store.close()
+
+        second = DedupService(store=DedupStore(path))
+        assert CA in second
+        assert second.claim(CA, "telegram:1") is False
+        assert second.claim("0x" + "1" * 40, "telegram:1") is True
+        # 복원된 기록과의 중복은 피드 경쟁으로 기록하지 않음
+        assert second.race_summary()["wins"] == {}
+        second.store.close()
+
+
+def test_expired_claims_are_not_restored():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "dedup.sqlite")
+        store = DedupStore(path)
+        store.add(CA, "nlf", time.time() - 7200)
+        dedup = DedupService(store=store, ttl=3600)
+        assert CA not in dedup
+        assert dedup.claim(CA, "nlf") is True
+        store.close()
+
+
+def test_max_entries_evicts_oldest():
+    dedup = DedupService(max_entries=3)
+    cas = ["0x" + str(i) * 40 for i in range(5)]
+    for ca in cas:
+        assert dedup.claim(ca, "nlf")
+        dedup.confirm(ca)
+    assert len(dedup) == 3
+    assert cas[0] not in dedup and cas[1] not in dedup
+    assert all(ca in dedup for ca in cas[2:])
+
+
+if __name__ == "__main__":
+    test_first_claim_wins_across_feeds()
+    test_release_allows_retry_after_failed_send()
+    test_same_feed_duplicate_is_not_a_race()
+    test_concurrent_feeds_send_only_once()
+    test_confirmed_claims_survive_restart()
+    test_expired_claims_are_not_restored()
+    test_max_entries_evicts_oldest()
+    print("✅ dedup tests passed")
@@ -0,0 +1,116 @@
+"""
+Tests for the CA extraction engine (extractors.py)
+"""
+import json
+
+from extractors import CAExtractor, SourceFormat, extract_ca, default_extractor
+
+CORPUS = "samples/channel_messages.jsonl"
+
+
+def test_corpus_extraction():
+    with open(CORPUS, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    for row in rows:
+        result = extract_ca(row["text"])
+        if row["ca"] is None:
+            assert result is None, row["text"]
+        else:
+            ca, fmt = result
+            assert ca == row["ca"]
+            assert fmt.name == row["format"]
+
+
+def test_newsbothub_keyword_is_case_insensitive():
+    msg = "Binance EN: $RAVE live on Binance alpha\nsource: 0x97693439ea2f0ecdeb9135881e49f354656a911c (bsc)"
+    ca, fmt = extract_ca(msg)
+    assert fmt.name == "newsbothub"
+    assert ca == "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+
+
+def test_url_has_priority_over_newsbothub():
+    msg = (
+        "$AAA live on Binance alpha\n"
+        "source: 0x1111111111111111111111111111111111111111 (bsc)\n"
+        "https://www.binance.com/en/binancewallet/0x2222222222222222222222222222222222222222/bsc"
+    )
+    ca, fmt = extract_ca(msg)
+    assert fmt.name == "binance_url"
+    assert ca == "0x2222222222222222222222222222222222222222"
+
+
+def test_prefilter_rejects_messages_without_address():
+    assert extract_ca("live on Binance alpha, source: TBA (bsc)") is None
+    assert extract_ca("") is None
+    assert extract_ca(None) is None
+
+
+def test_register_custom_format():
+    extractor = CAExtractor()
+    extractor.register(SourceFormat("custom", "커스텀", r"CA:\s*(0x[a-fA-F0-9]{40})", anchor="CA:"))
+    ca, fmt = extractor.extract("New token CA: 0x3333333333333333333333333333333333333333")
+    assert fmt.name == "custom"
+    assert ca == "0x3333333333333333333333333333333333333333"
+    try:
+        extractor.register(SourceFormat("custom", "중복", r"(0x[a-f0-9]{40})"))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("duplicate format name should be rejected")
+
+
+def test_extract_all_applies_format_gates():
+    extractor = CAExtractor()
+    extractor.register(SourceFormat("url", "URL", r"binancewallet/(0x[a-fA-F0-9]{40})", anchor="binancewallet/"))
+    extractor.register(SourceFormat("bare", "앵커 뒤 주소", r"(0x[a-fA-F0-9]{40})", anchor="contract", priority=1))
+    url = "https://www.binance.com/en/binancewallet/0x2222222222222222222222222222222222222222/bsc"
+    other = "fee wallet 0x1111111111111111111111111111111111111111"
+    # 앵커('contract')가 없으면 bare 포맷의 정규식은 실행하지 않음
+    assert [ca for ca, _ in extractor.extract_all(f"{other}\n{url}")] == ["0x2222222222222222222222222222222222222222"]
+    found = extractor.extract_all(f"{other}\n{url}\ncontract 0x3333333333333333333333333333333333333333")
+    assert [(ca[-4:], fmt.name) for ca, fmt in found] == [("2222", "url"), ("1111", "bare"), ("3333", "bare")]
+
+
+def test_extract_all_scans_each_format_once():
+    class CountingRegex:
+        def __init__(self, regex):
+            self.regex, self.calls = regex, 0
+
+        def search(self, *args):
+            self.calls += 1
+            return self.regex.search(*args)
+
+        def finditer(self, *args):
+            self.calls += 1
+            return self.regex.finditer(*args)
+
+    extractor = CAExtractor()
+    for fmt in default_extractor.formats:
+        extractor.register(SourceFormat(fmt.name, fmt.description, fmt.regex.pattern, anchor=fmt.anchor,
+                                        ignore_case=fmt.ignore_case, keyword=fmt.keyword, priority=fmt.priority))
+    for fmt in extractor.formats:
+        fmt.regex = CountingRegex(fmt.regex)
+    text = ("🔥 Live on Binance Alpha\nsource: 0x1111111111111111111111111111111111111111 (bsc)\n"
+            "https://www.binance.com/en/binancewallet/0x2222222222222222222222222222222222222222/bsc")
+    found = extractor.extract_all(text)
+    assert found[0] == extractor.extract(text) and len(found) == 2  # 첫 항목은 우선순위가 가장 높은 포맷의 결과
+    for fmt in extractor.formats:
+        fmt.regex.calls = 0
+    extractor.extract_all(text)
+    assert [fmt.regex.calls for fmt in extractor.formats] == [1, 1]
+
+
+def test_default_formats_are_registered():
+    assert [f.name for f in default_extractor.formats] == ["binance_url", "newsbothub"]
+
+
+if __name__ == "__main__":
+    test_corpus_extraction()
+    test_newsbothub_keyword_is_case_insensitive()
+    test_url_has_priority_over_newsbothub()
+    test_prefilter_rejects_messages_without_address()
+    test_register_custom_format()
+    test_extract_all_applies_format_gates()
+    test_extract_all_scans_each_format_once()
+    test_default_formats_are_registered()
+    print("✅ extractor tests passed")
@@ -0,0 +1,109 @@
+"""
+Tests for the pre-trade filter (filters.py) and its place in the buy pipeline
+"""
+import os
+import time
+import asyncio
+import tempfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from dedup import DedupService
+from filters import MockChecker, PreTradeFilter, TTLCache, load_ca_list
+from latency import LatencyTracker
+from pipeline import build_pipeline
+from replay import FakeClient, FakeEvent, FakeMessage
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+CA2 = "0x8f3a1d2b4c5e6f708192a3b4c5d6e7f8091a2b3c"
+
+
+def test_lists_and_fast_deny():
+    honeypot = MockChecker({CA2: (False, "honeypot")}, name="honeypot")
+    slow = MockChecker(delay=1.0, name="liquidity")
+    pre_trade = PreTradeFilter([honeypot, slow], budget=0.5, blacklist=[CA.upper()], whitelist=["0xabc"])
+
+    async def scenario():
+        blocked = await pre_trade.evaluate(CA)
+        trusted = await pre_trade.evaluate("0xABC")
+        started = time.perf_counter()
+        denied = await pre_trade.evaluate(CA2)
+        # 하나가 거부하면 느린 검사를 기다리지 않음
+        assert time.perf_counter() - started < 0.2
+        return blocked, trusted, denied
+
+    blocked, trusted, denied = asyncio.run(scenario())
+    assert not blocked.allowed and blocked.reasons == ["blacklist"]
+    assert trusted.allowed and honeypot.calls == 1
+    assert not denied.allowed and denied.reasons == ["honeypot: honeypot"]
+
+
+def test_budget_timeout_default_and_background_cache():
+    slow = MockChecker({CA: (False, "no liquidity")}, delay=0.05, name="liquidity")
+
+    async def scenario(default_allow):
+        pre_trade = PreTradeFilter([slow], budget=0.005, default_allow=default_allow)
+        first = await pre_trade.evaluate(CA)
+        await asyncio.sleep(0.1)  # 늦게 끝난 검사 결과가 캐시에 저장됨
+        second = await pre_trade.evaluate(CA)
+        return pre_trade, first, second
+
+    pre_trade, first, second = asyncio.run(scenario(True))
+    assert first.allowed and first.timed_out == ["liquidity"] and first.elapsed_ms < 40
+    assert not second.allowed and second.reasons == ["liquidity: no liquidity"]
+    assert slow.calls == 1 and pre_trade.cache.hits == 1
+    assert pre_trade.summary()["timeouts"] == {"liquidity": 1}
+
+    _, first, _ = asyncio.run(scenario(False))
+    assert not first.allowed and first.reasons == ["timeout: liquidity"]
+
+
+def test_checker_errors_and_ttl_cache():
+    class Broken(MockChecker):
+        async def check(self, ca):
+            raise RuntimeError("rpc down")
+
+    async def scenario():
+        return await PreTradeFilter([Broken(name="rpc")], default_allow=False).evaluate(CA)
+
+    decision = asyncio.run(scenario())
+    assert not decision.allowed and decision.reasons == ["rpc: error"]
+
+    now = [0.0]
+    cache = TTLCache(max_entries=2, clock=lambda: now[0])
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=10)
+    assert cache.get("a") == 1
+    cache.set("c", 3, ttl=10)  # 가장 오래 사용하지 않은 b 제거
+    assert cache.get("b") is None and cache.get("c") == 3
+    now[0] = 11
+    assert cache.get("a") is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "blacklist.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# rugs\n{CA.upper()}  # team dumped\n\n")
+        assert load_ca_list(path) == {CA}
+        assert load_ca_list(os.path.join(tmp, "missing.txt")) == set()
+
+
+def test_pipeline_skips_denied_listing():
+    client = FakeClient(SimpleNamespace(time=time.time), latency=0)
+    dedup = DedupService()
+
+    async def scenario():
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline = build_pipeline(client.send_message, ["@GMGN_bsc_bot"], dedup, os.path.join(tmp, "sells.json"),
+                                      buy_amount=0.1, sell_delay=900, sell_percent=100, rate=0,
+                                      tracker=LatencyTracker())
+            pipeline.pre_trade = PreTradeFilter([MockChecker({CA: (False, "honeypot")})])
+            worker = asyncio.create_task(pipeline.outbound.run())
+            for i, ca in enumerate((CA, CA2)):
+                text = f"https://www.binance.com/en/binancewallet/{ca}/bsc"
+                message = FakeMessage(i, text, datetime.now(timezone.utc), -100)
+                await pipeline.handle_message(FakeEvent(-100, message))
+            worker.cancel()
+
+    asyncio.run(scenario())
+    assert [s["text"] for s in client.sent] == [f"/buy {CA2} 0.1"]
+    assert CA not in dedup  # 거부된 CA는 선점 해제
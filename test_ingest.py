@@ -0,0 +1,87 @@
+"""
+Tests for Telegram feed ingestion (ingest.py): edits, albums, hidden links, per-channel filters
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from extractors import extract_all_cas
+from ingest import TelegramIngest, message_text, parse_channel_filters
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+CA2 = "0x8f3a1d2b4c5e6f708192a3b4c5d6e7f8091a2b3c"
+CHAT = -1001234567890
+URL = f"https://www.binance.com/en/binancewallet/{CA}/bsc"
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.calls = []
+
+    async def handle_message(self, event, text=None, edited=False):
+        found = extract_all_cas(text)
+        self.calls.append((event.chat_id, event.message.id, edited, [ca for ca, _ in found]))
+        return found
+
+
+def make_message(id, text, posted, edit_date=None, entities=None, reply_markup=None):
+    return SimpleNamespace(id=id, text=text, date=posted, edit_date=edit_date, entities=entities,
+                           reply_markup=reply_markup)
+
+
+def test_placeholder_edit_album_and_duplicates():
+    pipeline = RecordingPipeline()
+    posted = datetime.now(timezone.utc) - timedelta(seconds=2)
+    ingest = TelegramIngest(pipeline)
+
+    async def scenario():
+        placeholder = make_message(1, "🟡 Binance Alpha new listing: 0x... (contract soon)", posted)
+        await ingest.handle(SimpleNamespace(chat_id=CHAT, message=placeholder))
+        filled = make_message(1, f"🟡 Binance Alpha new listing\n{URL}", posted, edit_date=datetime.now(timezone.utc))
+        await ingest.handle(SimpleNamespace(chat_id=CHAT, message=filled))
+        await ingest.handle(SimpleNamespace(chat_id=CHAT, message=filled))  # 같은 내용의 수정 이벤트 재전달
+        await ingest.handle_album(SimpleNamespace(chat_id=CHAT, messages=[filled, make_message(2, "", posted)]))
+        await ingest.handle(SimpleNamespace(chat_id=CHAT, message=make_message(3, "gm, no listings today", posted)))
+
+    asyncio.run(scenario())
+    assert pipeline.calls == [(CHAT, 1, False, []), (CHAT, 1, True, [CA])]
+    stats = ingest.summary()[str(CHAT)]
+    assert stats["received"] == 6 and stats["edits"] == 2 and stats["albums"] == 2
+    assert stats["duplicates"] == 2 and stats["rejected"] == 2 and stats["accepted"] == 2
+    assert stats["matched"] == 1
+    assert stats["detect_ms"]["p50"] >= 2000  # 게시 후 수정으로 채워질 때까지의 시간 포함
+
+
+def test_hidden_links_buttons_and_multiple_listings():
+    entity = SimpleNamespace(url=URL)
+    button = SimpleNamespace(url=f"https://www.binance.com/en/binancewallet/{CA2}/bsc")
+    markup = SimpleNamespace(rows=[SimpleNamespace(buttons=[button])])
+    message = make_message(5, "New listing on Binance Alpha (tap the link)", None, entities=[entity],
+                           reply_markup=markup)
+    text = message_text(message)
+    assert [ca for ca, _ in extract_all_cas(text)] == [CA, CA2]
+    assert message_text(make_message(6, "plain", None)) == "plain"
+
+
+def test_per_channel_filter():
+    assert parse_channel_filters("@NewListingsFeed=binancewallet/; @Newsbothub=source:|alpha") == {
+        "@NewListingsFeed": ("binancewallet/",), "@Newsbothub": ("source:", "alpha")}
+    for bad in ("@a", "@a=", "=x"):
+        try:
+            parse_channel_filters(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad} should be rejected")
+
+    pipeline = RecordingPipeline()
+    ingest = TelegramIngest(pipeline)
+    ingest.set_filter(CHAT, ("binancewallet/",), name="@NewListingsFeed")
+
+    async def scenario():
+        # '0x'가 있어도 이 채널의 필터 토큰이 없으면 추출하지 않음
+        await ingest.handle(SimpleNamespace(chat_id=CHAT, message=make_message(1, f"gas at 0x{'0' * 40}", None)))
+        await ingest.handle(SimpleNamespace(chat_id=CHAT, message=make_message(2, URL, None)))
+
+    asyncio.run(scenario())
+    assert [call[1] for call in pipeline.calls] == [2]
+    assert ingest.summary()[str(CHAT)]["name"] == "@NewListingsFeed"
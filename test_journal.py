@@ -0,0 +1,168 @@
+"""
+Tests for the binary trade journal and its export (journal.py)
+"""
+import os
+import csv
+import json
+import asyncio
+import tempfile
+import threading
+import time
+
+import journal
+from dedup import DedupService
+from journal import TradeJournal, read_journal, summarize, write_table
+from latency import LatencyTracker
+from pipeline import build_pipeline
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+CA2 = "0x8f3a1d2b4c5e6f708192a3b4c5d6e7f8091a2b3c"
+
+
+class FakeClock:
+    def __init__(self, now=1_765_540_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def read_segment_order(directory):
+    """파일에 기록된 순서 그대로 (read_journal은 시각순 정렬)"""
+    return [event for path in journal.segment_paths(directory) for event in journal.read_segment(path)]
+
+
+def test_pipeline_events_are_journaled_and_summarized():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            async def send(target, message, **kwargs):
+                await asyncio.sleep(0.005)
+
+            pipeline = build_pipeline(send, ["@bot"], DedupService(), os.path.join(tmp, "sells.json"),
+                                      buy_amount=0.1, sell_delay=0, sell_percent=100, rate=0,
+                                      tracker=LatencyTracker())
+            pipeline.journal = TradeJournal(os.path.join(tmp, "journal"))
+            tasks = [asyncio.create_task(pipeline.outbound.run()), asyncio.create_task(pipeline.sell_scheduler.run()),
+                     asyncio.create_task(pipeline.exit_engine.run())]
+            frame = json.dumps({"exchange": "binance", "type": "alpha",
+                                "detections": [{"onchain": {"chain": "bsc", "contract": CA}}]})
+            await pipeline.handle_nlf_frame(frame, "ws")
+            await pipeline.handle_nlf_frame(frame, "ws")  # 같은 CA: 중복
+            await asyncio.sleep(0.1)  # 시간 규칙(0초)으로 바로 매도
+            await pipeline.journal.flush()
+            for task in tasks:
+                task.cancel()
+
+            events = read_journal(os.path.join(tmp, "journal"))
+            names = [e[0] for e in events]
+            assert names[:4] == ["signal", "claim", "send", "ack"]
+            assert sorted(names[4:]) == ["duplicate", "sell_scheduled", "sell_sent", "signal"]  # 매도는 확인 직후 실행
+            ack = events[3]
+            assert ack[2] == "nlf" and ack[3] == CA and ack[6] == "@bot" and ack[4] >= ack[5] >= 5
+            assert events[-1][4:6] == (100.0, 1.0)
+
+            feeds, trades = summarize(events)
+            assert feeds[0]["feed"] == "nlf" and feeds[0]["signals"] == 2 and feeds[0]["duplicate_rate"] == 0.5
+            assert trades[0]["ca"] == CA and trades[0]["acks"] == 1 and trades[0]["sold_percent"] == 100.0
+    asyncio.run(run())
+
+
+def test_staged_sells_accumulate_sold_percent():
+    def sell(ts, ca, percent, ok=1.0):
+        return ("sell_sent", ts, "", ca, percent, ok, "@bot")
+
+    # 50% 매도 후 남은 전량 / 남은 보유량의 50%씩 두 번 (실패한 전송은 제외)
+    events = [sell(1.0, CA, 50.0), sell(2.0, CA, 100.0),
+              sell(1.0, CA2, 50.0), sell(2.0, CA2, 50.0, ok=0.0), sell(3.0, CA2, 50.0)]
+    _, trades = summarize(events)
+    by_ca = {trade["ca"]: trade for trade in trades}
+    assert by_ca[CA]["sells"] == 2 and by_ca[CA]["sold_percent"] == 100.0
+    assert by_ca[CA2]["sells"] == 2 and by_ca[CA2]["sold_percent"] == 75.0
+
+
+def test_segments_rotate_compress_and_survive_restarts():
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = FakeClock(86400 * 20000 + 86000)  # UTC 자정 400초 전
+        first = TradeJournal(tmp, clock=clock)
+        first.record(journal.SIGNAL, "telegram:-1001", CA, 1500.0, 0.4)
+        first.flush_sync()
+        second = TradeJournal(tmp, clock=clock)  # 재시작: 같은 세그먼트에 이어서 기록 (문자열 표 새로 시작)
+        second.record(journal.SIGNAL, "nlf", CA, -1.0, 0.2)
+        second.record(journal.DUPLICATE, "telegram:-1001", CA)
+        clock.now += 0.25
+        second.record(journal.SIGNAL, "telegram:-1001", CA2, 900.0, 0.3)
+        clock.now += 600  # 날짜 변경
+        second.record(journal.ACK, "nlf", CA2, 12.0, 8.0, "@bot")
+        second.flush_sync()
+
+        names = sorted(os.listdir(tmp))
+        assert names == ["20241004.bin.gz", "20241005.bin"]  # 지난 날짜는 압축
+        with open(os.path.join(tmp, names[1]), "ab") as f:
+            f.write(b"\x01\x02\x03")  # 비정상 종료로 잘린 기록
+        events = read_journal(tmp)
+        assert [(e[0], e[2]) for e in events] == [("signal", "telegram:-1001"), ("signal", "nlf"),
+                                                  ("duplicate", "telegram:-1001"), ("signal", "telegram:-1001"),
+                                                  ("ack", "nlf")]
+        assert events[4][6] == "@bot" and events[3][3] == CA2
+        size = sum(os.path.getsize(os.path.join(tmp, name)) for name in names)
+        assert size < 400
+
+        feeds, trades = summarize(events)
+        by_feed = {row["feed"]: row for row in feeds}
+        assert by_feed["telegram:-1001"]["first_detections"] == 2 and by_feed["nlf"]["lead_ms_p50"] == 0.0
+        assert by_feed["nlf"]["origin_ms_p50"] is None and by_feed["telegram:-1001"]["duplicate_rate"] == 0.5
+        path = os.path.join(tmp, "feeds.csv")
+        write_table(feeds, path)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["feed"] for row in rows] == ["nlf", "telegram:-1001"] and rows[1]["signals"] == "2"
+
+
+def test_non_address_cas_use_the_string_table():
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = TradeJournal(tmp, clock=FakeClock())
+        long_ca = CA + "ABCD"  # 추출 정규식은 40자리 이상을 허용
+        odd_ca = "0x" + "z" * 40  # 42자지만 hex가 아님
+        recorder.record(journal.SIGNAL, "nlf", long_ca, 1.0, 0.2)
+        recorder.record(journal.CLAIM, "nlf", odd_ca)
+        recorder.record(journal.SIGNAL, "nlf", CA, 1.0, 0.1)
+        recorder.flush_sync()
+        assert [e[3] for e in read_journal(tmp)] == [long_ca.lower(), odd_ca, CA]
+
+
+def test_flush_sync_waits_for_the_running_flush_and_recovers_strings():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            recorder = TradeJournal(tmp, clock=FakeClock())
+            write = recorder._write
+            started = threading.Event()
+
+            def slow_write(batches):
+                started.set()
+                time.sleep(0.1)
+                write(batches)
+
+            recorder._write = slow_write
+            recorder.record(journal.SIGNAL, "nlf", CA, 1.0, 0.2)
+            flushing = asyncio.create_task(recorder.flush())
+            await asyncio.to_thread(started.wait)
+            recorder.record(journal.SIGNAL, "telegram:-1001", CA2, 2.0, 0.3)
+            recorder._write = write
+            recorder.flush_sync()  # 스레드의 기록이 끝난 뒤에 이어서 기록
+            await flushing
+            assert [e[2] for e in read_segment_order(tmp)] == ["nlf", "telegram:-1001"]
+
+            # 기록 실패로 문자열 정의('nlf')가 담긴 배치를 버려도 이후 기록의 이름이 유지됨
+            def fail(batches):
+                raise OSError("disk full")
+
+            recorder._write = fail
+            recorder.record(journal.ACK, "bybit", CA, 5.0, 1.0, "@bot")
+            await recorder.flush()
+            recorder._write = write
+            recorder.record(journal.ACK, "bybit", CA2, 6.0, 1.0, "@bot")
+            recorder.flush_sync()
+            assert recorder.errors == 1
+            events = read_segment_order(tmp)
+            assert [(e[0], e[2], e[6]) for e in events[2:]] == [("ack", "bybit", "@bot")]
+    asyncio.run(run())
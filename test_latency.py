@@ -0,0 +1,85 @@
+"""
+Tests for the latency tracing layer (latency.py)
+"""
+import asyncio
+import json
+
+from latency import LatencyTracker, RollingHistogram
+
+
+def test_histogram_percentiles():
+    hist = RollingHistogram(maxlen=100)
+    for value in range(1, 101):
+        hist.record(float(value))
+    summary = hist.summary()
+    assert summary["count"] == 100
+    assert summary["p50"] == 51.0
+    assert summary["p95"] == 95.0
+    assert summary["p99"] == 99.0
+    assert summary["max"] == 100.0
+
+
+def test_histogram_window_is_bounded():
+    hist = RollingHistogram(maxlen=10)
+    for value in range(1000):
+        hist.record(float(value))
+    summary = hist.summary()
+    assert summary["count"] == 1000
+    assert summary["p50"] >= 990
+
+
+def test_trace_stages_are_recorded_per_source():
+    tracker = LatencyTracker()
+    trace = tracker.start("telegram", "@NewListingsFeed", origin_ts=None)
+    trace.mark("extract")
+    trace.mark("dedup")
+    trace.mark("send_1")
+    trace.mark("ack")
+    tracker.finish(trace)
+
+    snap = tracker.snapshot()
+    stages = snap["telegram:@NewListingsFeed"]
+    assert set(stages) == {"extract", "dedup", "send_1", "ack"}
+    assert stages["ack"]["p50"] >= stages["extract"]["p50"]
+    assert trace.elapsed_ms("ack") >= trace.elapsed_ms("extract")
+
+
+def test_origin_delay_uses_message_timestamp():
+    tracker = LatencyTracker()
+    trace = tracker.start("telegram", 1, origin_ts=0)
+    trace.received_wall = 1.5
+    tracker.finish(trace)
+    assert tracker.snapshot()["telegram:1"]["origin"]["p50"] == 1500.0
+
+
+def test_metrics_server_returns_snapshot():
+    async def run():
+        tracker = LatencyTracker()
+        trace = tracker.start("nlf", "ws")
+        trace.mark("decode")
+        tracker.finish(trace)
+
+        server = await tracker.serve_metrics("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(run())
+    header, body = response.split(b"\r\n\r\n", 1)
+    assert header.startswith(b"HTTP/1.1 200")
+    assert "decode" in json.loads(body)["nlf:ws"]
+
+
+if __name__ == "__main__":
+    test_histogram_percentiles()
+    test_histogram_window_is_bounded()
+    test_trace_stages_are_recorded_per_source()
+    test_origin_delay_uses_message_timestamp()
+    test_metrics_server_returns_snapshot()
+    print("✅ latency tests passed")
@@ -0,0 +1,78 @@
+"""
+Tests for the event-loop monitor, sampling profiler and queue logging (monitor.py)
+"""
+import os
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+
+from monitor import LoopMonitor, setup_queue_logging
+
+
+async def blocking_step():
+    time.sleep(0.06)  # 동기 호출로 루프 점유
+
+
+def test_slow_callback_names_coroutine_and_lag():
+    monitor = LoopMonitor(interval=0.01, slow_threshold=0.04)
+
+    async def scenario():
+        monitor.install()
+        sampling = asyncio.create_task(monitor.run())
+        try:
+            await asyncio.sleep(0.03)
+            await asyncio.create_task(blocking_step())
+            await asyncio.sleep(0.03)
+        finally:
+            sampling.cancel()
+            monitor.uninstall()
+
+    original = asyncio.Handle._run
+    asyncio.run(scenario())
+    assert asyncio.Handle._run is original
+    summary = monitor.summary()
+    assert summary["slow_callbacks"] == 1
+    assert list(summary["slowest"]) == ["blocking_step"]
+    assert summary["max_lag_ms"] >= 40
+
+
+def test_profile_dump():
+    monitor = LoopMonitor()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "profile.txt")
+        profiler = monitor.start_profile(0.1, path)
+        assert monitor.start_profile(0.1, path) is None  # 수집 중에는 다시 시작하지 않음
+        deadline = time.monotonic() + 0.1
+        while time.monotonic() < deadline:
+            sum(range(1000))
+        profiler.join(2)
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert profiler.samples > 0 and lines
+        assert any("test_profile_dump" in line for line in lines)
+
+
+def test_queue_logging_does_not_block():
+    release = threading.Event()
+    written = []
+
+    class SlowHandler(logging.Handler):
+        def emit(self, record):
+            release.wait(2)
+            written.append(record.getMessage())
+
+    logger = logging.getLogger()
+    saved = logger.handlers[:]
+    logger.handlers = [SlowHandler()]
+    try:
+        listener = setup_queue_logging()
+        started = time.perf_counter()
+        logger.warning("매수 전송")
+        assert time.perf_counter() - started < 0.5
+        release.set()
+        listener.stop()
+        assert written == ["매수 전송"]
+    finally:
+        logger.handlers = saved
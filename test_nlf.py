@@ -0,0 +1,194 @@
+"""
+Tests for NLF WebSocket frame decoding (nlf.py) and non-blocking frame submission in the pipeline
+"""
+import json
+import time
+import asyncio
+import tempfile
+
+import nlf
+from dedup import DedupService
+from latency import LatencyTracker
+from pipeline import build_pipeline
+from nlf import NLFConnectionManager
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+
+
+def listing_frame(ca=CA, exchange="binance", type="alpha", chain="bsc"):
+    return json.dumps({
+        "exchange": exchange, "type": type,
+        "detections": [{"onchain": {"chain": chain, "contract": ca}}],
+    })
+
+
+def test_prefilter_rejects_other_exchanges_without_parsing():
+    assert nlf.prefilter(listing_frame())
+    assert nlf.prefilter(listing_frame().encode())
+    assert not nlf.prefilter(listing_frame(exchange="upbit"))
+    assert not nlf.prefilter(listing_frame(exchange="upbit").encode())
+    # 사전 필터에서 걸러진 프레임은 잘못된 JSON이어도 파싱하지 않음
+    assert nlf.decode_frame(b'{"exchange": "upbit", broken') is None
+    # 연결 계층에서 이미 걸렀다면 다시 검사하지 않고 바로 파싱
+    try:
+        nlf.decode_frame(b'{"exchange": "upbit", broken', prefiltered=True)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("prefiltered frame should be parsed")
+
+
+def test_decode_frame_returns_slotted_listing():
+    received = time.perf_counter()
+    listing = nlf.decode_frame(listing_frame().encode(), received)
+    assert listing.received_at == received
+    assert listing.decode_ms >= 0
+    assert listing.bsc_contracts() == [CA]
+    assert not hasattr(listing.detections[0], "__dict__")
+    # 토큰은 있지만 조건이 다른 프레임 (futures 리스팅 등)
+    assert nlf.decode_frame(listing_frame(type="futures alpha bsc")) is None
+
+
+def test_invalid_json_raises_value_error():
+    try:
+        nlf.decode_frame('{"exchange": "binance", "type": "alpha", "chain": "bsc"')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("broken frame should raise ValueError")
+
+
+def test_submit_does_not_block_receive_loop():
+    async def run():
+        sent = []
+
+        async def send(target, message, **kwargs):
+            await asyncio.sleep(0.05)  # 느린 봇 응답
+            sent.append(message)
+
+        tracker = LatencyTracker()
+        with tempfile.TemporaryDirectory() as tmp:
+            pipeline = build_pipeline(send, ["@bot"], DedupService(), f"{tmp}/sells.json",
+                                      buy_amount=0.1, sell_delay=900, sell_percent=100,
+                                      rate=0, tracker=tracker)
+            worker = asyncio.create_task(pipeline.outbound.run())
+            frames = [listing_frame(exchange="upbit")] * 50 + [listing_frame(), listing_frame(CA.replace("7", "8"))]
+            started = time.perf_counter()
+            tasks = [pipeline.submit_nlf_frame(f.encode(), "ws", time.perf_counter()) for f in frames]
+            assert time.perf_counter() - started < 0.05  # 매수 전송을 기다리지 않음
+            assert tasks.count(None) == 50
+            await asyncio.gather(*(t for t in tasks if t))
+            worker.cancel()
+
+        assert len(sent) == 2
+        stages = tracker.snapshot()["nlf:ws"]
+        assert stages["prefilter"]["count"] == 50
+        assert stages["decode"]["count"] == 2
+        assert stages["queue"]["count"] == 2
+        assert stages["ack"]["count"] == 2
+    asyncio.run(run())
+
+
+class FakeWebSocket:
+    """프레임 큐와 핑 응답 지연(None이면 응답 없음)을 흉내 내는 WebSocket 연결"""
+
+    def __init__(self, pong_delay=0.0):
+        self.frames = asyncio.Queue()
+        self.pong_delay = pong_delay
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def recv(self, decode=None):
+        return await self.frames.get()
+
+    async def ping(self):
+        pong = asyncio.get_running_loop().create_future()
+        if self.pong_delay is not None:
+            asyncio.get_running_loop().call_later(self.pong_delay, pong.set_result, None)
+        return pong
+
+
+def make_connect(sockets):
+    """connect() 호출마다 sockets 목록에서 다음 연결을 돌려줍니다 (없으면 연결 실패)."""
+    opened = []
+
+    def connect(url, **kwargs):
+        if not sockets:
+            raise ConnectionRefusedError(url)
+        opened.append(url)
+        return sockets.pop(0)
+    return connect, opened
+
+
+def test_frames_are_deduplicated_across_links():
+    async def run():
+        received = []
+        a, b = FakeWebSocket(), FakeWebSocket()
+        connect, _ = make_connect([a, b])
+        manager = NLFConnectionManager(["wss://tokyo"], lambda *args: received.append(args),
+                                       connections_per_url=2, connect=connect, ping_interval=10)
+        task = asyncio.create_task(manager.run())
+        await asyncio.sleep(0)
+        frame = listing_frame().encode()
+        b.frames.put_nowait(frame)
+        a.frames.put_nowait(frame)
+        a.frames.put_nowait(listing_frame(exchange="upbit").encode())
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        assert len(received) == 1
+        raw, source, received_at = received[0]
+        assert raw == frame and source == "wss://tokyo"
+        assert manager.duplicates == 1
+        links = manager.summary()["links"]
+        assert links["wss://tokyo#0"]["frames"] == 2
+        assert sum(link["first"] for link in links.values()) == 1
+    asyncio.run(run())
+
+
+def test_dead_link_is_dropped_and_reconnects_with_reset_backoff():
+    async def run():
+        dead, fresh = FakeWebSocket(pong_delay=None), FakeWebSocket()
+        connect, opened = make_connect([dead, fresh])
+        manager = NLFConnectionManager(["wss://tokyo"], lambda *args: None, connections_per_url=1,
+                                       connect=connect, ping_interval=0.01, ping_timeout=0.02,
+                                       backoff_initial=0.01)
+        task = asyncio.create_task(manager.run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+        link = manager.links[0]
+        assert opened == ["wss://tokyo", "wss://tokyo"]
+        assert link.reconnects == 1
+        assert link.connected and link.backoff == 0.01
+        assert link.rtt_ms is not None
+    asyncio.run(run())
+
+
+def test_primary_is_lowest_latency_healthy_link():
+    async def run():
+        slow, fast = FakeWebSocket(pong_delay=0.03), FakeWebSocket(pong_delay=0.0)
+        connect, _ = make_connect([slow, fast])
+        manager = NLFConnectionManager(["wss://tokyo", "wss://frankfurt"], lambda *args: None,
+                                       connections_per_url=1, connect=connect, ping_interval=0.01)
+        task = asyncio.create_task(manager.run())
+        await asyncio.sleep(0.1)
+        task.cancel()
+        assert manager.summary()["primary"] == "wss://frankfurt#0"
+        assert manager.summary()["connected"] == 2
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_prefilter_rejects_other_exchanges_without_parsing()
+    test_decode_frame_returns_slotted_listing()
+    test_invalid_json_raises_value_error()
+    test_submit_does_not_block_receive_loop()
+    test_frames_are_deduplicated_across_links()
+    test_dead_link_is_dropped_and_reconnects_with_reset_backoff()
+    test_primary_is_lowest_latency_healthy_link()
+    print("✅ nlf tests passed")
@@ -0,0 +1,175 @@
+"""
+Tests for the outbound send queue (outbound.py)
+"""
+import asyncio
+
+from telethon.errors import FloodWaitError
+
+from outbound import OutboundQueue, TokenBucket, PRIORITY_BUY, PRIORITY_SELL
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time() == 0.5
+    clock.now = 0.5
+    assert bucket.wait_time() == 0.0
+
+
+def test_buys_are_sent_before_queued_sells():
+    async def run():
+        sent = []
+
+        async def send(target, message):
+            sent.append(message)
+
+        queue = OutboundQueue(send, rate=0)
+        sells = [asyncio.create_task(queue.submit("@bot", f"/sell {i}", PRIORITY_SELL)) for i in range(3)]
+        buy = asyncio.create_task(queue.submit("@bot", "/buy", PRIORITY_BUY))
+        await asyncio.sleep(0)  # 모두 큐에 들어간 뒤 전송 루프 시작
+        worker = asyncio.create_task(queue.run())
+        await asyncio.gather(buy, *sells)
+        worker.cancel()
+        assert sent[0] == "/buy"
+        assert sent[1:] == ["/sell 0", "/sell 1", "/sell 2"]
+        assert queue.summary()["depth"] == {"buy": 0, "sell": 0}
+    asyncio.run(run())
+
+
+def test_flood_wait_pauses_and_resends():
+    async def run():
+        calls = []
+
+        async def send(target, message):
+            calls.append(message)
+            if len(calls) == 1:
+                raise FloodWaitError(None, capture=0)
+            return "ok"
+
+        queue = OutboundQueue(send, rate=0)
+        worker = asyncio.create_task(queue.run())
+        assert await asyncio.wait_for(queue.submit("@bot", "/buy", PRIORITY_BUY), 1) == "ok"
+        worker.cancel()
+        assert calls == ["/buy", "/buy"]
+        assert queue.flood_waits == 1
+    asyncio.run(run())
+
+
+def test_rate_limit_spaces_sends():
+    async def run():
+        loop = asyncio.get_running_loop()
+        times = []
+
+        async def send(target, message):
+            times.append(loop.time())
+
+        queue = OutboundQueue(send, rate=50, burst=1)
+        worker = asyncio.create_task(queue.run())
+        await asyncio.gather(*(queue.submit("@bot", str(i)) for i in range(3)))
+        worker.cancel()
+        assert times[2] - times[0] >= 0.035
+    asyncio.run(run())
+
+
+def test_other_errors_are_raised_to_submitter():
+    async def run():
+        async def send(target, message):
+            raise ConnectionError("down")
+
+        queue = OutboundQueue(send, rate=0)
+        worker = asyncio.create_task(queue.run())
+        try:
+            await queue.submit("@bot", "/buy", PRIORITY_BUY)
+        except ConnectionError:
+            pass
+        else:
+            raise AssertionError("send error should propagate")
+        finally:
+            worker.cancel()
+    asyncio.run(run())
+
+
+def test_stale_items_expire():
+    async def run():
+        async def send(target, message):
+            pass
+
+        clock = FakeClock()
+        queue = OutboundQueue(send, rate=0, clock=clock)
+        pending = asyncio.create_task(queue.submit("@bot", "/buy", PRIORITY_BUY, timeout=1))
+        await asyncio.sleep(0)
+        clock.now = 5
+        worker = asyncio.create_task(queue.run())
+        try:
+            await pending
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("stale buy should expire")
+        finally:
+            worker.cancel()
+        assert queue.expired == 1
+    asyncio.run(run())
+
+
+def test_items_expire_during_flood_wait():
+    async def run():
+        loop = asyncio.get_running_loop()
+
+        async def send(target, message):
+            raise FloodWaitError(None, capture=5)
+
+        queue = OutboundQueue(send, rate=0)
+        worker = asyncio.create_task(queue.run())
+        first = asyncio.create_task(queue.submit("@bot", "/sell", PRIORITY_SELL))
+        await asyncio.sleep(0.01)  # 첫 전송이 FloodWait(5초)를 받음
+        started = loop.time()
+        try:
+            await queue.submit("@bot", "/buy", PRIORITY_BUY, timeout=0.1)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("buy should expire while the queue waits out the flood")
+        finally:
+            worker.cancel()
+            first.cancel()
+        assert loop.time() - started < 0.5 and queue.expired == 1
+    asyncio.run(run())
+
+
+def test_slow_send_outlasting_timeout_still_succeeds():
+    async def run():
+        async def send(target, message):
+            await asyncio.sleep(0.1)  # 전송은 시작했지만 기한보다 오래 걸림
+            return "ok"
+
+        queue = OutboundQueue(send, rate=0)
+        worker = asyncio.create_task(queue.run())
+        try:
+            assert await queue.submit("@bot", "/buy", PRIORITY_BUY, timeout=0.02) == "ok"
+        finally:
+            worker.cancel()
+        assert queue.expired == 0 and queue.sent == 1
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_token_bucket_refills_at_rate()
+    test_buys_are_sent_before_queued_sells()
+    test_flood_wait_pauses_and_resends()
+    test_rate_limit_spaces_sends()
+    test_other_errors_are_raised_to_submitter()
+    test_stale_items_expire()
+    test_items_expire_during_flood_wait()
+    test_slow_send_outlasting_timeout_still_succeeds()
+    print("✅ outbound tests passed")
@@ -0,0 +1,76 @@
+"""
+Tests for the pre-resolved InputPeer cache and warm-up (peers.py)
+"""
+import os
+import asyncio
+import tempfile
+
+from telethon.tl.functions import PingRequest
+from telethon.tl.types import InputPeerUser, InputPeerChannel
+
+from peers import PeerCache
+
+
+class FakeClient:
+    def __init__(self):
+        self.resolved = []
+        self.sent = []
+        self.pings = 0
+
+    async def get_input_entity(self, entity):
+        self.resolved.append(entity)
+        if entity == "@GMGN_bsc_bot":
+            return InputPeerUser(user_id=111, access_hash=222)
+        if entity == -1001:
+            return InputPeerChannel(channel_id=1001, access_hash=333)
+        raise ValueError(f"Cannot find any entity corresponding to {entity}")
+
+    async def send_message(self, entity, message, **kwargs):
+        self.sent.append(entity)
+
+    async def __call__(self, request):
+        assert isinstance(request, PingRequest)
+        self.pings += 1
+
+
+def test_warm_up_resolves_and_persists_peers():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "alpha.peers.json")
+            client = FakeClient()
+            cache = PeerCache(client, path)
+            await cache.warm_up(["@GMGN_bsc_bot", -1001, "@missing"])
+            assert client.resolved == ["@GMGN_bsc_bot", -1001, "@missing"]
+            assert client.pings == 1
+            assert cache.resolve("@GMGN_bsc_bot") == InputPeerUser(user_id=111, access_hash=222)
+            assert cache.resolve("@missing") == "@missing"
+
+            # 재시작 후에는 파일에서 복원되어 다시 해석하지 않음
+            client2 = FakeClient()
+            restored = PeerCache(client2, path)
+            assert restored.load() == 2
+            await restored.warm_up(["@GMGN_bsc_bot", -1001])
+            assert client2.resolved == []
+            assert restored.resolve(-1001) == InputPeerChannel(channel_id=1001, access_hash=333)
+    asyncio.run(run())
+
+
+def test_send_uses_cached_peer_and_separates_first_send():
+    async def run():
+        client = FakeClient()
+        cache = PeerCache(client)
+        await cache.warm_up(["@GMGN_bsc_bot"])
+        for i in range(3):
+            await cache.send("@GMGN_bsc_bot", f"/buy {i}")
+        assert client.sent == [InputPeerUser(user_id=111, access_hash=222)] * 3
+        summary = cache.summary()
+        assert summary["first_send_ms"] is not None
+        assert summary["send_ms"]["count"] == 2
+        assert summary["keepalive_ms"]["count"] == 1
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_warm_up_resolves_and_persists_peers()
+    test_send_uses_cached_peer_and_separates_first_send()
+    print("✅ peers tests passed")
@@ -0,0 +1,151 @@
+"""
+Tests for the position ledger and exit-rule engine (positions.py)
+"""
+import os
+import asyncio
+import tempfile
+
+from positions import (ExitEngine, MockPriceSource, PositionLedger, StopLoss, TakeProfit, TimeExit,
+                       parse_exit_rules)
+
+CA = "0x97693439ea2f0ecdeb9135881e49f354656a911c"
+CA2 = "0x8f3a1d2b4c5e6f708192a3b4c5d6e7f8091a2b3c"
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_engine(rules, prices=None, path=":memory:", clock=None):
+    sells = []
+    clock = clock or FakeClock()
+    engine = ExitEngine(PositionLedger(path), rules, lambda ca, pct, bot: sells.append((ca, pct, bot)),
+                        price_source=prices, clock=clock)
+    return engine, sells, clock
+
+
+def test_parse_exit_rules():
+    rules = parse_exit_rules("tp:2x:50, tp:4x:100, sl:30%:100, time:15m:100")
+    assert [r.name for r in rules] == ["tp:2x", "tp:4x", "sl:30%", "time:900s"]
+    assert isinstance(rules[2], StopLoss) and rules[2].drawdown == 0.3
+    for bad in ("tp:2x", "time:soon:100", "tp:2x:150", "trail:10%:100", "time:5m:50,time:300s:50",
+                "sl:0%:100", "sl:100%:100", "sl:150%:100"):
+        try:
+            parse_exit_rules(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad} should be rejected")
+
+
+def test_tiered_take_profit_converts_to_percent_of_remaining():
+    async def run():
+        prices = MockPriceSource({CA: 1.0})
+        engine, sells, _ = make_engine([TakeProfit(2, 50), TakeProfit(4, 100), StopLoss(0.5)], prices)
+        engine.open(CA, 0.1, "nlf", 12.5, "@gmgn")
+        await engine.evaluate()  # 진입가 기록
+        assert engine.ledger.open_positions[1].entry_price == 1.0 and sells == []
+
+        prices.set(CA, 2.5)
+        await engine.evaluate()
+        prices.set(CA, 2.6)
+        await engine.evaluate()  # 같은 규칙은 한 번만 실행
+        assert sells == [(CA, 50.0, "@gmgn")]
+
+        prices.set(CA, 4.0)
+        await engine.evaluate()
+        assert sells[-1] == (CA, 100.0, "@gmgn")
+        assert engine.ledger.open_positions == {}
+        assert [row[3] for row in engine.ledger.exits(1)] == ["tp:2x", "tp:4x"]
+    asyncio.run(run())
+
+
+def test_time_ladder_and_stop_loss_share_one_batched_price_lookup():
+    async def run():
+        prices = MockPriceSource({CA: 1.0, CA2: 1.0})
+        engine, sells, clock = make_engine([TimeExit(60, 25), TimeExit(300, 100), StopLoss(0.3)], prices)
+        engine.open(CA, 0.1, "nlf")
+        engine.open(CA2, 0.1, "telegram:1")
+        await engine.evaluate()
+        assert prices.calls == 1
+
+        clock.now += 61
+        prices.set(CA2, 0.6)
+        await engine.evaluate()
+        assert prices.calls == 2
+        # CA: 시간 단계 25% / CA2: 시간 단계 25% + 손절 -> 남은 전량 한 번에 매도
+        assert sorted(sells) == sorted([(CA, 25.0, None), (CA2, 100.0, None)])
+
+        clock.now += 240
+        await engine.evaluate()
+        assert sells[-1] == (CA, 100.0, None)
+        assert engine.summary()["open"] == 0
+    asyncio.run(run())
+
+
+def test_exhausted_rules_close_the_position():
+    async def run():
+        prices = MockPriceSource({CA: 1.0})
+        sells, closed = [], []  # 합계 50%: 나머지는 수동 매도
+        engine = ExitEngine(PositionLedger(), [TakeProfit(2, 50)], lambda ca, pct, bot: sells.append((ca, pct, bot)),
+                            price_source=prices, clock=FakeClock(), on_close=closed.append)
+        engine.open(CA, 0.1, "nlf")
+        await engine.evaluate()
+        prices.set(CA, 2.0)
+        await engine.evaluate()
+        assert sells == [(CA, 50.0, None)] and prices.calls == 2
+        # 규칙을 모두 소진하면 장부에서 닫고 브로커 슬롯을 해제 (남은 50%는 기록으로 남음)
+        assert engine.ledger.open_positions == {} and closed == [CA]
+        assert engine.ledger.history()[0]["status"] == "exhausted" and engine.ledger.history()[0]["remaining"] == 50.0
+        await engine.evaluate()
+        assert prices.calls == 2 and engine._next_wakeup() is None
+
+        # 시간 청산을 취소해 규칙이 남지 않아도 닫힘 (같은 CA의 다른 포지션이 열려 있으면 슬롯은 유지)
+        engine.set_rules([TimeExit(60, 100)])
+        engine.open(CA2, 0.1, "nlf", bot="@a")
+        engine.open(CA2, 0.1, "nlf", bot="@b")
+        engine.ledger.open_positions[2].fired.add("time:60s")
+        await engine.evaluate()
+        assert list(engine.ledger.open_positions) == [3] and closed == [CA]
+        assert engine.cancel_exits(CA2) == 1 and closed == [CA, CA2]
+    asyncio.run(run())
+
+
+def test_open_positions_survive_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "positions.sqlite")
+        engine, _, _ = make_engine([TimeExit(60, 100)], path=path)
+        engine.open(CA, 0.1, "nlf", 8.0, 12345)
+        engine.ledger.close()
+
+        restored = PositionLedger(path)
+        position = restored.open_positions[1]
+        assert (position.ca, position.bot, position.latency_ms) == (CA, 12345, 8.0)
+        assert restored.history()[0]["feed"] == "nlf"
+
+
+def test_engine_loop_sleeps_until_next_time_rule():
+    async def run():
+        loop = asyncio.get_running_loop()
+        engine, sells, _ = make_engine([TimeExit(0.05, 100)], clock=loop.time)
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0)
+        engine.open(CA, 0.1, "nlf")
+        await asyncio.sleep(0.1)
+        task.cancel()
+        assert sells == [(CA, 100.0, None)]
+        assert engine.evaluations <= 3  # 가격 규칙이 없으면 주기적으로 깨어나지 않음
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_parse_exit_rules()
+    test_tiered_take_profit_converts_to_percent_of_remaining()
+    test_time_ladder_and_stop_loss_share_one_batched_price_lookup()
+    test_exhausted_rules_close_the_position()
+    test_open_positions_survive_restart()
+    test_engine_loop_sleeps_until_next_time_rule()
+    print("✅ positions tests passed")
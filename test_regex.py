@@ -1,6 +1,6 @@
 import re
 
-# 정규식 정의 (main.py와 동일)
+# 정규식 정의 (extractors.py와 동일)
 BINANCE_URL_REGEX = r"https://www\.binance\.com/en/binancewallet/(0x[a-fA-F0-9]{40,})/bsc"
 NEWSBOTHUB_SOURCE_REGEX = r"source:\s*(0x[a-fA-F0-9]{40,})\s*\(bsc\)"
 
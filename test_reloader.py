@@ -0,0 +1,131 @@
+"""
+Tests for configuration hot reload (reloader.py) and AlphaSniper.apply_config
+"""
+import os
+import asyncio
+import tempfile
+
+from config import Config, RELOADABLE, read_config
+from reloader import ConfigReloader
+
+ENV = """API_ID=12345
+API_HASH=hash
+SESSION_NAME={session}
+SOURCE_BOT_ID=-1001234
+TARGET_BOT_ID=@GMGN_bsc_bot
+GMGN_BUY_AMOUNT={amount}
+AUTO_SELL_DELAY_MINUTES=15
+{extra}
+"""
+
+
+def write_env(path, amount="0.1", extra="", session="alpha_sniper"):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(ENV.format(amount=amount, extra=extra, session=session))
+    # 같은 초 안에 여러 번 써도 변경이 감지되도록 수정 시각을 앞당김
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+
+def test_file_change_applies_reloadable_settings_only():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, ".env")
+            write_env(path)
+            config = read_config(path)
+            applied = []
+
+            async def apply(new, changes):
+                applied.append(dict(changes))
+                for name in changes:
+                    setattr(config, name, getattr(new, name))
+
+            reloader = ConfigReloader(config, apply, env_path=path, interval=0.01)
+            task = asyncio.create_task(reloader.run())
+            write_env(path, amount="0.25", extra="METRICS_PORT=9100\nNLF_ENABLED=yes")
+            await asyncio.sleep(0.1)
+            assert applied == [{"buy_amount": (0.1, 0.25), "nlf_enabled": (False, True)}]
+            assert config.buy_amount == 0.25 and config.metrics_port == 0  # METRICS_PORT는 재시작 후 적용
+            assert reloader.summary()["pending_restart"] == ["metrics_port"]
+
+            assert await reloader.reload("SIGHUP") is False  # 바뀐 것이 없으면 적용하지 않음
+            task.cancel()
+    asyncio.run(run())
+
+
+def test_invalid_file_or_failed_apply_keeps_running_settings():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, ".env")
+            write_env(path)
+            config = read_config(path)
+
+            async def apply(new, changes):
+                if new.buy_amount > 1:
+                    raise ValueError("too much")
+                config.buy_amount = new.buy_amount
+
+            reloader = ConfigReloader(config, apply, env_path=path)
+            write_env(path, amount="-1", extra="ORDER_MODE=fastest")
+            assert await reloader.reload() is False
+            assert "GMGN_BUY_AMOUNT" in reloader.last["error"] and "ORDER_MODE" in reloader.last["error"]
+            write_env(path, amount="lots")
+            assert await reloader.reload() is False and "GMGN_BUY_AMOUNT" in reloader.last["error"]
+            write_env(path, amount="5")
+            assert await reloader.reload() is False
+            assert config.buy_amount == 0.1 and reloader.failures == 3
+    asyncio.run(run())
+
+
+def test_apply_config_swaps_live_objects():
+    from main import AlphaSniper
+
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, ".env")
+            session = os.path.join(tmp, "sniper")
+            write_env(path, session=session)
+            app = AlphaSniper(read_config(path), env_path=path)
+            write_env(path, amount="0.3", session=session,
+                      extra="EXIT_RULES=tp:2x:50,time:30m:100\nHEDGE_DELAY_MS=150\nCHANNEL_FILTERS=-1001234=alpha")
+            assert await app.reloader.reload() is True
+            assert app.pipeline.buy_amount == 0.3 and app.config.buy_amount == 0.3
+            assert app.pipeline.router.hedge_delay == 0.15
+            assert [rule.name for rule in app.pipeline.exit_engine.rules] == ["tp:2x", "time:1800s"]
+            assert app.ingest.channel(-1001234).tokens == ("alpha",)
+            assert set(app.reloader.last["changed"]) <= RELOADABLE
+
+            # 제어 API로 바꾼 매수 금액은 관련 없는 설정이 바뀌어도 유지
+            app.set_buy_amount(0.5)
+            write_env(path, amount="0.3", session=session, extra="HEDGE_DELAY_MS=200")
+            assert await app.reloader.reload() is True
+            assert app.pipeline.buy_amount == 0.5 and app.config.buy_amount == 0.5
+            assert app.pipeline.router.hedge_delay == 0.2
+            write_env(path, amount="0.4", session=session, extra="HEDGE_DELAY_MS=200")
+            assert await app.reloader.reload() is True and app.pipeline.buy_amount == 0.4
+
+            # 시작할 때 매수 전 검사가 없었어도 블랙리스트 파일을 지정하면 바로 적용
+            assert app.pipeline.pre_trade is None
+            blacklist = os.path.join(tmp, "blacklist.txt")
+            with open(blacklist, "w", encoding="utf-8") as f:
+                f.write("0x97693439EA2F0ECDEB9135881E49F354656A911C\n")
+            write_env(path, amount="0.4", session=session, extra=f"HEDGE_DELAY_MS=200\nCA_BLACKLIST_FILE={blacklist}")
+            assert await app.reloader.reload() is True
+            assert app.pipeline.pre_trade.blacklist == {"0x97693439ea2f0ecdeb9135881e49f354656a911c"}
+            app.pipeline.exit_engine.ledger.close()
+            app.dedup.store.close()
+    asyncio.run(run())
+
+
+def test_typed_values_are_validated():
+    base = {"API_ID": "1", "API_HASH": "h", "SOURCE_BOT_ID": "@a", "TARGET_BOT_ID": "@b"}
+    assert Config(dict(base, NLF_ENABLED="on", OUTBOUND_BURST=" 7 ")).nlf_enabled is True
+    for env in ({"NLF_ENABLED": "maybe"}, {"OUTBOUND_BURST": "2.5"}, {"AUTO_SELL_PERCENT": "150"},
+                {"EXIT_EVAL_INTERVAL": "0"}, {"JOURNAL_FLUSH_SECONDS": "0"}, {"NLF_PING_INTERVAL": "0"},
+                {"NLF_PING_TIMEOUT": "-1"}):
+        try:
+            Config(dict(base, **env)).validate()
+        except ValueError as e:
+            assert next(iter(env)) in str(e)
+        else:
+            raise AssertionError(f"{env} should be rejected")
@@ -0,0 +1,85 @@
+"""
+Tests for the multi-bot order router (router.py)
+"""
+import asyncio
+
+from router import OrderRouter
+
+
+def make_sender(delays, failures=(), sent=None):
+    """봇별 응답 지연(초)과 실패 봇을 흉내 내는 전송 함수"""
+    async def send(bot, message):
+        if sent is not None:
+            sent.append(bot)
+        await asyncio.sleep(delays.get(bot, 0))
+        if bot in failures:
+            raise ConnectionError(f"{bot} unavailable")
+    return send
+
+
+def test_single_bot_fast_path():
+    async def run():
+        sent = []
+        router = OrderRouter(make_sender({}, sent=sent), ["@gmgn"])
+        assert await router.dispatch("/buy 0xabc 0.1", "BUY") == "@gmgn"
+        assert sent == ["@gmgn"]
+    asyncio.run(run())
+
+
+def test_hedge_sends_to_backup_when_primary_is_slow():
+    async def run():
+        sent, acked = [], []
+        router = OrderRouter(
+            make_sender({"@gmgn": 0.2, "@backup": 0.01}, sent=sent),
+            ["@gmgn", "@backup"], hedge_delay=0.02,
+        )
+        winner = await router.dispatch("/buy 0xabc 0.1", "BUY", on_ack=acked.append)
+        assert winner == "@backup"
+        assert sent == ["@gmgn", "@backup"]
+        await asyncio.sleep(0.25)  # 늦게 확인된 주 봇 전송도 on_ack로 보고됨
+        assert acked == ["@backup", "@gmgn"]
+        # 백업 봇이 더 빨랐으므로 주 봇이 바뀜
+        assert router.primary == "@backup"
+    asyncio.run(run())
+
+
+def test_failover_is_immediate_on_error():
+    async def run():
+        router = OrderRouter(
+            make_sender({}, failures={"@gmgn"}), ["@gmgn", "@backup"], hedge_delay=10,
+        )
+        assert await asyncio.wait_for(router.dispatch("/buy 0xabc 0.1", "BUY"), 1) == "@backup"
+        assert router.stats["@gmgn"].failed == 1
+        assert router.ranked() == ["@backup", "@gmgn"]
+    asyncio.run(run())
+
+
+def test_all_mode_sends_to_every_bot():
+    async def run():
+        sent, acked = [], []
+        router = OrderRouter(make_sender({}, sent=sent), ["@a", "@b", "@c"], mode="all")
+        await router.dispatch("/buy 0xabc 0.1", "BUY", on_ack=acked.append)
+        await asyncio.sleep(0.01)
+        assert sorted(sent) == ["@a", "@b", "@c"]
+        assert sorted(acked) == ["@a", "@b", "@c"]
+    asyncio.run(run())
+
+
+def test_all_bots_failing_returns_none_after_rounds():
+    async def run():
+        router = OrderRouter(
+            make_sender({}, failures={"@a", "@b"}), ["@a", "@b"], max_rounds=2, retry_delay=0,
+        )
+        assert await router.dispatch("/buy 0xabc 0.1", "BUY") is None
+        assert router.stats["@a"].sent == 2
+        assert router.stats["@b"].sent == 2
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    test_single_bot_fast_path()
+    test_hedge_sends_to_backup_when_primary_is_slow()
+    test_failover_is_immediate_on_error()
+    test_all_mode_sends_to_every_bot()
+    test_all_bots_failing_returns_none_after_rounds()
+    print("✅ router tests passed")
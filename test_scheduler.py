@@ -0,0 +1,131 @@
+"""
+Tests for the durable auto-sell scheduler (scheduler.py)
+Uses sub-second delays instead of real auto-sell timings.
+"""
+import os
+import asyncio
+import tempfile
+
+import scheduler
+from scheduler import SellScheduler
+
+CA1 = "0x1111111111111111111111111111111111111111"
+CA2 = "0x2222222222222222222222222222222222222222"
+
+
+def make_sender(sent, results=None):
+    async def send(order):
+        sent.append(order.ca)
+        return results.pop(0) if results else True
+    return send
+
+
+async def run_for(sell_scheduler, seconds):
+    task = asyncio.create_task(sell_scheduler.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+def test_orders_fire_in_due_order():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            sent = []
+            s = SellScheduler(os.path.join(tmp, "sells.json"), make_sender(sent))
+            s.schedule(CA1, 0.10, 100)
+            s.schedule(CA2, 0.02, 50)
+            await run_for(s, 0.2)
+            assert sent == [CA2, CA1]
+            assert s.pending() == []
+    asyncio.run(run())
+
+
+def test_pending_orders_survive_restart_and_overdue_fire_immediately():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "sells.json")
+            first = SellScheduler(path, make_sender([]))
+            first.schedule(CA1, 0.0, 100)
+            first.schedule(CA2, 3600, 100)
+            # 타이머 루프를 돌리지 않고 종료 (재시작 시뮬레이션)
+
+            sent = []
+            second = SellScheduler(path, make_sender(sent))
+            assert second.load() == 2
+            await run_for(second, 0.05)
+            assert sent == [CA1]
+            assert [o.ca for o in second.pending()] == [CA2]
+            # 새 예약 ID가 복원된 ID와 겹치지 않아야 함
+            assert second.schedule(CA1, 10, 100).id == 3
+    asyncio.run(run())
+
+
+def test_cancel_by_ca_and_id():
+    async def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            sent = []
+            s = SellScheduler(os.path.join(tmp, "sells.json"), make_sender(sent))
+            order = s.schedule(CA1, 0.02, 100)
+            s.schedule(CA2, 0.02, 100)
+            assert s.cancel(CA2.upper().replace("0X", "0x")) == 1
+            assert s.cancel(order.id) == 1
+            assert s.cancel(order.id) == 0
+            await run_for(s, 0.05)
+            assert sent == []
+    asyncio.run(run())
+
+
+def test_failed_sell_is_retried():
+    async def run():
+        original = scheduler.RETRY_DELAY_SECONDS
+        scheduler.RETRY_DELAY_SECONDS = 0.01
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                sent = []
+                s = SellScheduler(os.path.join(tmp, "sells.json"), make_sender(sent, [False, True]))
+                s.schedule(CA1, 0, 100)
+                await run_for(s, 0.1)
+                assert sent == [CA1, CA1]
+                assert s.pending() == []
+        finally:
+            scheduler.RETRY_DELAY_SECONDS = original
+    asyncio.run(run())
+
+
+def test_changes_are_appended_and_compacted():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sells.json")
+        s = SellScheduler(path, make_sender([]))
+        orders = [s.schedule(f"0x{i:040x}", 3600, 100) for i in range(600)]
+        for order in orders[100:]:
+            s.cancel(order.id)
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert len(lines) <= 2 * scheduler.COMPACT_MIN_LINES  # 변경 기록이 쌓이면 대기 중인 예약만 남김
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"put": {"id": 9')  # 비정상 종료로 잘린 줄
+
+        restored = SellScheduler(path, make_sender([]))
+        assert restored.load() == 100
+        assert [o.id for o in restored.pending()] == [o.id for o in orders[:100]]
+
+
+def test_legacy_json_list_is_loaded():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sells.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('[{"id": 4, "ca": "%s", "due": 10.0, "percent": 100, "created": 1.0, "attempts": 0, "bot": null}]' % CA1)
+        s = SellScheduler(path, make_sender([]))
+        assert s.load() == 1 and s.schedule(CA2, 10, 100).id == 5
+        restored = SellScheduler(path, make_sender([]))
+        assert restored.load() == 2
+
+
+if __name__ == "__main__":
+    test_orders_fire_in_due_order()
+    test_pending_orders_survive_restart_and_overdue_fire_immediately()
+    test_cancel_by_ca_and_id()
+    test_failed_sell_is_retried()
+    test_changes_are_appended_and_compacted()
+    test_legacy_json_list_is_loaded()
+    print("✅ scheduler tests passed")
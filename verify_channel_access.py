@@ -1,7 +1,9 @@
 import os
 import asyncio
 from dotenv import load_dotenv
-from telethon import TelegramClient
+from telethon import TelegramClient, utils
+
+from backfill import CursorStore
 
 # Load environment variables
 load_dotenv()
@@ -38,6 +40,14 @@ async def main():
             print(f"Content: {last_msg.text[:100]}...") # Show first 100 chars
         else:
             print("\n✅ Connection success, but the channel is empty.")
+
+        # Show how far behind the stored backfill cursor is (see backfill.py)
+        cursors = CursorStore(f"{session_name}.cursors.json")
+        if cursors.load() and messages:
+            last_seen = cursors.get(utils.get_peer_id(entity))
+            if last_seen is not None:
+                missed = await client.get_messages(entity, min_id=last_seen, limit=100)
+                print(f"Last processed message id: {last_seen} ({len(missed)} newer message(s) to backfill)")
             
     except Exception as e:
         print(f"\n❌ Error: Could not access the channel. Reason: {e}")